@@ -0,0 +1,193 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import os
+import time
+import json
+import botocore
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from clients import ClientFactory
+from timing import add_timing_arguments, export_timings, in_current_context, spans
+from utils import exception_handler, read_config_from_json, ProjectTagsResolver
+from get_baselines_and_configs import (
+    create_arg_parser,
+    create_project_tags_resolver,
+    export_monitoring_schedule_configs,
+)
+
+logger = logging.getLogger(__name__)
+
+# default names of the files exported for each project (under <output-dir>/<project name>/)
+EXPORT_CONFIG_FILE_NAMES = {
+    "export-staging-config": "staging-monitoring-schedule-config-export.json",
+    "export-prod-config": "prod-monitoring-schedule-config-export.json",
+}
+
+
+@exception_handler
+def create_project_args(project: Dict[str, Any], defaults: Dict[str, Any], output_dir: str) -> argparse.Namespace:
+    """
+    Creates the get_baselines_and_configs.py arguments of a project listed in the batch manifest
+
+    Args:
+        project (dict[str, Any]): the project's options, using the get_baselines_and_configs.py argument names
+            without the leading "--", for example {"sagemaker-project-name": "...", "import-staging-config": "..."}
+        defaults (dict[str, Any]): options shared by all projects, overridden by the project's options
+        output_dir (str): directory used for the exported configs, if the project does not set their paths
+
+    Returns:
+        Namespace: The Namespace containing the parsed arguments (using argparse)
+    """
+    options = {**defaults, **project}
+    for option, file_name in EXPORT_CONFIG_FILE_NAMES.items():
+        options.setdefault(option, os.path.join(output_dir, options["sagemaker-project-name"], file_name))
+
+    # re-use the single-project parser, so batch runs get the same defaults and validation
+    cli_args = [item for option, value in options.items() for item in (f"--{option}", str(value))]
+    return create_arg_parser().parse_args(cli_args)
+
+
+def process_project(
+    args: argparse.Namespace,
+    sm_client: botocore.client,
+    s3_client: botocore.client,
+    tags_resolver: Optional[ProjectTagsResolver] = None,
+) -> Dict[str, Any]:
+    """
+    Exports the Monitoring Schedule configs of one project, isolating its failures from the rest of the batch
+
+    Args:
+        args (Namespace): The project's get_baselines_and_configs.py arguments
+        sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        tags_resolver (ProjectTagsResolver): optional project tags resolver shared by all projects
+
+    Returns:
+        dict[str, Any]: the project's result {"Project": ..., "Status": "Succeeded"|"Failed", "Error": ..., ...}
+    """
+    start_time = time.perf_counter()
+    result = {"Project": args.sagemaker_project_name, "Status": "Succeeded", "Error": ""}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(args.export_staging_config)), exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(args.export_prod_config)), exist_ok=True)
+        export_monitoring_schedule_configs(args, sm_client, s3_client, tags_resolver)
+        result["ExportStagingConfig"] = args.export_staging_config
+        result["ExportProdConfig"] = args.export_prod_config
+    except Exception as e:
+        result.update({"Status": "Failed", "Error": f"{type(e).__name__}: {str(e)}"})
+    result["DurationInSeconds"] = round(time.perf_counter() - start_time, 3)
+    return result
+
+
+@exception_handler
+def main():
+    # define arguments
+    parser = argparse.ArgumentParser("Get the baselines and export the monitoring configs of many SageMaker projects.")
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        default=os.environ.get("LOGLEVEL", "INFO").upper(),
+        help="Log level. One of ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET']. Default 'INFO'.",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        required=True,
+        help=(
+            'The JSON manifest file\'s name, in the format {"Defaults": {...}, "Projects": [{...}, ...]}. '
+            "Each project uses get_baselines_and_configs.py argument names without the leading '--'."
+        ),
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="batch-exports",
+        help="Directory of the exported configs, for projects that do not set their paths. Default 'batch-exports'.",
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=8, help="Number of projects processed at the same time. Default 8."
+    )
+    parser.add_argument(
+        "--summary-file",
+        type=str,
+        default="batch-summary.json",
+        help="The JSON file's name used to export the per-project results. Default 'batch-summary.json'.",
+    )
+    add_timing_arguments(parser)
+
+    # parse arguments
+    args, _ = parser.parse_known_args()
+
+    # Configure logging to output the line number and message
+    log_format = "%(levelname)s: [%(filename)s:%(lineno)s] %(message)s"
+    logging.basicConfig(format=log_format, level=args.log_level)
+    spans.reset()
+
+    # read the manifest and build each project's arguments
+    manifest = read_config_from_json(args.manifest)
+    projects_args = [
+        create_project_args(project, manifest.get("Defaults", {}), args.output_dir)
+        for project in manifest.get("Projects", [])
+    ]
+
+    # create clients shared by all projects, with a connection pool large enough for all workers
+    max_concurrency = max([project_args.max_concurrency for project_args in projects_args], default=1)
+    # (the retries, rate limits and per-project call budget, shared by all projects, come from the first project)
+    project_call_budget = projects_args[0].api_call_budget if projects_args else {}
+    client_factory = ClientFactory(
+        max_pool_connections=max(10, args.max_workers * max_concurrency),
+        max_attempts=projects_args[0].max_attempts if projects_args else 8,
+        api_rate_limits=projects_args[0].api_rate_limits if projects_args else None,
+        api_call_budget={api: budget * len(projects_args) for api, budget in project_call_budget.items()},
+    )
+    sm_client = client_factory.client("sagemaker")
+    s3_client = client_factory.client("s3")
+
+    # share the project tags lookups across projects (the on-disk cache settings come from the first project)
+    tags_resolver = create_project_tags_resolver(projects_args[0], sm_client) if projects_args else None
+
+    # process the projects
+    logger.info(f"Processing {len(projects_args)} projects using {args.max_workers} workers...")
+    with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+        # run the projects in copies of the current context, so their timing spans are nested under main's
+        futures = [
+            executor.submit(in_current_context(process_project), project_args, sm_client, s3_client, tags_resolver)
+            for project_args in projects_args
+        ]
+        results = [future.result() for future in futures]
+
+    # report the results
+    failed = [result for result in results if result["Status"] == "Failed"]
+    summary = {
+        "Succeeded": len(results) - len(failed),
+        "Failed": len(failed),
+        "Projects": results,
+        "ApiCalls": client_factory.call_stats.to_dict(),
+    }
+    client_factory.call_stats.log_summary()
+    export_timings(args)
+    for result in failed:
+        logger.error(f"{result['Project']}: {result['Error']}")
+    logger.info(f"Batch finished: {summary['Succeeded']} succeeded, {summary['Failed']} failed")
+    with open(args.summary_file, "w") as f:
+        json.dump(summary, f, indent=4)
+
+    client_factory.check_budget()
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(results)} projects failed, see {args.summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Measures the throughput of the local bias metrics (local_monitoring/bias.py), separately for reading the merged
+records (JSON/CSV parsing, which dominates) and for the metrics themselves, so small windows and large ones are both
+reported honestly.
+
+    python benchmarks/bias_metrics.py --records 1000 100000 --compute-records 1000000 10000000 --facet-values 2 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from local_monitoring.bias import (  # noqa: E402
+    compute_bias_report,
+    is_positive,
+    post_training_bias_metrics,
+    read_bias_dataset,
+)
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Returns the best wall time, in seconds, of repeated calls
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def make_config() -> Dict[str, Any]:
+    return {
+        "headers": ["target", "facet", "group", "amount"],
+        "label": "target",
+        "label_values_or_threshold": [1],
+        "facet": [{"name_or_index": "facet"}, {"name_or_index": "amount", "value_or_threshold": [50]}],
+        "group_variable": "group",
+        "probability_threshold": 0.5,
+    }
+
+
+def write_merged_dataset(directory: str, num_records: int, num_facet_values: int, seed: int = 0) -> None:
+    """
+    Writes synthetic merged records (see local_monitoring/ground_truth.py), CSV inputs "facet,group,amount" and a
+    probability output
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(directory, "2026/01/01/00"), exist_ok=True)
+    facets = rng.integers(0, num_facet_values, num_records)
+    groups = rng.integers(0, 4, num_records)
+    amounts = rng.uniform(0, 100, num_records)
+    scores = rng.random(num_records)
+    labels = rng.random(num_records) < 0.5
+    with open(os.path.join(directory, "2026/01/01/00/merged.jsonl"), "w") as f:
+        for index in range(num_records):
+            record = {
+                "captureData": {
+                    "endpointInput": {
+                        "observedContentType": "text/csv",
+                        "mode": "INPUT",
+                        "data": f"f{facets[index]},g{groups[index]},{amounts[index]:.2f}",
+                        "encoding": "CSV",
+                    },
+                    "endpointOutput": {
+                        "observedContentType": "text/csv",
+                        "mode": "OUTPUT",
+                        "data": f"{scores[index]:.4f}",
+                        "encoding": "CSV",
+                    },
+                },
+                "eventMetadata": {"eventId": str(index)},
+                "eventVersion": "0",
+                "groundTruthData": {"data": str(int(labels[index])), "encoding": "CSV"},
+            }
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def benchmark_end_to_end(num_records: int, num_facet_values: int, repeat: int) -> None:
+    config = make_config()
+    with tempfile.TemporaryDirectory() as directory:
+        write_merged_dataset(directory, num_records, num_facet_values)
+        dataset = {}
+
+        def read():
+            dataset["values"] = read_bias_dataset(directory, config["headers"], config["label"], "", "0")
+
+        def compute():
+            features, labels, _, probabilities = dataset["values"]
+            observed = is_positive(np.array(labels, dtype=str), config["label_values_or_threshold"])
+            predicted = np.array(probabilities, dtype=np.float64) > config["probability_threshold"]
+            compute_bias_report(features, observed, predicted, config)
+
+        read_seconds = best_time(read, repeat)
+        compute_seconds = best_time(compute, repeat)
+    total_seconds = read_seconds + compute_seconds
+    print(
+        f"end to end {num_records:>12,} {num_facet_values:>6} {read_seconds * 1e3:>10.1f} "
+        f"{compute_seconds * 1e3:>10.1f} {total_seconds * 1e3:>10.1f} {num_records / total_seconds:>14,.0f}"
+    )
+
+
+def benchmark_compute(num_records: int, num_facet_values: int, repeat: int) -> None:
+    rng = np.random.default_rng(0)
+    labels = rng.random(num_records) < 0.5
+    predictions = rng.random(num_records) < 0.5
+    groups = rng.integers(0, num_facet_values, num_records)
+    group_variable = rng.integers(0, 4, num_records)
+    seconds = best_time(
+        lambda: post_training_bias_metrics(labels, predictions, groups, num_facet_values, group_variable), repeat
+    )
+    print(
+        f"metrics    {num_records:>12,} {num_facet_values:>6} {'':>10} {seconds * 1e3:>10.1f} "
+        f"{seconds * 1e3:>10.1f} {num_records / seconds:>14,.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser("Benchmark the local bias metrics.")
+    parser.add_argument(
+        "--records", type=int, nargs="+", default=[1000, 100000], help="Merged records read. Default 1000 100000."
+    )
+    parser.add_argument(
+        "--compute-records",
+        type=int,
+        nargs="+",
+        default=[1000000, 10000000],
+        help="Records of the metrics only benchmark (in memory arrays). Default 1000000 10000000.",
+    )
+    parser.add_argument(
+        "--facet-values", type=int, nargs="+", default=[2, 50], help="Distinct values of the facet. Default 2 50."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (the best is reported). Default 3.")
+    args = parser.parse_args()
+
+    print(
+        f"{'':<10} {'records':>12} {'values':>6} {'read ms':>10} {'metrics ms':>10} {'total ms':>10} "
+        f"{'records/s':>14}"
+    )
+    for num_facet_values in args.facet_values:
+        for num_records in args.records:
+            benchmark_end_to_end(num_records, num_facet_values, args.repeat)
+        for num_records in args.compute_records:
+            benchmark_compute(num_records, num_facet_values, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
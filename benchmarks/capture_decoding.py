@@ -0,0 +1,150 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Measures the throughput, in records/s, of turning data capture files into feature columns: the batched reader of
+local_monitoring/capture.py (pyarrow JSON parsing, bulk base64 decoding and one CSV parse of all the payloads) against
+a naive reference decoding every line with json.loads, base64 and the csv module. Both must return the same columns.
+
+    python benchmarks/capture_decoding.py --records 10000 100000 --features 10 100
+"""
+import os
+import sys
+import csv
+import json
+import time
+import base64
+import argparse
+import tempfile
+import numpy as np
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from local_monitoring.capture import ENDPOINT_INPUT, iter_capture_files, read_capture_columns  # noqa: E402
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Returns the best wall time, in seconds, of repeated calls
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def write_capture_files(
+    directory: str, num_records: int, num_features: int, encoding: str, num_files: int = 4, seed: int = 0
+) -> None:
+    """
+    Writes synthetic data capture files (<yyyy>/<mm>/<dd>/<hh>/*.jsonl) with one CSV row of integer, fractional and
+    string features per record
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(directory, "2026/01/01/00"), exist_ok=True)
+    kinds = np.arange(num_features) % 3
+    for file_index, file_records in enumerate(np.array_split(np.arange(num_records), num_files)):
+        shape = (len(file_records), num_features)
+        integers = rng.integers(0, 1000, shape).astype(str)
+        fractions = np.char.mod("%.4f", rng.normal(0, 100, shape))
+        strings = np.char.add("category-", rng.integers(0, 20, shape).astype(str))
+        rows = np.where(kinds == 0, integers, np.where(kinds == 1, fractions, strings))
+        with open(os.path.join(directory, f"2026/01/01/00/capture-{file_index}.jsonl"), "w") as f:
+            for index, row in enumerate(rows):
+                payload = ",".join(row)
+                if encoding == "BASE64":
+                    payload = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+                record = {
+                    "captureData": {
+                        "endpointInput": {
+                            "observedContentType": "text/csv",
+                            "mode": "INPUT",
+                            "data": payload,
+                            "encoding": encoding,
+                        },
+                        "endpointOutput": {
+                            "observedContentType": "text/csv",
+                            "mode": "OUTPUT",
+                            "data": "0.5",
+                            "encoding": "CSV",
+                        },
+                    },
+                    "eventMetadata": {"eventId": f"{file_index}-{index}", "inferenceTime": "2026-01-01T00:00:00Z"},
+                    "eventVersion": "0",
+                }
+                f.write(json.dumps(record) + "\n")
+
+
+def read_naive(path: str) -> Dict[str, np.ndarray]:
+    """
+    Reference reader: json.loads, base64 and csv.reader per line, columns built from Python lists
+    """
+    rows = []
+    for file_name in iter_capture_files(path):
+        with open(file_name) as f:
+            for line in f:
+                capture = json.loads(line)["captureData"][ENDPOINT_INPUT]
+                data = capture["data"]
+                if capture["encoding"] == "BASE64":
+                    data = base64.b64decode(data).decode("utf-8")
+                rows.extend(csv.reader(data.splitlines()))
+    num_columns = max(len(row) for row in rows)
+    return {
+        f"_c{column}": np.array([row[column] if column < len(row) else "" for row in rows], dtype=str)
+        for column in range(num_columns)
+    }
+
+
+def benchmark(num_records: int, num_features: int, encoding: str, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        write_capture_files(directory, num_records, num_features, encoding)
+        expected, actual = read_naive(directory), read_capture_columns(directory)
+        if list(expected) != list(actual) or any(not np.array_equal(expected[name], actual[name]) for name in expected):
+            raise AssertionError("The batched reader and the reference returned different columns")
+        naive_seconds = best_time(lambda: read_naive(directory), repeat)
+        batched_seconds = best_time(lambda: read_capture_columns(directory), repeat)
+    print(
+        f"{num_records:>10,} {num_features:>8} {encoding:>8} {num_records / naive_seconds:>14,.0f} "
+        f"{num_records / batched_seconds:>14,.0f} {naive_seconds / batched_seconds:>8.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser("Benchmark the batched data capture reader against a per-line reference.")
+    parser.add_argument(
+        "--records", type=int, nargs="+", default=[10000, 100000], help="Captured records. Default 10000 100000."
+    )
+    parser.add_argument(
+        "--features", type=int, nargs="+", default=[10, 100], help="Features per record. Default 10 100."
+    )
+    parser.add_argument(
+        "--encodings",
+        type=str,
+        nargs="+",
+        choices=["BASE64", "CSV"],
+        default=["BASE64", "CSV"],
+        help="Encodings of the payloads. Default BASE64 CSV.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (the best is reported). Default 3.")
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'features':>8} {'encoding':>8} {'naive rec/s':>14} {'batched rec/s':>14} {'speedup':>9}")
+    for encoding in args.encodings:
+        for num_features in args.features:
+            for num_records in args.records:
+                benchmark(num_records, num_features, encoding, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+In-process, moto-style stand-ins for the Amazon SageMaker/Amazon S3 APIs used by get_baselines_and_configs.py.
+
+The fakes answer the HTTP requests of real boto3 clients (through botocore's before-send event), so the whole client
+stack (serialization, retries, the clients.py rate limiter and call accounting) runs without any network access.
+"""
+import io
+import json
+import time
+import hashlib
+import threading
+import xml.etree.ElementTree as ElementTree
+import boto3
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from botocore.awsrequest import AWSPreparedRequest, AWSResponse
+
+# environment making the clients sign requests with dummy credentials, and send plain (not aws-chunked) S3 bodies
+OFFLINE_ENVIRONMENT = {
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_SESSION_TOKEN": "benchmark",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "AWS_REQUEST_CHECKSUM_CALCULATION": "when_required",
+    "AWS_RESPONSE_CHECKSUM_VALIDATION": "when_required",
+}
+
+
+class _RawResponse(io.BytesIO):
+    """
+    urllib3-like raw response body
+    """
+
+    def stream(self, amt: int = 1024 * 1024, **kwargs):
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                return
+            yield chunk
+
+
+class FakeAws:
+    """
+    Thread-safe in-memory Amazon SageMaker (endpoints, endpoint configs, models, model packages, tags) and
+    Amazon S3 (objects, conditional reads, multipart uploads) services
+
+    Args:
+        latency_seconds (float): latency added to every request
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.api_calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._sagemaker: Dict[str, Dict[str, Any]] = {
+            "Endpoint": {},
+            "EndpointConfig": {},
+            "Model": {},
+            "ModelPackage": {},
+            "Tags": {},
+        }
+        self._objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._uploads: Dict[str, Dict[str, Any]] = {}
+
+    def install(self, session: Optional[boto3.Session] = None) -> None:
+        """
+        Serves the requests of every client created afterwards from the session (boto3's default session if None)
+
+        Args:
+            session (boto3.Session): the boto3 session
+        """
+        if session is None:
+            session = boto3._get_default_session()
+        # registered last, so the clients' own before-send handlers (e.g. the rate limiter) still run first
+        session.events.register_last("before-send.sagemaker", self._handle_sagemaker_request)
+        session.events.register_last("before-send.s3", self._handle_s3_request)
+
+    # ---- resources ----
+
+    def add_deployed_model(
+        self, endpoint_name: str, model_name: str, model_package_name: str, baselines: Dict[str, Dict[str, str]]
+    ) -> None:
+        """
+        Adds an endpoint serving a model created from a registered model package
+
+        Args:
+            endpoint_name (str): the endpoint name
+            model_name (str): the model name
+            model_package_name (str): the model package ARN
+            baselines (dict[str, dict[str, str]]): the model package DriftCheckBaselines S3 URIs, in the format
+                {"Bias": {"ConfigFile": <S3 URI>, ...}, ...}
+        """
+        with self._lock:
+            self._sagemaker["Endpoint"][endpoint_name] = {"EndpointConfigName": f"{endpoint_name}-config"}
+            self._sagemaker["EndpointConfig"][f"{endpoint_name}-config"] = {
+                "ProductionVariants": [{"VariantName": "AllTraffic", "ModelName": model_name}]
+            }
+            self._sagemaker["Model"][model_name] = {"Containers": [{"ModelPackageName": model_package_name}]}
+            self._sagemaker["ModelPackage"][model_package_name] = {
+                "DriftCheckBaselines": {
+                    group: {name: {"ContentType": "application/json", "S3Uri": uri} for name, uri in files.items()}
+                    for group, files in baselines.items()
+                }
+            }
+
+    def add_tags(self, resource_arn: str, tags: List[Dict[str, str]]) -> None:
+        """
+        Adds tags to a SageMaker resource
+
+        Args:
+            resource_arn (str): the resource ARN
+            tags (list[dict[str, str]]): the tags in the format [{"Key":<key>, "Value":<value>}, ...]
+        """
+        with self._lock:
+            self._sagemaker["Tags"].setdefault(resource_arn, []).extend(tags)
+
+    def put_object(self, bucket: str, key: str, body: bytes) -> None:
+        """
+        Adds an S3 object
+
+        Args:
+            bucket (str): the bucket name
+            key (str): the object key
+            body (bytes): the object contents
+        """
+        self._store_object(bucket, key, body, {})
+
+    def get_object(self, bucket: str, key: str) -> Optional[bytes]:
+        """
+        Returns:
+            bytes: an S3 object's contents, or None if it does not exist
+        """
+        with self._lock:
+            stored = self._objects.get((bucket, key))
+        return stored["Body"] if stored else None
+
+    def _store_object(self, bucket: str, key: str, body: bytes, headers: Dict[str, str]) -> str:
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        kept_headers = {
+            name: value
+            for name, value in headers.items()
+            if name.lower().startswith("x-amz-meta-") or name.lower() in ("content-type", "content-encoding")
+        }
+        with self._lock:
+            self._objects[(bucket, key)] = {"Body": body, "ETag": etag, "Headers": kept_headers}
+        return etag
+
+    # ---- requests ----
+
+    def _record_call(self, api: str) -> None:
+        with self._lock:
+            self.api_calls[api] += 1
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+    @staticmethod
+    def _response(request: AWSPreparedRequest, status: int, headers: Dict[str, str], body: bytes) -> AWSResponse:
+        return AWSResponse(request.url, status, {"Content-Length": str(len(body)), **headers}, _RawResponse(body))
+
+    @staticmethod
+    def _request_body(request: AWSPreparedRequest) -> bytes:
+        body = request.body
+        if body is None:
+            return b""
+        if hasattr(body, "read"):
+            body = body.read()
+        return body.encode() if isinstance(body, str) else bytes(body)
+
+    def _handle_sagemaker_request(self, request: AWSPreparedRequest, **kwargs) -> AWSResponse:
+        operation = request.headers["X-Amz-Target"].decode().split(".")[-1]
+        params = json.loads(self._request_body(request) or b"{}")
+        self._record_call(f"sagemaker.{operation}")
+
+        resource_types = {
+            "DescribeEndpoint": ("Endpoint", "EndpointName"),
+            "DescribeEndpointConfig": ("EndpointConfig", "EndpointConfigName"),
+            "DescribeModel": ("Model", "ModelName"),
+            "DescribeModelPackage": ("ModelPackage", "ModelPackageName"),
+        }
+        with self._lock:
+            if operation == "ListTags":
+                # one tag per page, so the pagination is exercised
+                tags = self._sagemaker["Tags"].get(params["ResourceArn"], [])
+                start = int(params.get("NextToken", "0"))
+                result = {"Tags": tags[start : start + 1]}
+                if start + 1 < len(tags):
+                    result["NextToken"] = str(start + 1)
+            elif operation in resource_types:
+                resource_type, name_parameter = resource_types[operation]
+                result = self._sagemaker[resource_type].get(params[name_parameter])
+            else:
+                result = None
+        if result is None:
+            body = {"__type": "ValidationException", "message": f"Could not find resource for {operation}"}
+            return self._response(request, 400, {}, json.dumps(body).encode())
+        return self._response(request, 200, {"Content-Type": "application/x-amz-json-1.1"}, json.dumps(result).encode())
+
+    @staticmethod
+    def _s3_error(request: AWSPreparedRequest, status: int, code: str) -> AWSResponse:
+        if request.method == "HEAD" or status == 304:
+            return FakeAws._response(request, status, {}, b"")
+        body = f"<Error><Code>{code}</Code><Message>{code}</Message></Error>".encode()
+        return FakeAws._response(request, status, {"Content-Type": "application/xml"}, body)
+
+    def _handle_s3_request(self, request: AWSPreparedRequest, **kwargs) -> AWSResponse:
+        url = urlsplit(request.url)
+        host_label = url.hostname.split(".")[0]
+        if host_label == "s3" or host_label.startswith("s3-"):
+            bucket, _, key = url.path.lstrip("/").partition("/")
+        else:
+            bucket, key = host_label, url.path.lstrip("/")
+        key = unquote(key)
+        query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        headers = {name: value.decode() if isinstance(value, bytes) else value for name, value in request.headers.items()}
+
+        if request.method == "POST" and "uploads" in query:
+            self._record_call("s3.CreateMultipartUpload")
+            upload_id = hashlib.sha256(f"{bucket}/{key}/{time.time_ns()}".encode()).hexdigest()
+            with self._lock:
+                self._uploads[upload_id] = {"Headers": headers, "Parts": {}}
+            body = (
+                "<InitiateMultipartUploadResult><Bucket>{}</Bucket><Key>{}</Key><UploadId>{}</UploadId>"
+                "</InitiateMultipartUploadResult>".format(bucket, key, upload_id)
+            )
+            return self._response(request, 200, {}, body.encode())
+        if request.method == "PUT" and "uploadId" in query:
+            self._record_call("s3.UploadPart")
+            part = self._request_body(request)
+            with self._lock:
+                self._uploads[query["uploadId"]]["Parts"][int(query["partNumber"])] = part
+            return self._response(request, 200, {"ETag": f'"{hashlib.md5(part).hexdigest()}"'}, b"")
+        if request.method == "POST" and "uploadId" in query:
+            self._record_call("s3.CompleteMultipartUpload")
+            part_numbers = [
+                int(element.text)
+                for element in ElementTree.fromstring(self._request_body(request)).iter()
+                if element.tag.endswith("PartNumber")
+            ]
+            with self._lock:
+                upload = self._uploads.pop(query["uploadId"])
+            etag = self._store_object(
+                bucket, key, b"".join(upload["Parts"][number] for number in part_numbers), upload["Headers"]
+            )
+            body = f"<CompleteMultipartUploadResult><ETag>{etag}</ETag></CompleteMultipartUploadResult>"
+            return self._response(request, 200, {}, body.encode())
+        if request.method == "DELETE" and "uploadId" in query:
+            self._record_call("s3.AbortMultipartUpload")
+            with self._lock:
+                self._uploads.pop(query["uploadId"], None)
+            return self._response(request, 204, {}, b"")
+        if request.method == "PUT":
+            self._record_call("s3.PutObject")
+            etag = self._store_object(bucket, key, self._request_body(request), headers)
+            return self._response(request, 200, {"ETag": etag}, b"")
+        if request.method in ("GET", "HEAD"):
+            self._record_call("s3.GetObject" if request.method == "GET" else "s3.HeadObject")
+            with self._lock:
+                stored = self._objects.get((bucket, key))
+            if stored is None:
+                return self._s3_error(request, 404, "NoSuchKey")
+            if "If-Match" in headers and headers["If-Match"] != stored["ETag"]:
+                return self._s3_error(request, 412, "PreconditionFailed")
+            if headers.get("If-None-Match") == stored["ETag"]:
+                return self._s3_error(request, 304, "NotModified")
+            response_headers = {**stored["Headers"], "ETag": stored["ETag"]}
+            if request.method == "HEAD":
+                return AWSResponse(
+                    request.url,
+                    200,
+                    {**response_headers, "Content-Length": str(len(stored["Body"]))},
+                    _RawResponse(b""),
+                )
+            return self._response(request, 200, response_headers, stored["Body"])
+        return self._s3_error(request, 501, "NotImplemented")
@@ -0,0 +1,211 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Runs the documented merged dataset flow end to end on synthetic data: local_monitoring.ground_truth joins the
+captured inferences with the labels (twice, with labels appended in between), then local_monitoring.model_quality
+and local_monitoring.bias read the merged dataset. Fails if a step fails or if the metrics do not match the generated
+records.
+
+    python benchmarks/ground_truth_flow.py --records 1000 --late-records 200
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+import tempfile
+import subprocess
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START = datetime.datetime(2026, 1, 1, 5)
+
+
+def write_lines(file_name: str, records: List[Dict], mode: str = "w") -> None:
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    with open(file_name, mode) as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def make_capture(index: int) -> Dict:
+    return {
+        "captureData": {
+            "endpointInput": {
+                "observedContentType": "text/csv",
+                "mode": "INPUT",
+                "data": f"{facet(index)},{index % 100}",
+                "encoding": "CSV",
+            },
+            "endpointOutput": {
+                "observedContentType": "text/csv",
+                "mode": "OUTPUT",
+                "data": str(predicted_probability(index)),
+                "encoding": "CSV",
+            },
+        },
+        "eventMetadata": {"eventId": f"event-{index}", "inferenceTime": "2026-01-01T04:00:00Z"},
+        "eventVersion": "0",
+    }
+
+
+def make_label(index: int) -> Dict:
+    return {
+        "groundTruthData": {"data": str(label(index)), "encoding": "CSV"},
+        "eventMetadata": {"eventId": f"event-{index}"},
+        "eventVersion": "0",
+    }
+
+
+def predicted_probability(index: int) -> float:
+    return (index % 10) / 10
+
+
+def label(index: int) -> int:
+    return index % 3 % 2
+
+
+def facet(index: int) -> int:
+    # correlated with the predictions, for a non zero DPPL
+    return index % 10 // 4
+
+
+def run_module(module: str, *args: str) -> None:
+    subprocess.run([sys.executable, "-m", module, *args], cwd=REPO_DIR, check=True)
+
+
+def join(path: str) -> None:
+    run_module(
+        "local_monitoring.ground_truth",
+        "--capture-path",
+        os.path.join(path, "capture"),
+        "--ground-truth-path",
+        os.path.join(path, "ground-truth"),
+        "--output-path",
+        os.path.join(path, "merged"),
+        "--start",
+        START.isoformat(),
+        "--hours",
+        "1",
+        "--capture-lookback-hours",
+        "2",
+    )
+
+
+def check_model_quality(path: str, labeled: List[int]) -> List[str]:
+    output_path = os.path.join(path, "model-quality")
+    run_module(
+        "local_monitoring.model_quality",
+        "--dataset-source",
+        os.path.join(path, "merged"),
+        "--output-path",
+        output_path,
+        "--problem-type",
+        "BinaryClassification",
+        "--probability-attribute",
+        "0",
+        "--probability-threshold-attribute",
+        "0.5",
+    )
+    with open(os.path.join(output_path, "statistics.json")) as f:
+        statistics = json.load(f)
+
+    expected = {"0": {"0": 0, "1": 0}, "1": {"0": 0, "1": 0}}
+    for index in labeled:
+        expected[str(label(index))][str(int(predicted_probability(index) >= 0.5))] += 1
+    errors = []
+    if statistics["dataset"]["item_count"] != len(labeled):
+        errors.append(f"model quality item_count {statistics['dataset']['item_count']} != {len(labeled)}")
+    confusion_matrix = statistics["binary_classification_metrics"]["confusion_matrix"]
+    if confusion_matrix != expected:
+        errors.append(f"model quality confusion matrix {confusion_matrix} != {expected}")
+    return errors
+
+
+def check_bias(path: str, labeled: List[int]) -> List[str]:
+    output_path = os.path.join(path, "bias")
+    config = {
+        "headers": ["label", "facet", "amount"],
+        "label": "label",
+        "label_values_or_threshold": [1],
+        "facet": [{"name_or_index": "facet", "value_or_threshold": [1]}],
+        "probability_threshold": 0.5,
+    }
+    with open(os.path.join(path, "analysis_config.json"), "w") as f:
+        json.dump(config, f)
+    run_module(
+        "local_monitoring.bias",
+        "--dataset-source",
+        os.path.join(path, "merged"),
+        "--analysis-config",
+        os.path.join(path, "analysis_config.json"),
+        "--output-path",
+        output_path,
+        "--probability-attribute",
+        "0",
+    )
+    with open(os.path.join(output_path, "analysis.json")) as f:
+        analysis = json.load(f)
+
+    # difference in positive proportions in predicted labels, advantaged (facet != 1) - disadvantaged (facet == 1)
+    proportions = []
+    for disadvantaged in [False, True]:
+        group = [index for index in labeled if (facet(index) == 1) == disadvantaged]
+        proportions.append(sum(predicted_probability(index) > 0.5 for index in group) / len(group))
+    expected = proportions[0] - proportions[1]
+    metrics = {
+        metric["name"]: metric["value"]
+        for metric in analysis["post_training_bias_metrics"]["facets"]["facet"][0]["metrics"]
+    }
+    if abs(metrics["DPPL"] - expected) > 1e-9:
+        return [f"bias DPPL {metrics['DPPL']} != {expected}"]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser("Check the ground truth join -> model quality and bias flow.")
+    parser.add_argument("--records", type=int, default=1000, help="Number of captured inferences. Default 1000.")
+    parser.add_argument(
+        "--late-records", type=int, default=200, help="Number of labels appended after the first join. Default 200."
+    )
+    parser.add_argument("--unmatched", type=int, default=3, help="Number of labels never captured. Default 3.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        capture_file = os.path.join(path, "capture", "2026", "01", "01", "04", "capture.jsonl")
+        write_lines(capture_file, [make_capture(index) for index in range(args.records)])
+        ground_truth_file = os.path.join(path, "ground-truth", START.strftime("%Y/%m/%d/%H"), "labels.jsonl")
+        first = list(range(args.records - args.late_records))
+        unmatched = list(range(args.records, args.records + args.unmatched))
+        write_lines(ground_truth_file, [make_label(index) for index in first + unmatched])
+        join(path)
+        # late labels, appended to the processed file
+        write_lines(ground_truth_file, [make_label(index) for index in range(len(first), args.records)], mode="a")
+        join(path)
+
+        errors = check_model_quality(path, list(range(args.records)))
+        errors.extend(check_bias(path, list(range(args.records))))
+        state_path = os.path.join(path, "merged", ".join-state")
+        with open(os.path.join(state_path, "join-state.json")) as f:
+            pending_file = json.load(f)["PendingFile"]
+        with open(os.path.join(state_path, pending_file)) as f:
+            num_pending = sum(1 for line in f if line.strip())
+        if num_pending != args.unmatched:
+            errors.append(f"{num_pending} pending labels != {args.unmatched}")
+    if errors:
+        sys.exit("FAILED: " + "; ".join(errors))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
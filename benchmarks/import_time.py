@@ -0,0 +1,83 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Measures the cold start of get_baselines_and_configs.py with `python -X importtime`, and fails if it exceeds
+the startup budget or imports one of the forbidden (heavyweight) modules.
+
+    python benchmarks/import_time.py --budget-seconds 1.0
+"""
+import os
+import sys
+import argparse
+import subprocess
+from typing import Dict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that must stay out of the get_baselines_and_configs.py hot path
+FORBIDDEN_MODULES = ["sagemaker", "pandas", "numpy"]
+
+
+def measure_import_times(module: str) -> Dict[str, int]:
+    """
+    Imports a module in a fresh interpreter with `-X importtime`
+
+    Args:
+        module (str): name of the module to import
+
+    Returns:
+        dict[str, int]: cumulative import time, in microseconds, of every imported module
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        env={**os.environ, "AWS_DEFAULT_REGION": os.environ.get("AWS_DEFAULT_REGION", "us-east-1")},
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    import_times = {}
+    for line in process.stderr.splitlines():
+        # format: "import time: <self [us]> | <cumulative [us]> | <indented module name>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def main():
+    parser = argparse.ArgumentParser("Check the import time budget of get_baselines_and_configs.py.")
+    parser.add_argument("--module", type=str, default="get_baselines_and_configs", help="Module to import.")
+    parser.add_argument("--budget-seconds", type=float, default=1.0, help="Maximum import time. Default 1.0.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to print. Default 10.")
+    args = parser.parse_args()
+
+    import_times = measure_import_times(args.module)
+    total_seconds = import_times[args.module] / 1e6
+    for name, cumulative in sorted(import_times.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{cumulative / 1e6:8.3f}s  {name}")
+    print(f"import {args.module}: {total_seconds:.3f}s (budget {args.budget_seconds:.3f}s)")
+
+    errors = []
+    if total_seconds > args.budget_seconds:
+        errors.append(f"import time {total_seconds:.3f}s exceeds the {args.budget_seconds:.3f}s budget")
+    forbidden = [name for name in import_times if name.split(".")[0] in FORBIDDEN_MODULES]
+    if forbidden:
+        errors.append(f"forbidden modules imported: {', '.join(sorted(forbidden))}")
+    if errors:
+        sys.exit("FAILED: " + "; ".join(errors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Checks that json_backend.py (orjson, when installed) gives the same results as the json module, then compares
+their speed on representative constraints and analysis_config files.
+
+    python benchmarks/json_backend.py --facets 100 1000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json_backend  # noqa: E402
+from synthetic import make_analysis_config, make_bias_constraints  # noqa: E402
+
+# documents exercising the differences between orjson and the json module
+EDGE_CASE_DOCUMENTS = [
+    b'{"unicode": "\\u00e9\\u4e2d\xc3\xa9", "escapes": "a\\"b\\\\c\\n\\t\\/", "empty": [{}, [], ""]}',
+    b'{"floats": [0.1, 1e16, 1e-7, -0.0, 1.7976931348623157e308, 5e-324, 3.141592653589793]}',
+    b'{"big": 123456789012345678901234567890, "negative": -9223372036854775809}',
+    b'{"not_finite": [NaN, Infinity, -Infinity]}',
+    b'{"duplicate": 1, "duplicate": 2}',
+    b"[1, 2.5, true, false, null]",
+]
+
+
+def check_parity(documents: List[bytes]) -> None:
+    """
+    Asserts that json_backend reads/writes the documents exactly like the json module
+
+    Args:
+        documents (list[bytes]): JSON documents
+    """
+    for document in documents:
+        expected = json.loads(document)
+        result = json_backend.loads(document)
+        # compare the json module's serializations, so NaN values compare equal
+        assert json.dumps(result) == json.dumps(expected), f"loads mismatch for {document[:80]!r}"
+        assert json.dumps(json_backend.loads(json_backend.dumps(result))) == json.dumps(
+            expected
+        ), f"dumps round trip mismatch for {document[:80]!r}"
+        assert json_backend.dumps(result, pretty=True) == json.dumps(expected, indent=4).encode(
+            "utf-8"
+        ), f"pretty dumps mismatch for {document[:80]!r}"
+        assert json_backend.loads(json_backend.dumps(result, sort_keys=True)) == json.loads(
+            json.dumps(expected, sort_keys=True)
+        ) or "NaN" in json.dumps(expected), f"sorted dumps mismatch for {document[:80]!r}"
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def benchmark(name: str, contents: Dict[str, Any], repeat: int) -> None:
+    pretty = json.dumps(contents, indent=4).encode("utf-8")
+    compact = json.dumps(contents, separators=(",", ":")).encode("utf-8")
+    results = {
+        "json loads (decoded str)": best_time(lambda: json.loads(pretty.decode("utf-8")), repeat),
+        "json_backend loads (bytes)": best_time(lambda: json_backend.loads(pretty), repeat),
+        "json dumps compact": best_time(lambda: json.dumps(contents, separators=(",", ":")), repeat),
+        f"{json_backend.BACKEND} dumps compact": best_time(lambda: json_backend.dumps(contents), repeat),
+        "json dumps sorted": best_time(lambda: json.dumps(contents, separators=(",", ":"), sort_keys=True), repeat),
+        f"{json_backend.BACKEND} dumps sorted": best_time(lambda: json_backend.dumps(contents, sort_keys=True), repeat),
+    }
+    if importlib.util.find_spec("orjson") is not None:
+        # json_backend loads minus its check for integers above 64 bits
+        import orjson
+
+        results["orjson loads (unchecked)"] = best_time(lambda: orjson.loads(pretty), repeat)
+    print(f"{name} ({len(pretty):,} bytes pretty, {len(compact):,} bytes compact)")
+    for operation, seconds in results.items():
+        print(f"    {operation:<28} {seconds * 1e3:>10.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser("Check the parity and benchmark the JSON backends.")
+    parser.add_argument("--facets", type=int, nargs="+", default=[100, 1000, 5000], help="Bias facets counts.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions (best time is reported). Default 5.")
+    args = parser.parse_args()
+
+    documents = list(EDGE_CASE_DOCUMENTS)
+    for num_facets in args.facets:
+        documents.append(json.dumps(make_bias_constraints(num_facets, "pre")).encode("utf-8"))
+        documents.append(json.dumps(make_analysis_config(num_facets), indent=4).encode("utf-8"))
+    check_parity(documents)
+    print(f"parity: {len(documents)} documents identical between json_backend ({json_backend.BACKEND}) and json\n")
+
+    for num_facets in args.facets:
+        combined = make_bias_constraints(num_facets, "pre")
+        combined.update(make_bias_constraints(num_facets, "post"))
+        benchmark(f"combined_bias_constraints, {num_facets} facets", combined, args.repeat)
+        benchmark(f"analysis_config, {num_facets} features", make_analysis_config(num_facets), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Runs get_baselines_and_configs.main (or batch_get_baselines_and_configs.main for many projects) end to end against
+the in-process SageMaker/S3 fakes, with a per-request latency and synthetic constraints files of growing sizes, and
+reports the wall time, number of AWS API calls and peak (traced) memory of cold (empty caches) and warm runs.
+No network access is needed, so it can be used to regression-test concurrency/caching changes.
+
+    python benchmarks/pipeline.py --facets 10 100 1000 --projects 1 10 --latency-ms 20
+    python benchmarks/pipeline.py --output-file after.json --compare-to before.json --tolerance 0.1
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from fake_aws import OFFLINE_ENVIRONMENT, FakeAws  # noqa: E402
+from synthetic import make_analysis_config, make_bias_constraints  # noqa: E402
+
+BUCKET = "benchmark-bucket"
+
+
+def set_offline_environment() -> None:
+    """
+    Makes sure the clients can neither find real credentials/endpoints nor reach AWS
+    """
+    for name in ["AWS_PROFILE", "AWS_DEFAULT_PROFILE", "AWS_ENDPOINT_URL"]:
+        os.environ.pop(name, None)
+    os.environ["AWS_CONFIG_FILE"] = os.devnull
+    os.environ["AWS_SHARED_CREDENTIALS_FILE"] = os.devnull
+    os.environ.update(OFFLINE_ENVIRONMENT)
+
+
+def create_fake_aws(num_projects: int, num_facets: int, latency_seconds: float) -> FakeAws:
+    """
+    Creates the fake services, with one registered model deployed to staging, and its baselines, per project
+
+    Args:
+        num_projects (int): number of projects
+        num_facets (int): number of bias facets (and explainability features) of the baselines
+        latency_seconds (float): latency of every request
+
+    Returns:
+        FakeAws: the fake services
+    """
+    fake_aws = FakeAws(latency_seconds)
+    files = {
+        "pre-training-constraints.json": json.dumps(make_bias_constraints(num_facets, "pre"), indent=4),
+        "post-training-constraints.json": json.dumps(make_bias_constraints(num_facets, "post"), indent=4),
+        "analysis_config.json": json.dumps(make_analysis_config(num_facets), indent=4),
+        "constraints.json": json.dumps({"version": 0.0, "features": []}, indent=4),
+        "statistics.json": json.dumps({"version": 0.0, "dataset": {"item_count": 0}, "features": []}, indent=4),
+    }
+    for project in range(num_projects):
+        project_name = f"benchmark-project-{project}"
+        prefix = f"s3://{BUCKET}/{project_name}/baselines"
+        for file_name, contents in files.items():
+            fake_aws.put_object(BUCKET, f"{project_name}/baselines/{file_name}", contents.encode())
+        fake_aws.add_deployed_model(
+            f"{project_name}-staging",
+            f"{project_name}-model",
+            f"arn:aws:sagemaker:us-east-1:123456789012:model-package/{project_name}/1",
+            {
+                "Bias": {
+                    "PreTrainingConstraints": f"{prefix}/pre-training-constraints.json",
+                    "PostTrainingConstraints": f"{prefix}/post-training-constraints.json",
+                    "ConfigFile": f"{prefix}/analysis_config.json",
+                },
+                "Explainability": {
+                    "Constraints": f"{prefix}/constraints.json",
+                    "ConfigFile": f"{prefix}/analysis_config.json",
+                },
+                "ModelQuality": {"Constraints": f"{prefix}/constraints.json", "Statistics": f"{prefix}/statistics.json"},
+                "ModelDataQuality": {
+                    "Constraints": f"{prefix}/constraints.json",
+                    "Statistics": f"{prefix}/statistics.json",
+                },
+            },
+        )
+        fake_aws.add_tags(
+            project_arn(project_name), [{"Key": "team", "Value": "benchmark"}, {"Key": "cost-center", "Value": "1234"}]
+        )
+    return fake_aws
+
+
+def project_arn(project_name: str) -> str:
+    return f"arn:aws:sagemaker:us-east-1:123456789012:project/{project_name}"
+
+
+def project_args(project_name: str) -> Dict[str, str]:
+    """
+    Returns:
+        dict[str, str]: get_baselines_and_configs.py arguments (without the leading '--') of a project
+    """
+    return {
+        "model-monitor-role": "arn:aws:iam::123456789012:role/benchmark",
+        "sagemaker-project-id": f"p-{project_name}",
+        "sagemaker-project-name": project_name,
+        "sagemaker-project-arn": project_arn(project_name),
+        "monitor-outputs-bucket": BUCKET,
+        "import-staging-config": os.path.join(REPO_DIR, "staging-monitoring-schedule-config.json"),
+        "import-prod-config": os.path.join(REPO_DIR, "prod-monitoring-schedule-config.json"),
+    }
+
+
+def make_main(num_projects: int, work_dir: str, extra_args: List[str]) -> Callable[[], None]:
+    """
+    Creates the function running main() with the arguments of the scenario
+
+    Args:
+        num_projects (int): number of projects. A single project runs get_baselines_and_configs.main, more projects
+            run batch_get_baselines_and_configs.main
+        work_dir (str): directory of the exported configs and caches
+        extra_args (list[str]): extra get_baselines_and_configs.py arguments (applied to every project)
+
+    Returns:
+        Callable[[], None]: the function running main()
+    """
+    cache_args = ["--cache-dir", os.path.join(work_dir, "cache")] + extra_args
+    timing_args = ["--timing-report-file", os.path.join(work_dir, "timing-report.json")]
+    if num_projects == 1:
+        import get_baselines_and_configs
+
+        arguments = {
+            **project_args("benchmark-project-0"),
+            "export-staging-config": os.path.join(work_dir, "staging-export.json"),
+            "export-prod-config": os.path.join(work_dir, "prod-export.json"),
+        }
+        argv = ["get_baselines_and_configs.py", "--log-level", "WARNING"] + timing_args + cache_args
+        for name, value in arguments.items():
+            argv += [f"--{name}", value]
+        entry_point = get_baselines_and_configs.main
+    else:
+        import batch_get_baselines_and_configs
+
+        # the manifest only supports "name: value" arguments, so flags are split into pairs
+        defaults = {name.lstrip("-"): value for name, value in zip(cache_args[::2], cache_args[1::2])}
+        manifest = {
+            "Defaults": defaults,
+            "Projects": [project_args(f"benchmark-project-{project}") for project in range(num_projects)],
+        }
+        manifest_file = os.path.join(work_dir, "manifest.json")
+        with open(manifest_file, "w") as f:
+            json.dump(manifest, f)
+        argv = [
+            "batch_get_baselines_and_configs.py",
+            "--log-level",
+            "WARNING",
+            "--manifest",
+            manifest_file,
+            "--output-dir",
+            os.path.join(work_dir, "exports"),
+            "--summary-file",
+            os.path.join(work_dir, "summary.json"),
+        ] + timing_args
+        entry_point = batch_get_baselines_and_configs.main
+
+    def run_main() -> None:
+        sys.argv = argv
+        entry_point()
+
+    return run_main
+
+
+def measure(run_main: Callable[[], None], fake_aws: FakeAws, trace_memory: bool) -> Dict[str, Any]:
+    """
+    Runs main() once
+
+    Returns:
+        dict[str, Any]: {"WallTimeInSeconds": ..., "ApiCalls": ..., "PeakMemoryInBytes": ...(if traced)}
+    """
+    calls_before = sum(fake_aws.api_calls.values())
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        run_main()
+    finally:
+        wall_time = time.perf_counter() - start_time
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    result = {"WallTimeInSeconds": wall_time, "ApiCalls": sum(fake_aws.api_calls.values()) - calls_before}
+    if trace_memory:
+        result["PeakMemoryInBytes"] = peak_memory
+    return result
+
+
+def run_scenario(
+    num_facets: int, num_projects: int, latency_seconds: float, extra_args: List[str], repeat: int
+) -> Dict[str, Any]:
+    """
+    Runs a scenario repeat times (cold run, then warm run reusing the caches and the uploaded derived baselines),
+    plus one cold run traced with tracemalloc (tracing slows the run down, so it is not timed)
+
+    Returns:
+        dict[str, Any]: the scenario's results (best wall times)
+    """
+    import boto3
+
+    constraints_bytes = len(json.dumps(make_bias_constraints(num_facets, "pre"), indent=4)) + len(
+        json.dumps(make_bias_constraints(num_facets, "post"), indent=4)
+    )
+    cold_runs, warm_runs = [], []
+    for run in range(repeat + 1):
+        fake_aws = create_fake_aws(num_projects, num_facets, latency_seconds)
+        # every client created by main() comes from the default session, so they are all served by the fakes
+        boto3.setup_default_session()
+        fake_aws.install()
+        with tempfile.TemporaryDirectory() as work_dir:
+            run_main = make_main(num_projects, work_dir, extra_args)
+            if run == repeat:
+                peak_memory = measure(run_main, fake_aws, trace_memory=True)["PeakMemoryInBytes"]
+                continue
+            cold_runs.append(measure(run_main, fake_aws, trace_memory=False))
+            warm_runs.append(measure(run_main, fake_aws, trace_memory=False))
+            api_calls = dict(sorted(fake_aws.api_calls.items()))
+    return {
+        "Facets": num_facets,
+        "Projects": num_projects,
+        "ConstraintsBytesPerProject": constraints_bytes,
+        "ColdWallTimeInSeconds": round(min(result["WallTimeInSeconds"] for result in cold_runs), 4),
+        "WarmWallTimeInSeconds": round(min(result["WallTimeInSeconds"] for result in warm_runs), 4),
+        "ColdApiCalls": cold_runs[0]["ApiCalls"],
+        "WarmApiCalls": warm_runs[0]["ApiCalls"],
+        "PeakMemoryInBytes": peak_memory,
+        "ColdAndWarmApiCallsByOperation": api_calls,
+    }
+
+
+def compare_results(results: List[Dict[str, Any]], previous_results: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    Compares the results with previous ones
+
+    Returns:
+        list[str]: the regressions (API calls or wall time increased by more than tolerance)
+    """
+    previous = {(result["Facets"], result["Projects"]): result for result in previous_results}
+    regressions = []
+    for result in results:
+        before = previous.get((result["Facets"], result["Projects"]))
+        if before is None:
+            continue
+        for metric in ["ColdApiCalls", "WarmApiCalls", "ColdWallTimeInSeconds", "WarmWallTimeInSeconds"]:
+            if result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['Facets']} facets, {result['Projects']} projects: "
+                    f"{metric} {before[metric]} -> {result[metric]}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser("Benchmark get_baselines_and_configs.py against in-process SageMaker/S3 fakes.")
+    parser.add_argument("--facets", type=int, nargs="+", default=[10, 100, 1000], help="Bias facets counts.")
+    parser.add_argument("--projects", type=int, nargs="+", default=[1, 10], help="Projects counts.")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Latency of every API call. Default 20.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best time is reported). Default 3.")
+    parser.add_argument(
+        "--main-args",
+        type=str,
+        default="",
+        help="Extra get_baselines_and_configs.py arguments, e.g. \"--max-concurrency 8\". Default ''.",
+    )
+    parser.add_argument("--output-file", type=str, help="JSON file's name used to export the results.")
+    parser.add_argument("--compare-to", type=str, help="JSON results of a previous run, to check for regressions.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Allowed relative increase when comparing. Default 0.1."
+    )
+    args = parser.parse_args()
+
+    set_offline_environment()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(
+        f"{'facets':>7} {'projects':>8} {'constraints':>12} {'cold ms':>10} {'warm ms':>10} "
+        f"{'cold calls':>10} {'warm calls':>10} {'peak MB':>8}"
+    )
+    results = []
+    for num_projects in args.projects:
+        for num_facets in args.facets:
+            result = run_scenario(
+                num_facets, num_projects, args.latency_ms / 1e3, shlex.split(args.main_args), args.repeat
+            )
+            results.append(result)
+            print(
+                f"{num_facets:>7} {num_projects:>8} {result['ConstraintsBytesPerProject']:>12,} "
+                f"{result['ColdWallTimeInSeconds'] * 1e3:>10.1f} {result['WarmWallTimeInSeconds'] * 1e3:>10.1f} "
+                f"{result['ColdApiCalls']:>10} {result['WarmApiCalls']:>10} "
+                f"{result['PeakMemoryInBytes'] / 1e6:>8.1f}"
+            )
+
+    if args.output_file:
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare_to:
+        with open(args.compare_to, "r") as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit("FAILED: " + "; ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
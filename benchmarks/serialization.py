@@ -0,0 +1,84 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Compares the size, (de)serialization time and estimated transfer time of the derived baselines
+(combined_bias_constraints.json, monitor_analysis_config.json) for each serialization mode.
+
+    python benchmarks/serialization.py --facets 10 100 1000 --bandwidth-mbps 100
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import SERIALIZATION_MODES, serialize_json  # noqa: E402
+from synthetic import make_analysis_config, make_bias_constraints  # noqa: E402
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Returns the best wall time, in seconds, of repeated calls
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def benchmark_file(name: str, contents: Dict[str, Any], bandwidth_mbps: float, repeat: int) -> None:
+    baseline_size = None
+    for serialization in SERIALIZATION_MODES:
+        body, _ = serialize_json(contents, serialization)
+        serialize_seconds = best_time(lambda: serialize_json(contents, serialization), repeat)
+        decode = (lambda: json.loads(gzip.decompress(body))) if serialization == "gzip" else (lambda: json.loads(body))
+        parse_seconds = best_time(decode, repeat)
+        transfer_seconds = len(body) * 8 / (bandwidth_mbps * 1e6)
+        baseline_size = baseline_size or len(body)
+        print(
+            f"{name:<42} {serialization:<8} {len(body):>12,} {len(body) / baseline_size:>7.1%} "
+            f"{serialize_seconds * 1e3:>10.2f} {parse_seconds * 1e3:>10.2f} {transfer_seconds * 1e3:>12.2f} "
+            f"{(serialize_seconds + transfer_seconds + parse_seconds) * 1e3:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser("Benchmark the serialization modes of the derived baselines.")
+    parser.add_argument("--facets", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Bias facets counts.")
+    parser.add_argument("--bandwidth-mbps", type=float, default=100, help="Assumed S3 bandwidth. Default 100.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best time is reported). Default 3.")
+    args = parser.parse_args()
+
+    print(
+        f"{'file':<42} {'mode':<8} {'bytes':>12} {'size':>7} {'dump ms':>10} {'load ms':>10} "
+        f"{'transfer ms':>12} {'total ms':>10}"
+    )
+    for num_facets in args.facets:
+        combined = make_bias_constraints(num_facets, "pre")
+        combined.update(make_bias_constraints(num_facets, "post"))
+        benchmark_file(f"combined_bias_constraints ({num_facets} facets)", combined, args.bandwidth_mbps, args.repeat)
+        benchmark_file(
+            f"monitor_analysis_config ({num_facets} features)",
+            make_analysis_config(num_facets),
+            args.bandwidth_mbps,
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
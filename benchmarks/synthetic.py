@@ -0,0 +1,83 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Synthetic, but realistically shaped, Model Monitor/Clarify baselines used by the benchmarks
+"""
+import random
+from typing import Any, Dict
+
+PRE_TRAINING_METRICS = ["CI", "DPL", "KL", "JS", "LP", "TVD", "KS", "CDDL"]
+POST_TRAINING_METRICS = ["DPPL", "DI", "DCAcc", "DCR", "RD", "DAR", "DRR", "AD", "CDDPL", "TE", "FT"]
+
+
+def make_bias_constraints(num_facets: int, stage: str = "post", seed: int = 0) -> Dict[str, Any]:
+    """
+    Creates Clarify Pre/PostTrainingConstraints (analysis.json) contents
+
+    Args:
+        num_facets (int): number of facets, each with two facet values
+        stage (str): "pre" or "post" training
+        seed (int): random seed
+
+    Returns:
+        dict[str, Any]: the constraints file's contents
+    """
+    rng = random.Random(seed)
+    metrics = PRE_TRAINING_METRICS if stage == "pre" else POST_TRAINING_METRICS
+    facets = {
+        f"feature_{facet}": [
+            {
+                "value_or_threshold": str(value),
+                "metrics": [
+                    {"name": name, "description": f"{name} metric", "value": rng.uniform(-1, 1)} for name in metrics
+                ],
+            }
+            for value in range(2)
+        ]
+        for facet in range(num_facets)
+    }
+    return {
+        "version": "1.0",
+        f"{stage}_training_bias_metrics": {"label": "target", "facets": facets, "label_value_or_threshold": "1"},
+    }
+
+
+def make_analysis_config(num_features: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Creates a Clarify analysis config (the Explainability/Bias ConfigFile) contents
+
+    Args:
+        num_features (int): number of features
+        seed (int): random seed
+
+    Returns:
+        dict[str, Any]: the config file's contents
+    """
+    rng = random.Random(seed)
+    headers = [f"feature_{feature}" for feature in range(num_features)]
+    return {
+        "dataset_type": "text/csv",
+        "headers": headers,
+        "label": "target",
+        "methods": {
+            "shap": {
+                "baseline": [[round(rng.uniform(0, 100), 4) for _ in headers]],
+                "num_samples": 100,
+                "agg_method": "mean_abs",
+                "use_logit": False,
+                "save_local_shap_values": True,
+            },
+            "report": {"name": "report", "title": "Analysis Report"},
+        },
+        "predictor": {"instance_type": "ml.m5.large", "initial_instance_count": 1},
+    }
@@ -0,0 +1,198 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# default directory of the on-disk caches (add it to the CodeBuild cache paths to reuse them across builds)
+DEFAULT_CACHE_DIR = ".model-monitor-cache"
+
+
+class JsonFileCache:
+    """
+    Thread-safe key/value cache, persisted to a JSON file, where every entry expires after ttl_seconds
+
+    Args:
+        file_name (str): The cache JSON file name. The cache is kept in memory only if it is empty
+        ttl_seconds (float): entries' time to live in seconds. Entries never expire if <= 0
+    """
+
+    def __init__(self, file_name: Optional[str], ttl_seconds: float = 0):
+        self.file_name = file_name
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if file_name and os.path.exists(file_name):
+            try:
+                with open(file_name, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                # a corrupted cache must never fail the build, start from an empty one
+                logger.warning(f"Ignoring unreadable cache file {file_name}: {str(e)}")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Gets a cached value
+
+        Args:
+            key (str): the entry's key
+
+        Returns:
+            Any: the cached value, or None if the key is not cached or its entry has expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds > 0 and time.time() - entry["CreatedAt"] > self.ttl_seconds:
+            return None
+        return entry["Value"]
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Caches a JSON serializable value, and persists the cache
+
+        Args:
+            key (str): the entry's key
+            value (Any): the value to cache
+        """
+        with self._lock:
+            self._entries[key] = {"Value": value, "CreatedAt": time.time()}
+            self._save()
+
+    def delete(self, key: str) -> None:
+        """
+        Removes an entry from the cache, and persists the cache
+
+        Args:
+            key (str): the entry's key
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        if not self.file_name:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.file_name)), exist_ok=True)
+            # write to a temporary file first, so an interrupted build never leaves a truncated cache
+            temp_file_name = f"{self.file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file_name, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_file_name, self.file_name)
+        except OSError as e:
+            logger.warning(f"Unable to persist cache file {self.file_name}: {str(e)}")
+
+
+_json_file_caches: Dict[str, JsonFileCache] = {}
+_json_file_caches_lock = threading.Lock()
+
+
+def get_json_file_cache(file_name: str, ttl_seconds: float = 0) -> JsonFileCache:
+    """
+    Gets the process-wide JsonFileCache of a file, so concurrent users (e.g. batch runs) share one instance (two
+    instances of the same file would overwrite each other's entries). The instance's TTL is the last one requested
+
+    Args:
+        file_name (str): The cache JSON file name
+        ttl_seconds (float): entries' time to live in seconds. Entries never expire if <= 0
+
+    Returns:
+        JsonFileCache: the file's cache
+    """
+    with _json_file_caches_lock:
+        key = os.path.abspath(file_name)
+        if key not in _json_file_caches:
+            _json_file_caches[key] = JsonFileCache(file_name, ttl_seconds)
+        elif _json_file_caches[key].ttl_seconds != ttl_seconds:
+            logger.info(f"Cache {file_name}: TTL changed from {_json_file_caches[key].ttl_seconds}s to {ttl_seconds}s")
+            _json_file_caches[key].ttl_seconds = ttl_seconds
+        return _json_file_caches[key]
+
+
+class S3ContentCache:
+    """
+    Local cache of Amazon S3 objects' contents and ETags, used to send conditional (If-None-Match) GET requests.
+    Hits (304 Not Modified responses) and misses are counted
+
+    Args:
+        cache_dir (str): directory of the cached objects
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _file_name(self, bucket_name: str, file_key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(f"{bucket_name}/{file_key}".encode("utf-8")).hexdigest())
+
+    def get(self, bucket_name: str, file_key: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Gets a cached object
+
+        Args:
+            bucket_name (str): S3 bucket name
+            file_key (str): S3 object key
+
+        Returns:
+            tuple[str, bytes]: (ETag, body) of the cached object, or None if the object is not cached
+        """
+        file_name = self._file_name(bucket_name, file_key)
+        try:
+            with open(f"{file_name}.etag", "r") as f:
+                etag = f.read()
+            with open(f"{file_name}.body", "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        return etag, body
+
+    def set(self, bucket_name: str, file_key: str, etag: str, body: bytes) -> None:
+        """
+        Caches an object's contents
+
+        Args:
+            bucket_name (str): S3 bucket name
+            file_key (str): S3 object key
+            etag (str): the object's ETag
+            body (bytes): the object's contents
+        """
+        file_name = self._file_name(bucket_name, file_key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # remove the ETag first, so a partially written entry is never served
+            if os.path.exists(f"{file_name}.etag"):
+                os.remove(f"{file_name}.etag")
+            with open(f"{file_name}.body", "wb") as f:
+                f.write(body)
+            with open(f"{file_name}.etag", "w") as f:
+                f.write(etag)
+        except OSError as e:
+            logger.warning(f"Unable to cache s3://{bucket_name}/{file_key}: {str(e)}")
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
@@ -0,0 +1,355 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import math
+import time
+import boto3
+import argparse
+import botocore.awsrequest
+import botocore.client
+import botocore.model
+import logging
+import threading
+from botocore.config import Config
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# default per-API rate limits (calls per second). Every operation of a service gets its own token bucket
+DEFAULT_API_RATE_LIMITS = "sagemaker=10"
+
+# error codes returned by AWS services when a call is throttled
+THROTTLING_ERROR_CODES = frozenset(
+    [
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottledException",
+        "TooManyRequestsException",
+        "ProvisionedThroughputExceededException",
+        "RequestLimitExceeded",
+        "RequestThrottled",
+        "BandwidthLimitExceeded",
+        "LimitExceededException",
+        "SlowDown",
+    ]
+)
+
+
+def parse_api_limits(value: str) -> Dict[str, float]:
+    """
+    Parses per-API limits (rate limits, call budgets), used as an argparse type
+
+    Args:
+        value (str): comma separated <api>=<limit> items, where <api> is <service>[.<Operation>] (or "total" for
+            the call budgets), e.g. "sagemaker=10,sagemaker.ListTags=5,s3=100". Empty for no limits
+
+    Returns:
+        dict[str, float]: The limits in the format {<api>: <limit>, ...}
+
+    Raises:
+        argparse.ArgumentTypeError: if an item is not in the expected format
+    """
+    limits = {}
+    for item in filter(None, [item.strip() for item in value.split(",")]):
+        api, _, limit = item.partition("=")
+        try:
+            limits[api.strip()] = float(limit)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid limit '{item}', expected <service>[.<Operation>]=<limit>")
+    return limits
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, refilled at rate tokens per second up to burst tokens
+
+    Args:
+        rate (float): tokens added per second
+        burst (float): maximum number of tokens. Defaults to rate (at least 1)
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until one is available
+
+        Returns:
+            float: the time waited, in seconds
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            # reserve the token, so concurrent callers queue up behind each other without holding the lock
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class ApiCallBudgetExceededError(RuntimeError):
+    """
+    Raised when the run makes more AWS API calls than its budget allows
+    """
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Returns:
+        float: the nearest-rank percentile of sorted values (0 if there are none)
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+class ApiCallStats:
+    """
+    Thread-safe per-API accounting of the calls, retries, throttled attempts, rate limiter waits, latencies
+    (of the calls, including their retries) and payload bytes (of all the attempts)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._latencies: Dict[str, List[float]] = {}
+
+    def _get(self, api: str) -> Dict[str, Any]:
+        if api not in self._stats:
+            self._stats[api] = {
+                "Calls": 0,
+                "Retries": 0,
+                "Throttles": 0,
+                "RateLimitWaitInSeconds": 0.0,
+                "BytesSent": 0,
+                "BytesReceived": 0,
+            }
+            self._latencies[api] = []
+        return self._stats[api]
+
+    def record_call(self, api: str) -> None:
+        with self._lock:
+            self._get(api)["Calls"] += 1
+
+    def record_attempt(self, api: str, retry: bool, throttled: bool, bytes_received: int = 0) -> None:
+        with self._lock:
+            stats = self._get(api)
+            stats["Retries"] += int(retry)
+            stats["Throttles"] += int(throttled)
+            stats["BytesReceived"] += bytes_received
+
+    def record_bytes_sent(self, api: str, bytes_sent: int) -> None:
+        with self._lock:
+            self._get(api)["BytesSent"] += bytes_sent
+
+    def record_wait(self, api: str, wait: float) -> None:
+        with self._lock:
+            self._get(api)["RateLimitWaitInSeconds"] += wait
+
+    def record_latency(self, api: str, latency: float) -> None:
+        with self._lock:
+            self._get(api)
+            self._latencies[api].append(latency)
+
+    def calls(self, api: Optional[str] = None) -> int:
+        """
+        Args:
+            api (str): "total", <service> or <service>.<Operation>. All the APIs if None
+
+        Returns:
+            int: the number of calls of the API
+        """
+        with self._lock:
+            if api in (None, "total"):
+                return sum(stats["Calls"] for stats in self._stats.values())
+            if "." in api:
+                return self._stats[api]["Calls"] if api in self._stats else 0
+            return sum(stats["Calls"] for name, stats in self._stats.items() if name.split(".")[0] == api)
+
+    def exceeded_budgets(self, api_call_budget: Dict[str, float]) -> List[str]:
+        """
+        Args:
+            api_call_budget (dict[str, float]): the call budgets {"total"|<service>[.<Operation>]: <calls>, ...}
+
+        Returns:
+            list[str]: the exceeded budgets, e.g. ["sagemaker: 21 calls > 20"]
+        """
+        exceeded = []
+        for api, budget in sorted(api_call_budget.items()):
+            calls = self.calls(api)
+            if calls > budget:
+                exceeded.append(f"{api}: {calls} calls > {budget:g}")
+        return exceeded
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            dict[str, dict[str, Any]]: the stats in the format {<service>.<Operation>: {"Calls": ..., ...}, ...}
+        """
+        with self._lock:
+            result = {}
+            for api, stats in sorted(self._stats.items()):
+                latencies = sorted(self._latencies[api])
+                result[api] = {
+                    **stats,
+                    "RateLimitWaitInSeconds": round(stats["RateLimitWaitInSeconds"], 3),
+                    "LatencyP50InMs": round(percentile(latencies, 0.5) * 1e3, 1),
+                    "LatencyP90InMs": round(percentile(latencies, 0.9) * 1e3, 1),
+                    "LatencyP99InMs": round(percentile(latencies, 0.99) * 1e3, 1),
+                    "LatencyMaxInMs": round(latencies[-1] * 1e3 if latencies else 0.0, 1),
+                }
+            return result
+
+    def log_summary(self) -> None:
+        """
+        Logs the calls, retries, throttles, latencies and bytes of every API, and their totals
+        """
+        stats = self.to_dict()
+        for api, api_stats in stats.items():
+            logger.info(
+                f"{api}: {api_stats['Calls']} calls, {api_stats['Retries']} retries, "
+                f"{api_stats['Throttles']} throttles, {api_stats['RateLimitWaitInSeconds']}s rate limited, "
+                f"latency p50/p90/p99/max {api_stats['LatencyP50InMs']}/{api_stats['LatencyP90InMs']}/"
+                f"{api_stats['LatencyP99InMs']}/{api_stats['LatencyMaxInMs']} ms, "
+                f"{api_stats['BytesSent']} bytes sent, {api_stats['BytesReceived']} bytes received"
+            )
+        logger.info(
+            f"AWS API calls: {sum(s['Calls'] for s in stats.values())} calls, "
+            f"{sum(s['Retries'] for s in stats.values())} retries, "
+            f"{sum(s['Throttles'] for s in stats.values())} throttles, "
+            f"{sum(s['BytesSent'] for s in stats.values())} bytes sent, "
+            f"{sum(s['BytesReceived'] for s in stats.values())} bytes received"
+        )
+
+
+class ClientFactory:
+    """
+    Creates boto3 clients sharing the adaptive retry configuration, a per-API rate limiter and the call accounting.
+    Every client created by the factory shares the same token buckets, so concurrent projects/threads stay under
+    the configured rates together
+
+    Args:
+        max_pool_connections (int): the clients' maximum number of connections (size it to the number of workers)
+        max_attempts (int): maximum number of attempts of a call, including the first one
+        api_rate_limits (dict[str, float]): rate limits in calls per second, in the format
+            {<service>[.<Operation>]: <rate>, ...}. Operations without their own rate use their service's rate,
+            and are not rate limited if neither is set (or it is <= 0)
+        api_call_budget (dict[str, float]): maximum number of calls of the run, in the format
+            {"total"|<service>[.<Operation>]: <calls>, ...}. A call exceeding a budget fails with
+            ApiCallBudgetExceededError
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int = 10,
+        max_attempts: int = 8,
+        api_rate_limits: Optional[Dict[str, float]] = None,
+        api_call_budget: Optional[Dict[str, float]] = None,
+    ):
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            retries={"mode": "adaptive", "max_attempts": max_attempts},
+        )
+        self.api_rate_limits = api_rate_limits or {}
+        self.api_call_budget = api_call_budget or {}
+        self.call_stats = ApiCallStats()
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def client(self, service_name: str) -> botocore.client:
+        """
+        Creates a boto3 client
+
+        Args:
+            service_name (str): the AWS service name, e.g. "sagemaker"
+
+        Returns:
+            botocore.client: the boto3 client
+        """
+        client = boto3.client(service_name, config=self.config)
+        service_id = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register(f"before-call.{service_id}", self._on_before_call)
+        client.meta.events.register(f"after-call.{service_id}", self._on_after_call)
+        client.meta.events.register(f"after-call-error.{service_id}", self._on_after_call)
+        # before-send and response-received are emitted for every attempt, including the retries
+        client.meta.events.register(f"before-send.{service_id}", self._on_before_send)
+        client.meta.events.register(f"response-received.{service_id}", self._on_response_received)
+        return client
+
+    def _get_bucket(self, service_id: str, operation_name: str) -> Optional[TokenBucket]:
+        api = f"{service_id}.{operation_name}"
+        with self._lock:
+            if api not in self._buckets:
+                rate = self.api_rate_limits.get(api, self.api_rate_limits.get(service_id, 0))
+                self._buckets[api] = TokenBucket(rate) if rate > 0 else None
+            return self._buckets[api]
+
+    def check_budget(self) -> None:
+        """
+        Fails if the run exceeded its API call budget (including calls whose failure was handled by the caller)
+
+        Raises:
+            ApiCallBudgetExceededError: if a budget was exceeded
+        """
+        exceeded = self.call_stats.exceeded_budgets(self.api_call_budget)
+        if exceeded:
+            raise ApiCallBudgetExceededError(f"AWS API call budget exceeded: {', '.join(exceeded)}")
+
+    def _on_before_call(self, model: botocore.model.OperationModel, context: Dict[str, Any], **kwargs) -> None:
+        self.call_stats.record_call(f"{model.service_model.service_id.hyphenize()}.{model.name}")
+        self.check_budget()
+        context["api_call_started_at"] = time.perf_counter()
+
+    def _on_after_call(self, context: Dict[str, Any], event_name: str, **kwargs) -> None:
+        if "api_call_started_at" in context:
+            _, service_id, operation_name = event_name.split(".")
+            latency = time.perf_counter() - context["api_call_started_at"]
+            self.call_stats.record_latency(f"{service_id}.{operation_name}", latency)
+
+    def _on_before_send(self, request: botocore.awsrequest.AWSPreparedRequest, event_name: str, **kwargs) -> None:
+        _, service_id, operation_name = event_name.split(".")
+        content_length = request.headers.get("Content-Length")
+        if content_length is None and isinstance(request.body, (bytes, bytearray, str)):
+            content_length = len(request.body)
+        self.call_stats.record_bytes_sent(f"{service_id}.{operation_name}", int(content_length or 0))
+        bucket = self._get_bucket(service_id, operation_name)
+        if bucket is not None:
+            wait = bucket.acquire()
+            if wait > 0:
+                self.call_stats.record_wait(f"{service_id}.{operation_name}", wait)
+
+    def _on_response_received(
+        self,
+        parsed_response: Optional[Dict[str, Any]],
+        response_dict: Optional[Dict[str, Any]],
+        context: Dict[str, Any],
+        event_name: str,
+        **kwargs,
+    ) -> None:
+        _, service_id, operation_name = event_name.split(".")
+        error_code = (parsed_response or {}).get("Error", {}).get("Code")
+        # HEAD responses have the Content-Length of the object, but no body
+        content_length = (response_dict or {}).get("headers", {}).get("content-length", 0)
+        self.call_stats.record_attempt(
+            f"{service_id}.{operation_name}",
+            retry=context.get("retries", {}).get("attempt", 1) > 1,
+            throttled=error_code in THROTTLING_ERROR_CODES,
+            bytes_received=0 if operation_name.startswith("Head") else int(content_length or 0),
+        )
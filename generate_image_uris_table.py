@@ -0,0 +1,83 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import os
+import json
+import argparse
+import logging
+import datetime
+from typing import Any, Dict, Set
+import sagemaker
+from sagemaker import image_uris
+from utils import IMAGE_URIS_TABLE_FILE, IMAGE_URIS_TABLE_FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+
+# frameworks looked up by get_baselines_and_configs.py
+FRAMEWORKS = ["model-monitor", "clarify"]
+
+
+def get_framework_regions(framework_config: Dict[str, Any]) -> Set[str]:
+    """
+    Gets the regions listed in the "registries" sections of a SageMaker SDK image config
+
+    Args:
+        framework_config (dict[str, Any]): the framework's image config, as returned by image_uris.config_for_framework
+
+    Returns:
+        set[str]: the framework's regions
+    """
+    regions = set()
+    for key, value in framework_config.items():
+        if key == "registries" and isinstance(value, dict):
+            regions.update(value.keys())
+        elif isinstance(value, dict):
+            regions.update(get_framework_regions(value))
+    return regions
+
+
+def main():
+    # define arguments
+    parser = argparse.ArgumentParser("Generate the region -> framework -> ImageUri lookup table from the SageMaker SDK.")
+    parser.add_argument(
+        "--output-file",
+        type=str,
+        default=IMAGE_URIS_TABLE_FILE,
+        help=f"The JSON file's name used to export the table. Default '{os.path.basename(IMAGE_URIS_TABLE_FILE)}'.",
+    )
+    args, _ = parser.parse_known_args()
+    logging.basicConfig(format="%(levelname)s: [%(filename)s:%(lineno)s] %(message)s", level="INFO")
+
+    table: Dict[str, Dict[str, str]] = {}
+    for framework in FRAMEWORKS:
+        for region in sorted(get_framework_regions(image_uris.config_for_framework(framework))):
+            try:
+                table.setdefault(region, {})[framework] = image_uris.retrieve(framework=framework, region=region)
+            except ValueError as e:
+                logger.warning(f"Skipping {framework} in {region}: {str(e)}")
+
+    with open(args.output_file, "w") as f:
+        json.dump(
+            {
+                "FormatVersion": IMAGE_URIS_TABLE_FORMAT_VERSION,
+                "SageMakerVersion": sagemaker.__version__,
+                "GeneratedAt": datetime.date.today().isoformat(),
+                "ImageUris": {region: table[region] for region in sorted(table)},
+            },
+            f,
+            indent=4,
+        )
+    logger.info(f"Exported the ImageUris of {len(table)} regions to {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
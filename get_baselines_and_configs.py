@@ -11,28 +11,62 @@
 #  and limitations under the License.                                                                                 #
 # #####################################################################################################################
 import os
-import boto3
+import botocore
 import argparse
 import logging
+import json_backend
+from typing import Dict, List, Optional
+from clients import DEFAULT_API_RATE_LIMITS, ClientFactory, parse_api_limits
 from utils import (
     exception_handler,
     read_config_from_json,
     get_baselines_and_model_name,
+    get_endpoint_config_name,
+    get_missing_s3_objects,
+    get_run_fingerprint,
     process_bias_baselines,
     process_explainability_config_file,
+    run_concurrently,
     get_built_in_model_monitor_image_uri,
     extend_config,
     write_config_to_json,
+    ProjectTagsResolver,
+    SERIALIZATION_MODES,
 )
+from caching import DEFAULT_CACHE_DIR, S3ContentCache, get_json_file_cache
+from timing import add_timing_arguments, export_timings, spans
 
-# create clients
 logger = logging.getLogger(__name__)
-sm_client = boto3.client("sagemaker")
-s3_client = boto3.client("s3")
 
+# arguments not affecting the exported configs, left out of the run fingerprint
+RUN_FINGERPRINT_EXCLUDED_ARGS = [
+    "log_level",
+    "import_staging_config",  # hashed by contents
+    "import_prod_config",  # hashed by contents
+    "export_staging_config",
+    "export_prod_config",
+    "max_concurrency",
+    "cache_dir",
+    "resolution_cache_ttl",
+    "project_tags_cache_ttl",
+    "s3_content_cache",
+    "api_rate_limits",
+    "max_attempts",
+    "api_call_budget",
+    "timing_report_file",
+    "timing_metrics_format",
+    "timing_metrics_file",
+    "run_fingerprint",
+]
 
-@exception_handler
-def main():
+
+def create_arg_parser() -> argparse.ArgumentParser:
+    """
+    Creates the command line arguments parser
+
+    Returns:
+        ArgumentParser: the parser of get_baselines_and_configs.py arguments
+    """
     # define arguments
     parser = argparse.ArgumentParser("Get the arguments to create the data baseline job.")
     parser.add_argument(
@@ -96,47 +130,330 @@ def main():
         ),
     )
 
-    # parse arguments
-    args, _ = parser.parse_known_args()
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=4,
+        help=(
+            "Maximum number of concurrent Amazon S3 requests used to process the Bias/Explainability baselines. "
+            "Use 1 to process them serially. Default 4."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of the on-disk caches reused across runs. Default '{DEFAULT_CACHE_DIR}'.",
+    )
+    parser.add_argument(
+        "--resolution-cache-ttl",
+        type=int,
+        default=86400,
+        help=(
+            "Time to live, in seconds, of the cached endpoint config -> model package resolutions. "
+            "Use 0 to disable the cache. Default 86400."
+        ),
+    )
+    parser.add_argument(
+        "--project-tags-cache-ttl",
+        type=int,
+        default=0,
+        help=(
+            "Time to live, in seconds, of the on-disk cache of the SageMaker project tags. "
+            "Use 0 to disable the cache (tags are still listed once per project per run). Default 0."
+        ),
+    )
+    parser.add_argument(
+        "--s3-content-cache",
+        type=str,
+        choices=["yes", "no"],
+        default="yes",
+        help=(
+            "Whether to cache the baselines/config files downloaded from Amazon S3, and only download them again "
+            "if their ETag has changed. Default 'yes'."
+        ),
+    )
+    parser.add_argument(
+        "--streaming-merge-threshold-mb",
+        type=int,
+        default=0,
+        help=(
+            "Combined size, in MB, of the Bias Pre/Post TrainingConstraints files from which they are merged by "
+            "streaming them instead of loading them in memory. Use 0 to always load them. Default 0."
+        ),
+    )
+    parser.add_argument(
+        "--streaming-merge-memory-limit-mb",
+        type=int,
+        default=64,
+        help="Approximate memory ceiling, in MB, of the streaming merge (at least 8). Default 64.",
+    )
+    parser.add_argument(
+        "--artifact-serialization",
+        type=str,
+        choices=SERIALIZATION_MODES,
+        default="pretty",
+        help=(
+            "Serialization of the combined_bias_constraints.json/monitor_analysis_config.json files uploaded to "
+            "Amazon S3: 'pretty' (indented), 'compact' (no whitespace) or 'gzip' (compact, stored with "
+            "Content-Encoding gzip; only use it if the files' readers decompress them). Default 'pretty'."
+        ),
+    )
+    parser.add_argument(
+        "--export-serialization",
+        type=str,
+        choices=["pretty", "compact"],
+        default="pretty",
+        help="Serialization of the exported staging/prod configs: 'pretty' or 'compact'. Default 'pretty'.",
+    )
+    parser.add_argument(
+        "--api-rate-limits",
+        type=parse_api_limits,
+        default=DEFAULT_API_RATE_LIMITS,
+        help=(
+            "Per-API rate limits, in calls per second, as comma separated <service>[.<Operation>]=<rate> items "
+            "(e.g. 'sagemaker=10,sagemaker.ListTags=5,s3=100'). Every operation of a service is limited separately "
+            "to its service's rate, unless it sets its own. Use '' to disable the rate limiting. "
+            f"Default '{DEFAULT_API_RATE_LIMITS}'."
+        ),
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=8,
+        help="Maximum number of attempts (adaptive retry mode) of the AWS API calls, including the first. Default 8.",
+    )
+    parser.add_argument(
+        "--api-call-budget",
+        type=parse_api_limits,
+        default="",
+        help=(
+            "Maximum number of AWS API calls of the run, as comma separated <api>=<calls> items where <api> is "
+            "'total', <service> or <service>.<Operation> (e.g. 'total=40,sagemaker.ListTags=4'). The run fails as "
+            "soon as a budget is exceeded. Default '' (no budget)."
+        ),
+    )
+    parser.add_argument(
+        "--run-fingerprint",
+        type=str,
+        choices=["yes", "no"],
+        default="yes",
+        help=(
+            "Store the fingerprint of the run inputs (model package, stage configs, arguments, ImageUris) with the "
+            "exported configs, and only export the previous configs when it is unchanged. Default 'yes'."
+        ),
+    )
+    add_timing_arguments(parser)
 
-    # Configure logging to output the line number and message
-    log_format = "%(levelname)s: [%(filename)s:%(lineno)s] %(message)s"
-    logging.basicConfig(format=log_format, level=args.log_level)
+    return parser
+
+
+def create_project_tags_resolver(args: argparse.Namespace, sm_client: botocore.client) -> ProjectTagsResolver:
+    """
+    Creates the project tags resolver, backed by the on-disk tags cache if enabled
+
+    Args:
+        args (Namespace): The Namespace containing the parsed arguments (using argparse)
+        sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+
+    Returns:
+        ProjectTagsResolver: The project tags resolver
+    """
+    tags_cache = (
+        get_json_file_cache(
+            os.path.join(args.cache_dir, "project-tags-cache.json"), ttl_seconds=args.project_tags_cache_ttl
+        )
+        if args.project_tags_cache_ttl > 0
+        else None
+    )
+    return ProjectTagsResolver(sm_client, tags_cache)
+
+
+def get_run_fingerprint_file(args: argparse.Namespace) -> str:
+    """
+    Gets the name of the project's run fingerprint file, stored next to the exported staging config
+
+    Args:
+        args (Namespace): The Namespace containing the parsed arguments (using argparse)
+
+    Returns:
+        str: The run fingerprint file name
+    """
+    return os.path.join(
+        os.path.dirname(os.path.abspath(args.export_staging_config)),
+        f".model-monitor-fingerprint-{args.sagemaker_project_name}.json",
+    )
+
+
+@exception_handler
+def export_previous_configs(
+    args: argparse.Namespace,
+    endpoint_config_name: str,
+    image_uris: Dict[str, str],
+    project_tags: List[Dict[str, str]],
+    s3_client: botocore.client,
+) -> bool:
+    """
+    Exports the staging/prod configs of the previous run, if its fingerprint matches the inputs of this run and the
+    S3 files of its configs still exist. Endpoint configs are immutable, so an unchanged EndpointConfigName means the
+    model package is unchanged too
 
+    Args:
+        args (Namespace): The Namespace containing the parsed arguments (using argparse)
+        endpoint_config_name (str): The EndpointConfigName of the staging endpoint
+        image_uris (dict[str, str]): The Model Monitor/Clarify ImageUris {<framework>: <image uri>, ...}
+        project_tags (list[dict[str, str]]): The SageMaker project's tags
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+
+    Returns:
+        bool: True if the previous configs were exported, False if the configs need to be generated
+    """
+    fingerprint_file = get_run_fingerprint_file(args)
+    if not os.path.exists(fingerprint_file):
+        return False
+    try:
+        with open(fingerprint_file, "rb") as f:
+            previous_run = json_backend.loads(f.read())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable run fingerprint file {fingerprint_file}: {str(e)}")
+        return False
+
+    if previous_run.get("EndpointConfigName") != endpoint_config_name:
+        logger.info(f"Endpoint moved to {endpoint_config_name}, generating the configs")
+        return False
+    fingerprint = get_run_fingerprint(
+        args, previous_run["ModelPackageName"], image_uris, project_tags, RUN_FINGERPRINT_EXCLUDED_ARGS
+    )
+    if fingerprint != previous_run.get("Fingerprint"):
+        logger.info("Run inputs changed since the previous run, generating the configs")
+        return False
+    # the baselines (and the derived files) of the configs, but not the monitoring output prefixes
+    file_s3_uris = sorted(
+        {
+            value
+            for export in previous_run["Exports"].values()
+            for name, value in export["Parameters"].items()
+            if name.endswith("S3Uri") and not name.endswith("MonitoringOutputS3Uri") and value.startswith("s3://")
+        }
+    )
+    missing = get_missing_s3_objects(file_s3_uris, s3_client)
+    if missing:
+        logger.info(f"Missing S3 files of the previous configs ({', '.join(missing)}), generating the configs")
+        return False
+
+    logger.info(f"Unchanged run fingerprint {fingerprint}, exporting the previous staging/prod configs...")
+    write_config_to_json(args.export_staging_config, previous_run["Exports"]["Staging"], args.export_serialization)
+    write_config_to_json(args.export_prod_config, previous_run["Exports"]["Prod"], args.export_serialization)
+    return True
+
+
+@exception_handler
+def export_monitoring_schedule_configs(
+    args: argparse.Namespace,
+    sm_client: botocore.client,
+    s3_client: botocore.client,
+    tags_resolver: Optional[ProjectTagsResolver] = None,
+) -> None:
+    """
+    Gets the baselines of the model deployed to the staging endpoint, and exports the
+    staging/prod Monitoring Schedule configs of a SageMaker project
+
+    Args:
+        args (Namespace): The Namespace containing the parsed arguments (using argparse)
+        sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        tags_resolver (ProjectTagsResolver): optional project tags resolver, shared across projects in batch runs.
+            If not provided, one is created for this project (so staging and prod share a single tags lookup)
+    """
     # get the name of the S3 bucket used to store the outputs of the Model Monitor's
     monitor_outputs_bucket = args.monitor_outputs_bucket
 
     # use the endpoint name, deployed in staging env., to get baselines (from MR) and model name
     staging_config = read_config_from_json(args.import_staging_config)
     endpoint_name = f"{args.sagemaker_project_name}-{staging_config['Parameters']['StageName']}"
-    baselines = get_baselines_and_model_name(endpoint_name, sm_client)
+    endpoint_config_name = get_endpoint_config_name(endpoint_name, sm_client)
+
+    # get the ImageUri for model monitor and clarify (from the ImageUris table, no API calls)
+    region = sm_client.meta.region_name
+    monitor_image_uri = get_built_in_model_monitor_image_uri(region=region, framework="model-monitor")
+    clarify_image_uri = get_built_in_model_monitor_image_uri(region=region, framework="clarify")
+    image_uris = {"model-monitor": monitor_image_uri, "clarify": clarify_image_uri}
+
+    # the project tags are an input of the configs (and of the run fingerprint)
+    if tags_resolver is None:
+        tags_resolver = create_project_tags_resolver(args, sm_client)
+    project_tags = tags_resolver.get_tags(args.sagemaker_project_arn)
+
+    # the endpoint still serves the model package of the previous run, and no other input changed
+    if args.run_fingerprint == "yes" and export_previous_configs(
+        args, endpoint_config_name, image_uris, project_tags, s3_client
+    ):
+        return
+
+    resolution_cache = (
+        get_json_file_cache(
+            os.path.join(args.cache_dir, "model-resolution-cache.json"), ttl_seconds=args.resolution_cache_ttl
+        )
+        if args.resolution_cache_ttl > 0
+        else None
+    )
+    baselines = get_baselines_and_model_name(endpoint_name, sm_client, resolution_cache, endpoint_config_name)
     logger.info("Baselines returned from MR, and Model Name...")
     logger.info(baselines)
 
-    # update Bias and Explainability baselines
+    # update Bias and Explainability baselines (independent S3 reads/writes, so they can run concurrently)
+    content_cache = (
+        S3ContentCache(os.path.join(args.cache_dir, "s3-objects")) if args.s3_content_cache == "yes" else None
+    )
+    bias_baselines, explainability_baselines = run_concurrently(
+        [
+            (
+                process_bias_baselines,
+                (
+                    baselines["DriftCheckBaselines"]["Bias"],
+                    s3_client,
+                    args.max_concurrency,
+                    content_cache,
+                    args.streaming_merge_threshold_mb * 1024 * 1024,
+                    args.streaming_merge_memory_limit_mb * 1024 * 1024,
+                    args.artifact_serialization,
+                ),
+            ),
+            (
+                process_explainability_config_file,
+                (
+                    baselines["DriftCheckBaselines"]["Explainability"],
+                    baselines["ModelName"],
+                    s3_client,
+                    content_cache,
+                    args.artifact_serialization,
+                ),
+            ),
+        ],
+        args.max_concurrency,
+    )
+    if content_cache is not None:
+        logger.info(f"S3 content cache: {content_cache.hits} hits, {content_cache.misses} misses")
     updated_baselines = {
-        "Bias": process_bias_baselines(baselines["DriftCheckBaselines"]["Bias"], s3_client),
-        "Explainability": process_explainability_config_file(
-            baselines["DriftCheckBaselines"]["Explainability"], baselines["ModelName"], s3_client
-        ),
+        "Bias": bias_baselines,
+        "Explainability": explainability_baselines,
         "ModelQuality": baselines["DriftCheckBaselines"]["ModelQuality"],
         "ModelDataQuality": baselines["DriftCheckBaselines"]["ModelDataQuality"],
     }
     logger.info("Updated Baselines...")
     logger.info(updated_baselines)
 
-    # get the ImageUri for model monitor and clarify
-    monitor_image_uri = get_built_in_model_monitor_image_uri(
-        region=boto3.session.Session().region_name, framework="model-monitor"
-    )
-    clarify_image_uri = get_built_in_model_monitor_image_uri(
-        region=boto3.session.Session().region_name, framework="clarify"
-    )
-
     # extend monitoring schedule configs
     logger.info("Update Monitoring Schedule configs for staging/prod...")
     staging_monitor_config = extend_config(
-        args, monitor_image_uri, clarify_image_uri, updated_baselines, monitor_outputs_bucket, staging_config, sm_client
+        args,
+        monitor_image_uri,
+        clarify_image_uri,
+        updated_baselines,
+        monitor_outputs_bucket,
+        staging_config,
+        sm_client,
+        tags_resolver,
     )
     prod_monitor_config = extend_config(
         args,
@@ -146,12 +463,57 @@ def main():
         monitor_outputs_bucket,
         read_config_from_json(args.import_prod_config),
         sm_client,
+        tags_resolver,
     )
 
     # export monitor configs
     logger.info("Export Monitoring Schedule configs for staging/prod...")
-    write_config_to_json(args.export_staging_config, staging_monitor_config)
-    write_config_to_json(args.export_prod_config, prod_monitor_config)
+    write_config_to_json(args.export_staging_config, staging_monitor_config, args.export_serialization)
+    write_config_to_json(args.export_prod_config, prod_monitor_config, args.export_serialization)
+
+    if args.run_fingerprint == "yes":
+        run_fingerprint = {
+            "Fingerprint": get_run_fingerprint(
+                args, baselines["ModelPackageName"], image_uris, project_tags, RUN_FINGERPRINT_EXCLUDED_ARGS
+            ),
+            "EndpointConfigName": endpoint_config_name,
+            "ModelPackageName": baselines["ModelPackageName"],
+            "Exports": {"Staging": staging_monitor_config, "Prod": prod_monitor_config},
+        }
+        write_config_to_json(get_run_fingerprint_file(args), run_fingerprint, "compact")
+
+
+@exception_handler
+def main():
+    # parse arguments
+    args, _ = create_arg_parser().parse_known_args()
+
+    # Configure logging to output the line number and message
+    log_format = "%(levelname)s: [%(filename)s:%(lineno)s] %(message)s"
+    logging.basicConfig(format=log_format, level=args.log_level)
+
+    # time this run only (main may run several times in one process, e.g. in the benchmarks)
+    spans.reset()
+
+    # create clients (adaptive retries, rate limited per API)
+    client_factory = ClientFactory(
+        max_pool_connections=max(10, args.max_concurrency),
+        max_attempts=args.max_attempts,
+        api_rate_limits=args.api_rate_limits,
+        api_call_budget=args.api_call_budget,
+    )
+    sm_client = client_factory.client("sagemaker")
+    s3_client = client_factory.client("s3")
+
+    try:
+        export_monitoring_schedule_configs(args, sm_client, s3_client)
+    finally:
+        # report the calls, retries, throttles and the per-phase timings, including for failed runs
+        client_factory.call_stats.log_summary()
+        export_timings(args, {"Project": args.sagemaker_project_name})
+
+    # fail the run if it exceeded its budget, even if the failing calls were handled
+    client_factory.check_budget()
 
 
 if __name__ == "__main__":
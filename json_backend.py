@@ -0,0 +1,112 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+JSON backend used by utils.py. Documents are read and serialized with orjson, when it is installed, with the standard
+library's json module as fallback. orjson reads and writes bytes directly, without an intermediate str copy. Set
+MODEL_MONITOR_JSON_BACKEND=json to force the standard library.
+
+orjson silently reads integers above 64 bits as floats and rejects NaN/Infinity: documents with a number starting with
+19 digits (possibly such an integer), or that orjson can not read, are read by the json module
+"""
+import os
+import json
+import math
+import logging
+from typing import Any, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.environ.get("MODEL_MONITOR_JSON_BACKEND", "auto").lower() == "json":
+    orjson = None
+
+# name of the active backend
+BACKEND = "orjson" if orjson is not None else "json"
+
+# digits -> "0", "." kept (so the digits of fractions do not follow a space), anything else -> " "
+_DIGITS_TABLE = bytes(
+    ord("0") if ord("0") <= byte <= ord("9") else byte if byte == ord(".") else ord(" ") for byte in range(256)
+)
+# 2^63 has 19 digits: numbers starting with fewer digits are floats or integers that fit in 64 bits
+_LONG_DIGITS = b"0" * 19
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserializes a JSON document
+
+    Args:
+        data (bytes|str): the JSON document, bytes are decoded as UTF-8
+
+    Returns:
+        Any: the deserialized document
+    """
+    if orjson is not None and not _has_long_integer(data.encode("utf-8") if isinstance(data, str) else data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity, or an invalid document (the json module raises its own error)
+            pass
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serializes an object to a JSON document
+
+    Args:
+        obj (Any): the object to serialize
+        pretty (bool): indent the document with 4 spaces (always using the json module, as orjson only
+            supports 2 spaces, so pretty documents are identical whatever the backend). Default False (compact)
+        sort_keys (bool): sort the objects' keys. Default False
+
+    Returns:
+        bytes: the UTF-8 encoded JSON document
+    """
+    if pretty:
+        return json.dumps(obj, indent=4, sort_keys=sort_keys).encode("utf-8")
+
+    if orjson is not None:
+        try:
+            document = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+            # orjson writes NaN/Infinity as null, the json module keeps them
+            if b"null" not in document or not _has_non_finite_float(obj):
+                return document
+        except TypeError:
+            # objects orjson can not serialize (non-string keys, integers above 64 bits, ...)
+            pass
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+def _has_long_integer(data: bytes) -> bool:
+    # a byte translation and a substring search, in C (also true for long digit runs in strings)
+    digits = bytes(data).translate(_DIGITS_TABLE)
+    return digits.startswith(_LONG_DIGITS) or b" " + _LONG_DIGITS in digits
+
+
+def _has_non_finite_float(obj: Any) -> bool:
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
@@ -0,0 +1,305 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Streaming data-quality baselining: computes the statistics.json and the suggested constraints.json of a training
+dataset (CSV, JSON Lines or Parquet), in the Model Monitor schema, without a baselining processing job. The dataset is
+read in fixed-size chunks into the mergeable sketches of local_monitoring.incremental, so the memory is bounded by the
+chunk size, and the columns are split across a process pool.
+
+    python -m local_monitoring.baseline --dataset ./train.csv --dataset-format csv \
+        --output-path s3://bucket/baselines/data-quality
+"""
+import os
+import csv
+import json
+import logging
+import argparse
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List
+from local_monitoring.constraints import DEFAULT_MONITORING_CONFIG, STATISTICS_FILE_NAME
+from local_monitoring.incremental import DatasetSketch, FeatureSketch
+from local_monitoring.statistics import FRACTIONAL, INTEGRAL, MAX_CATEGORICAL_BUCKETS, STRING, FeatureProfile
+from local_monitoring.storage import create_s3_client, write_json_uri
+
+logger = logging.getLogger(__name__)
+
+CONSTRAINTS_FILE_NAME = "constraints.json"
+DATASET_FORMATS = ["csv", "json", "parquet"]
+DATASET_EXTENSIONS = {"csv": (".csv",), "json": (".json", ".jsonl"), "parquet": (".parquet",)}
+DEFAULT_CHUNK_SIZE_MB = 8
+# String features get a domain constraint when they have at most this ratio of distinct values
+MAX_DOMAIN_DISTINCT_RATIO = 0.1
+
+
+def list_dataset_files(path: str, dataset_format: str) -> List[str]:
+    """
+    Args:
+        path (str): The dataset file, or a directory of files
+        dataset_format (str): "csv", "json" (JSON Lines) or "parquet"
+
+    Returns:
+        list[str]: The dataset files, in order (files without the format's extension are skipped in directories)
+    """
+    if os.path.isfile(path):
+        return [path]
+    file_names = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        file_names.extend(
+            os.path.join(root, name) for name in sorted(files) if name.endswith(DATASET_EXTENSIONS[dataset_format])
+        )
+    if not file_names:
+        raise ValueError(f"No {dataset_format} files found under {path}")
+    return file_names
+
+
+def dataset_columns(file_name: str, dataset_format: str, header: bool = True) -> List[str]:
+    """
+    Reads the column names of a dataset from its first file: the CSV header ("_c<index>" without header), the Parquet
+    schema, or the keys of the first JSON Lines chunk
+
+    Returns:
+        list[str]: The column names
+    """
+    if dataset_format == "parquet":
+        return pq.ParquetFile(file_name).schema_arrow.names
+    with open(file_name, newline="") as f:
+        if dataset_format == "csv":
+            first_row = next(csv.reader(f), [])
+            return first_row if header else [f"_c{index}" for index in range(len(first_row))]
+        names: Dict[str, None] = {}
+        for line in f.readlines(DEFAULT_CHUNK_SIZE_MB << 20):
+            if line.strip():
+                names.update(dict.fromkeys(json.loads(line)))
+        return list(names)
+
+
+def _to_strings(array: pa.ChunkedArray) -> np.ndarray:
+    if pa.types.is_floating(array.type):
+        # pyarrow casts 1.0 to "1", which would be inferred as Integral: numpy keeps the decimal point
+        values = array.to_numpy(zero_copy_only=False).astype(str)
+        values[pc.is_null(array).to_numpy(zero_copy_only=False)] = ""
+        return values
+    try:
+        values = pc.fill_null(pc.cast(array, pa.string()), "")
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # nested types
+        return np.array(["" if value is None else json.dumps(value) for value in array.to_pylist()], dtype=str)
+    return values.to_numpy(zero_copy_only=False).astype(str)
+
+
+def iter_chunks(
+    file_name: str,
+    dataset_format: str,
+    columns: List[str],
+    all_columns: List[str],
+    header: bool = True,
+    chunk_bytes: int = DEFAULT_CHUNK_SIZE_MB << 20,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Reads a subset of the columns of a dataset file in chunks of about chunk_bytes (of the file)
+
+    Args:
+        file_name (str): The dataset file
+        dataset_format (str): "csv", "json" (JSON Lines) or "parquet"
+        columns (list[str]): The columns to read
+        all_columns (list[str]): All the columns of the dataset (see dataset_columns)
+        header (bool): Whether the CSV files have a header
+        chunk_bytes (int): The chunk size
+
+    Returns:
+        Iterator[dict[str, np.ndarray]]: One array of str per column and chunk. Missing values are empty strings
+    """
+    if dataset_format == "csv":
+        reader = pa_csv.open_csv(
+            file_name,
+            read_options=pa_csv.ReadOptions(
+                use_threads=False,
+                block_size=chunk_bytes,
+                skip_rows=1 if header else 0,
+                column_names=all_columns,
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={name: pa.string() for name in columns},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            yield {name: _to_strings(batch.column(name)) for name in columns}
+    elif dataset_format == "parquet":
+        parquet_file = pq.ParquetFile(file_name)
+        metadata = parquet_file.metadata
+        # number of rows of about chunk_bytes (uncompressed)
+        total_bytes = sum(metadata.row_group(index).total_byte_size for index in range(metadata.num_row_groups))
+        batch_size = max(1024, chunk_bytes * metadata.num_rows // max(total_bytes, 1))
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns, use_threads=False):
+            yield {name: _to_strings(batch.column(name)) for name in columns}
+    else:
+        with open(file_name) as f:
+            while True:
+                lines = f.readlines(chunk_bytes)
+                if not lines:
+                    break
+                rows = [json.loads(line) for line in lines if line.strip()]
+                yield {
+                    name: np.array(["" if row.get(name) is None else str(row[name]) for row in rows], dtype=str)
+                    for name in columns
+                }
+
+
+def sketch_columns(
+    file_names: List[str],
+    dataset_format: str,
+    columns: List[str],
+    all_columns: List[str],
+    header: bool = True,
+    chunk_bytes: int = DEFAULT_CHUNK_SIZE_MB << 20,
+) -> DatasetSketch:
+    """
+    Sketches a subset of the columns of a dataset, one chunk at a time (run in the process pool)
+
+    Returns:
+        DatasetSketch: The sketch of the columns
+    """
+    sketch = DatasetSketch()
+    for file_name in file_names:
+        for chunk in iter_chunks(file_name, dataset_format, columns, all_columns, header, chunk_bytes):
+            item_count = len(chunk[columns[0]])
+            profiles = [FeatureProfile(name, chunk[name]) for name in columns]
+            sketch.merge(DatasetSketch.from_profiles(profiles, item_count))
+    return sketch
+
+
+def generate_baseline(
+    path: str,
+    dataset_format: str,
+    header: bool = True,
+    chunk_bytes: int = DEFAULT_CHUNK_SIZE_MB << 20,
+    num_workers: int = 1,
+) -> DatasetSketch:
+    """
+    Sketches all the columns of a dataset, split into num_workers column chunks processed in parallel
+
+    Args:
+        path (str): The dataset file, or a directory of files
+        dataset_format (str): "csv", "json" (JSON Lines) or "parquet"
+        header (bool): Whether the CSV files have a header
+        chunk_bytes (int): The size of the chunks read by each worker
+        num_workers (int): The number of processes
+
+    Returns:
+        DatasetSketch: The sketch of the dataset
+    """
+    file_names = list_dataset_files(path, dataset_format)
+    all_columns = dataset_columns(file_names[0], dataset_format, header)
+    num_workers = max(1, min(num_workers, len(all_columns)))
+    column_chunks = [chunk.tolist() for chunk in np.array_split(np.array(all_columns, dtype=object), num_workers)]
+    logger.info(f"Sketching {len(all_columns)} columns of {len(file_names)} files with {num_workers} workers")
+    if num_workers == 1:
+        sketches = [sketch_columns(file_names, dataset_format, all_columns, all_columns, header, chunk_bytes)]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(sketch_columns, file_names, dataset_format, columns, all_columns, header, chunk_bytes)
+                for columns in column_chunks
+            ]
+            sketches = [future.result() for future in futures]
+
+    features: Dict[str, FeatureSketch] = {}
+    for sketch in sketches:
+        features.update(sketch.features)
+    return DatasetSketch(sketches[0].item_count, [features[name] for name in all_columns])
+
+
+def suggest_constraints(sketch: DatasetSketch) -> Dict[str, Any]:
+    """
+    Suggests data-quality constraints from the sketch of the baseline dataset, like the Model Monitor baselining job:
+    the inferred type and completeness of every feature, non-negativity of numerical features and the domain of
+    low-cardinality String features
+
+    Returns:
+        dict[str, Any]: The constraints.json document
+    """
+    features = []
+    for feature in sketch.features.values():
+        inferred_type = feature.inferred_type
+        total = feature.num_present + feature.num_missing
+        constraint = {
+            "name": feature.name,
+            "inferred_type": inferred_type,
+            "completeness": feature.num_present / total if total else 0.0,
+        }
+        if inferred_type in (INTEGRAL, FRACTIONAL):
+            constraint["num_constraints"] = {"is_non_negative": bool(feature.min >= 0)}
+        elif inferred_type == STRING:
+            num_distinct = len(feature.categories)
+            low_cardinality = num_distinct <= MAX_DOMAIN_DISTINCT_RATIO * feature.num_present
+            if num_distinct < MAX_CATEGORICAL_BUCKETS and low_cardinality:
+                constraint["string_constraints"] = {"domains": sorted(feature.categories)}
+        features.append(constraint)
+    return {"version": 0.0, "features": features, "monitoring_config": DEFAULT_MONITORING_CONFIG}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("Generate the data-quality baseline statistics and constraints of a dataset.")
+    parser.add_argument("--dataset", type=str, required=True, help="Dataset file, or directory of files.")
+    parser.add_argument(
+        "--dataset-format", type=str, choices=DATASET_FORMATS, default="csv", help="Dataset format. Default csv."
+    )
+    parser.add_argument(
+        "--header",
+        type=str,
+        choices=["yes", "no"],
+        default="yes",
+        help="Whether the CSV files have a header. Default yes.",
+    )
+    parser.add_argument(
+        "--chunk-size-mb",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE_MB,
+        help=f"Size of the chunks read by each worker. Default {DEFAULT_CHUNK_SIZE_MB}.",
+    )
+    parser.add_argument(
+        "--num-workers", type=int, default=os.cpu_count(), help="Number of processes. Default the number of CPUs."
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        default=".",
+        help="s3:// prefix or directory of statistics.json and constraints.json. Default the current directory.",
+    )
+    args = parser.parse_args()
+
+    sketch = generate_baseline(
+        args.dataset, args.dataset_format, args.header == "yes", args.chunk_size_mb << 20, args.num_workers
+    )
+    s3_client = create_s3_client(args.output_path)
+    output_path = args.output_path.rstrip("/")
+    for file_name, content in [
+        (STATISTICS_FILE_NAME, sketch.to_statistics()),
+        (CONSTRAINTS_FILE_NAME, suggest_constraints(sketch)),
+    ]:
+        write_json_uri(f"{output_path}/{file_name}", content, s3_client, indent=4)
+        logger.info(f"Wrote {output_path}/{file_name}")
+
+
+if __name__ == "__main__":
+    main()
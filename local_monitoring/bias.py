@@ -0,0 +1,456 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Post-training bias metrics of the merged inferences/ground truth (see ground_truth.py), for the facets of the Clarify
+analysis config (ModelBiasConfigS3Uri), checked against the combined_bias_constraints.json written by
+process_bias_baselines.
+
+Every facet value is a group, and the confusion counts of all the groups come from one np.bincount, so every metric is
+an array operation over the groups.
+
+    python -m local_monitoring.bias --dataset-source ./merged --analysis-config ./analysis_config.json \
+        --probability-attribute 0 --baseline-constraints ./combined_bias_constraints.json
+"""
+import os
+import json
+import logging
+import argparse
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from local_monitoring.capture import (
+    ENDPOINT_INPUT,
+    ENDPOINT_OUTPUT,
+    decode_capture_data,
+    iter_capture_files,
+    json_payloads_to_columns,
+    split_csv_payloads,
+)
+from local_monitoring.data_quality import read_json_file, write_json_file
+from local_monitoring.model_quality import get_attribute
+
+logger = logging.getLogger(__name__)
+
+# Clarify post-training bias metrics computed from the confusion counts of the facet groups
+METRIC_DESCRIPTIONS = {
+    "DPPL": "Difference in Positive Proportions in Predicted Labels (DPPL)",
+    "DI": "Disparate Impact (DI)",
+    "DCAcc": "Difference in Conditional Acceptance (DCAcc)",
+    "DCR": "Difference in Conditional Rejection (DCR)",
+    "RD": "Recall Difference (RD)",
+    "DAR": "Difference in Acceptance Rates (DAR)",
+    "DRR": "Difference in Rejection Rates (DRR)",
+    "AD": "Accuracy Difference (AD)",
+    "TE": "Treatment Equality (TE)",
+    "CDDPL": "Conditional Demographic Disparity in Predicted Labels (CDDPL)",
+}
+# value of the metrics without bias (0 for the others)
+UNBIASED_VALUES = {"DI": 1.0}
+# numeric columns with more distinct values are continuous: a single value_or_threshold is a threshold
+MAX_CATEGORICAL_DISTINCT_VALUES = 10
+
+
+def is_positive(values: np.ndarray, values_or_threshold: List[Any]) -> np.ndarray:
+    """
+    Args:
+        values (np.ndarray): Labels (or facet values), as strings
+        values_or_threshold (list[Any]): The positive values, or a single threshold if the values are continuous
+            (values strictly above it are positive)
+
+    Returns:
+        np.ndarray: True for the positive values
+    """
+    if len(values_or_threshold) == 1 and isinstance(values_or_threshold[0], (int, float)):
+        try:
+            numbers = values.astype(np.float64)
+        except ValueError:
+            numbers = None
+        if numbers is not None:
+            if len(np.unique(numbers)) > MAX_CATEGORICAL_DISTINCT_VALUES:
+                return numbers > values_or_threshold[0]
+            return numbers == values_or_threshold[0]
+    return np.isin(values, [str(value) for value in values_or_threshold])
+
+
+def facet_groups(column: np.ndarray, value_or_threshold: Optional[List[Any]]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Splits the records into the sensitive groups of a facet
+
+    Args:
+        column (np.ndarray): The facet's values, as strings
+        value_or_threshold (list[Any]): The sensitive values (one group), or a single threshold of a continuous facet
+            (see is_positive). Every distinct value is a sensitive group if None
+
+    Returns:
+        tuple[np.ndarray, list[str]]: The group index of every record (-1 if it is in no sensitive group), and the
+            groups' "value_or_threshold"
+    """
+    if not value_or_threshold:
+        distinct, inverse = np.unique(column, return_inverse=True)
+        return inverse.reshape(-1).astype(np.int64), [str(value) for value in distinct]
+    sensitive = is_positive(column, value_or_threshold)
+    name = ",".join(str(value) for value in value_or_threshold)
+    return np.where(sensitive, 0, -1).astype(np.int64), [name]
+
+
+def post_training_bias_metrics(
+    labels: np.ndarray,
+    predictions: np.ndarray,
+    groups: np.ndarray,
+    num_groups: int,
+    group_variable: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Computes the post-training bias metrics of every sensitive group (d) against the other records (a)
+
+    Args:
+        labels (np.ndarray): True for the positive observed labels
+        predictions (np.ndarray): True for the positive predicted labels
+        groups (np.ndarray): The group index of every record (-1 if it is in no sensitive group)
+        num_groups (int): The number of groups
+        group_variable (np.ndarray): The subgroups of the conditional demographic disparity (CDDPL), or None
+
+    Returns:
+        dict[str, np.ndarray]: The metrics of the groups {<metric name>: <one value per group>} (NaN if undefined)
+    """
+    outcomes = 2 * labels.astype(np.int64) + predictions.astype(np.int64)
+    in_group = groups >= 0
+    # confusion counts [TN, FP, FN, TP] of every group, and of the other records
+    facet = np.bincount(groups[in_group] * 4 + outcomes[in_group], minlength=num_groups * 4)
+    facet = facet.reshape(num_groups, 4).astype(np.float64)
+    others = np.bincount(outcomes, minlength=4).astype(np.float64) - facet
+    metrics = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d_tn, d_fp, d_fn, d_tp = facet.T
+        a_tn, a_fp, a_fn, a_tp = others.T
+        d_n, a_n = facet.sum(axis=1), others.sum(axis=1)
+        d_accepted, a_accepted = d_tp + d_fp, a_tp + a_fp
+        d_rejected, a_rejected = d_tn + d_fn, a_tn + a_fn
+        metrics["DPPL"] = a_accepted / a_n - d_accepted / d_n
+        metrics["DI"] = (d_accepted / d_n) / (a_accepted / a_n)
+        metrics["DCAcc"] = (a_tp + a_fn) / a_accepted - (d_tp + d_fn) / d_accepted
+        metrics["DCR"] = (d_tn + d_fp) / d_rejected - (a_tn + a_fp) / a_rejected
+        metrics["RD"] = a_tp / (a_tp + a_fn) - d_tp / (d_tp + d_fn)
+        metrics["DAR"] = a_tp / a_accepted - d_tp / d_accepted
+        metrics["DRR"] = d_tn / d_rejected - a_tn / a_rejected
+        metrics["AD"] = (a_tp + a_tn) / a_n - (d_tp + d_tn) / d_n
+        metrics["TE"] = d_fn / d_fp - a_fn / a_fp
+
+        if group_variable is not None:
+            subgroups, subgroup_index = np.unique(group_variable, return_inverse=True)
+            subgroup_index = subgroup_index.reshape(-1)
+            num_subgroups = len(subgroups)
+            predicted = predictions.astype(np.int64)
+            # predicted rejections/acceptances of every (group, subgroup), and of every subgroup
+            facet_counts = np.bincount(
+                (groups[in_group] * num_subgroups + subgroup_index[in_group]) * 2 + predicted[in_group],
+                minlength=num_groups * num_subgroups * 2,
+            ).reshape(num_groups, num_subgroups, 2)
+            subgroup_counts = np.bincount(subgroup_index * 2 + predicted, minlength=num_subgroups * 2)
+            subgroup_counts = subgroup_counts.reshape(num_subgroups, 2)
+            shares = np.nan_to_num(facet_counts / subgroup_counts)
+            disparities = shares[:, :, 0] - shares[:, :, 1]
+            metrics["CDDPL"] = disparities @ subgroup_counts.sum(axis=1) / len(labels)
+    return metrics
+
+
+def read_bias_dataset(
+    path: str,
+    headers: List[str],
+    label: str,
+    inference_attribute: str,
+    probability_attribute: str,
+    ground_truth_attribute: str = "0",
+) -> Tuple[Dict[str, np.ndarray], List[Optional[str]], List[Optional[str]], List[Optional[str]]]:
+    """
+    Reads the features, observed labels and predictions of the merged records
+
+    Args:
+        path (str): The merged dataset directory (or file)
+        headers (list[str]): The dataset headers of the analysis config (the label is not part of the inputs)
+        label (str): The label header
+        inference_attribute (str): Attribute of the predicted label in the endpoint output ("" if none)
+        probability_attribute (str): Attribute of the probability in the endpoint output ("" if none)
+        ground_truth_attribute (str): Attribute of the label in the ground truth data
+
+    Returns:
+        tuple: The features {<header>: <values>}, the observed labels, the predicted labels and the probabilities
+
+    Raises:
+        ValueError: If a captured input has several rows (CSV lines or JSON instances), which cannot be aligned with
+            the record's label
+    """
+    inputs, labels, predictions, probabilities, content_type = [], [], [], [], None
+    for file_name in iter_capture_files(path):
+        with open(file_name, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                capture_input = record["captureData"][ENDPOINT_INPUT]
+                content_type = content_type or capture_input.get("observedContentType", "text/csv")
+                inputs.append(decode_capture_data(capture_input))
+                output = decode_capture_data(record["captureData"][ENDPOINT_OUTPUT])
+                labels.append(get_attribute(decode_capture_data(record["groundTruthData"]), ground_truth_attribute))
+                predictions.append(get_attribute(output, inference_attribute) if inference_attribute else None)
+                probabilities.append(get_attribute(output, probability_attribute) if probability_attribute else None)
+    if not inputs:
+        return {}, [], [], []
+    if "json" in content_type:
+        features = json_payloads_to_columns(inputs)
+    else:
+        names = [header for header in headers if header != label]
+        features = {
+            names[index] if index < len(names) else f"_c{index}": column
+            for index, column in enumerate(split_csv_payloads(inputs))
+        }
+    num_rows = max((len(column) for column in features.values()), default=len(labels))
+    if num_rows != len(labels):
+        raise ValueError(
+            f"The captured inputs have {num_rows} rows for {len(labels)} records: inputs with several rows or "
+            "instances are not supported"
+        )
+    return features, labels, predictions, probabilities
+
+
+def binarize_bias_dataset(
+    features: Dict[str, np.ndarray],
+    labels: List[Optional[str]],
+    predictions: List[Optional[str]],
+    probabilities: List[Optional[str]],
+    label_values: List[Any],
+    probability_threshold: Optional[float] = None,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Gets the positive observed and predicted labels of the records with a label and a prediction. The other records
+    are skipped, as in model_quality.compute_metrics
+
+    Args:
+        features (dict[str, np.ndarray]): The features (see read_bias_dataset)
+        labels (list[str]): The observed labels
+        predictions (list[str]): The predicted labels, used if probability_threshold is None
+        probabilities (list[str]): The probabilities, positive above probability_threshold
+        label_values (list[Any]): The positive label values, or threshold (see is_positive)
+        probability_threshold (float): The probability threshold, None to use the predicted labels
+
+    Returns:
+        tuple: The features, the positive observed labels and the positive predicted labels of the valid records
+    """
+    # missing values are None, or empty strings (e.g. an empty CSV output)
+    has_label = np.array([label not in (None, "") for label in labels], dtype=bool)
+    if probability_threshold is None:
+        values = predictions
+        valid = has_label & np.array([value not in (None, "") for value in values], dtype=bool)
+    else:
+        values = probabilities
+        scores = np.array([np.nan if value in (None, "") else value for value in values], dtype=np.float64)
+        valid = has_label & ~np.isnan(scores)
+    num_skipped = len(labels) - int(valid.sum())
+    if num_skipped:
+        logger.warning(f"Skipped {num_skipped} records without a label or a prediction")
+    observed = is_positive(np.array([label for label, ok in zip(labels, valid) if ok], dtype=str), label_values)
+    if probability_threshold is None:
+        predicted = is_positive(np.array([value for value, ok in zip(values, valid) if ok], dtype=str), label_values)
+    else:
+        predicted = scores[valid] > probability_threshold
+    return {name: column[valid] for name, column in features.items()}, observed, predicted
+
+
+def compute_bias_report(
+    features: Dict[str, np.ndarray],
+    labels: np.ndarray,
+    predictions: np.ndarray,
+    config: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Computes the post-training bias metrics of the facets of an analysis config
+
+    Args:
+        features (dict[str, np.ndarray]): The features, as strings
+        labels (np.ndarray): True for the positive observed labels
+        predictions (np.ndarray): True for the positive predicted labels
+        config (dict[str, Any]): The Clarify analysis config ("facet", "label", "label_values_or_threshold",
+            "group_variable")
+
+    Returns:
+        dict[str, Any]: The bias report, in the Clarify analysis.json format
+    """
+    group_variable = config.get("group_variable")
+    group_values = features.get(group_variable) if group_variable else None
+    facets = {}
+    for facet in config.get("facet", []):
+        name = facet["name_or_index"]
+        if name not in features:
+            logger.warning(f"Facet {name} is not in the captured inputs")
+            continue
+        groups, group_names = facet_groups(features[name], facet.get("value_or_threshold"))
+        metrics = post_training_bias_metrics(labels, predictions, groups, len(group_names), group_values)
+        facets[name] = [
+            {
+                "value_or_threshold": group_name,
+                "metrics": [
+                    {
+                        "name": metric,
+                        "description": METRIC_DESCRIPTIONS[metric],
+                        "value": None if np.isnan(values[index]) else float(values[index]),
+                    }
+                    for metric, values in metrics.items()
+                ],
+            }
+            for index, group_name in enumerate(group_names)
+        ]
+    return {
+        "version": "1.0",
+        "post_training_bias_metrics": {
+            "label": config.get("label"),
+            "facets": facets,
+            "label_value_or_threshold": ",".join(str(value) for value in config.get("label_values_or_threshold", [])),
+        },
+    }
+
+
+def check_bias_constraints(
+    report: Dict[str, Any], constraints: Dict[str, Any], tolerance: float = 0.0
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Checks a bias report against the baseline constraints: a metric violates its constraint when it is further from
+    its unbiased value (1 for DI, 0 for the others) than the baseline value (plus the tolerance)
+
+    Args:
+        report (dict[str, Any]): The bias report (see compute_bias_report)
+        constraints (dict[str, Any]): The combined_bias_constraints.json document
+        tolerance (float): The allowed increase of the distance to the unbiased value
+
+    Returns:
+        dict[str, Any]: The constraint_violations.json document {"violations": [...]}
+    """
+    baseline = {
+        (facet, group["value_or_threshold"], metric["name"]): metric["value"]
+        for facet, groups in constraints.get("post_training_bias_metrics", {}).get("facets", {}).items()
+        for group in groups
+        for metric in group["metrics"]
+    }
+    violations = []
+    for facet, groups in report["post_training_bias_metrics"]["facets"].items():
+        for group in groups:
+            for metric in group["metrics"]:
+                threshold = baseline.get((facet, group["value_or_threshold"], metric["name"]))
+                if threshold is None or metric["value"] is None:
+                    continue
+                unbiased = UNBIASED_VALUES.get(metric["name"], 0.0)
+                if abs(metric["value"] - unbiased) > abs(threshold - unbiased) + tolerance:
+                    violations.append(
+                        {
+                            "facet": facet,
+                            "facet_value": group["value_or_threshold"],
+                            "metric_name": metric["name"],
+                            "constraint_check_type": "bias_drift_check",
+                            "description": f"Value {metric['value']} does not meet the constraint requirement "
+                            f"(baseline {threshold})",
+                        }
+                    )
+    return {"violations": violations}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("Compute the post-training bias metrics of the merged inferences/ground truth.")
+    parser.add_argument(
+        "--dataset-source",
+        type=str,
+        default=os.environ.get("dataset_source"),
+        help="Merged dataset directory (see local_monitoring.ground_truth). Default $dataset_source.",
+    )
+    parser.add_argument(
+        "--analysis-config",
+        type=str,
+        default=os.environ.get("analysis_config"),
+        help="Clarify analysis config (ModelBiasConfigS3Uri). Default $analysis_config.",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        default=os.environ.get("output_path", "."),
+        help="Directory of analysis.json and constraint_violations.json. Default $output_path or the current one.",
+    )
+    parser.add_argument(
+        "--inference-attribute",
+        type=str,
+        default=os.environ.get("inference_attribute", ""),
+        help="InferenceAttribute. Default $inference_attribute.",
+    )
+    parser.add_argument(
+        "--probability-attribute",
+        type=str,
+        default=os.environ.get("probability_attribute", ""),
+        help="ProbabilityAttribute. Default $probability_attribute.",
+    )
+    parser.add_argument(
+        "--probability-threshold-attribute",
+        type=float,
+        default=None,
+        help="ProbabilityThresholdAttribute. Default the config's probability_threshold or 0.5.",
+    )
+    parser.add_argument(
+        "--ground-truth-attribute",
+        type=str,
+        default=os.environ.get("ground_truth_attribute", "0"),
+        help="Attribute of the label in the ground truth data. Default $ground_truth_attribute or 0.",
+    )
+    parser.add_argument(
+        "--baseline-constraints",
+        type=str,
+        default=os.environ.get("baseline_constraints"),
+        help="combined_bias_constraints.json of the baseline. Default $baseline_constraints.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Allowed increase of a metric's distance to its unbiased value. Default 0.0.",
+    )
+    args = parser.parse_args()
+    if not args.dataset_source or not args.analysis_config:
+        parser.error("--dataset-source and --analysis-config are required")
+    if not args.inference_attribute and not args.probability_attribute:
+        parser.error("--inference-attribute or --probability-attribute is required")
+
+    config = read_json_file(args.analysis_config)
+    features, labels, predictions, probabilities = read_bias_dataset(
+        args.dataset_source,
+        config.get("headers", []),
+        config.get("label"),
+        args.inference_attribute,
+        args.probability_attribute,
+        args.ground_truth_attribute,
+    )
+    threshold = None
+    if not args.inference_attribute:
+        threshold = args.probability_threshold_attribute
+        if threshold is None:
+            threshold = config.get("probability_threshold", 0.5)
+    features, observed, predicted = binarize_bias_dataset(
+        features, labels, predictions, probabilities, config.get("label_values_or_threshold", [1]), threshold
+    )
+
+    report = compute_bias_report(features, observed, predicted, config)
+    write_json_file(os.path.join(args.output_path, "analysis.json"), report)
+    logger.info(f"Computed the bias metrics of {len(observed)} records")
+    constraints = read_json_file(args.baseline_constraints)
+    if constraints is not None:
+        violations = check_bias_constraints(report, constraints, args.tolerance)
+        write_json_file(os.path.join(args.output_path, "constraint_violations.json"), violations)
+        logger.info(f"Found {len(violations['violations'])} constraint violations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Reads the endpoints' data capture files (JSON lines, one inference per line) and splits their CSV/JSON payloads into
+per-feature columns
+"""
+import os
+import csv
+import json
+import base64
+import binascii
+import datetime
+import logging
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.compute as pa_compute
+    import pyarrow.csv as pa_csv
+    import pyarrow.json as pa_json
+except ImportError:
+    pa_csv = None
+
+logger = logging.getLogger(__name__)
+
+# capture index names of the captureData sections
+ENDPOINT_INPUT = "endpointInput"
+ENDPOINT_OUTPUT = "endpointOutput"
+# block size of the batched JSON parser, must hold the longest data capture line
+JSON_BLOCK_SIZE = 1 << 24
+
+
+def iter_capture_files(path: str) -> Iterator[str]:
+    """
+    Lists the data capture files under a directory (or a single file), in a stable order. Hidden directories and files
+    (such as the .join-state of local_monitoring.ground_truth in a merged dataset) are skipped
+
+    Args:
+        path (str): The data capture directory, laid out as .../<yyyy>/<mm>/<dd>/<hh>/*.jsonl, or a single file
+
+    Returns:
+        Iterator[str]: The data capture file names
+    """
+    if os.path.isfile(path):
+        yield path
+        return
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(directory for directory in dirs if not directory.startswith("."))
+        for file_name in sorted(files):
+            if file_name.endswith(".jsonl") and not file_name.startswith("."):
+                yield os.path.join(root, file_name)
+
+
+def hour_partitions(root: str, start: datetime.datetime, hours: int) -> Iterator[str]:
+    """
+    Generates the hourly partitions of a data capture, ground truth or monitoring output prefix
+    (<root>/<yyyy>/<mm>/<dd>/<hh>)
+
+    Args:
+        root (str): The prefix (S3 URI or directory)
+        start (datetime.datetime): The first hour
+        hours (int): The number of hours
+
+    Returns:
+        Iterator[str]: The partitions
+    """
+    start = start.replace(minute=0, second=0, microsecond=0)
+    for hour in range(hours):
+        yield "/".join([root.rstrip("/"), (start + datetime.timedelta(hours=hour)).strftime("%Y/%m/%d/%H")])
+
+
+def decode_capture_data(capture: Dict[str, str]) -> str:
+    """
+    Decodes the data of a captureData section
+
+    Args:
+        capture (dict[str, str]): The section {"observedContentType": ..., "mode": ..., "data": ..., "encoding": ...}
+
+    Returns:
+        str: The payload
+    """
+    if capture.get("encoding") == "BASE64":
+        return base64.b64decode(capture["data"]).decode("utf-8")
+    return capture["data"]
+
+
+def read_capture_payloads(
+    file_names: List[str], capture_index: str = ENDPOINT_INPUT
+) -> Tuple[List[str], List[str], Optional[str]]:
+    """
+    Reads the payloads of one captureData section from data capture files
+
+    Args:
+        file_names (list[str]): The data capture file names
+        capture_index (str): "endpointInput" or "endpointOutput"
+
+    Returns:
+        tuple[list[str], list[str], str]: The payloads, their eventIds, and the observed content type of the first
+            record (None if there are no records)
+    """
+    payloads, event_ids, content_type = [], [], None
+    for file_name in file_names:
+        with open(file_name, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                capture = record["captureData"][capture_index]
+                if content_type is None:
+                    content_type = capture.get("observedContentType", "text/csv")
+                payloads.append(decode_capture_data(capture))
+                event_ids.append(record.get("eventMetadata", {}).get("eventId", ""))
+    return payloads, event_ids, content_type
+
+
+def _string_buffers(array: "pyarrow.Array") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The offsets (from 0) and the concatenated UTF-8 bytes of a string array
+    """
+    _, offsets_buffer, data_buffer = array.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=np.int32)[array.offset : array.offset + len(array) + 1]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+    return (offsets - offsets[0]).astype(np.int64), data[offsets[0] : offsets[-1]]
+
+
+def decode_base64_array(array: "pyarrow.Array") -> "pyarrow.Array":
+    """
+    Decodes base64 strings all at once: their concatenation (every string is padded to a multiple of 4 characters) is
+    decoded as one buffer, with the "=" padding decoded as zero bits, then the padding bytes of every string are dropped
+
+    Args:
+        array (pyarrow.Array): The base64 strings, without nulls
+
+    Returns:
+        pyarrow.Array: The decoded strings
+
+    Raises:
+        ValueError: If a string is not canonical base64 (e.g. it contains line breaks)
+    """
+    offsets, characters = _string_buffers(array)
+    starts, ends = offsets[:-1], offsets[1:]
+    # number of "=" at the end of every string
+    non_empty = ends > starts
+    last_padded = characters[ends[non_empty] - 1] == ord("=")
+    padding = np.zeros(len(array), dtype=np.int64)
+    padding[non_empty] = last_padded.astype(np.int64) + (last_padded & (characters[ends[non_empty] - 2] == ord("=")))
+    encoded = characters.tobytes()
+    if np.any(offsets % 4) or encoded.count(b"=") != padding.sum():
+        raise ValueError("The strings are not canonical base64")
+    try:
+        # a2b_base64 skips the characters outside of the alphabet, which changes the decoded length
+        decoded = np.frombuffer(binascii.a2b_base64(encoded.replace(b"=", b"A")), dtype=np.uint8)
+    except binascii.Error as error:
+        raise ValueError("The strings are not canonical base64") from error
+    if len(decoded) != len(encoded) // 4 * 3:
+        raise ValueError("The strings are not canonical base64")
+
+    decoded_ends = ends // 4 * 3
+    if padding.any():
+        keep = np.ones(len(decoded), dtype=bool)
+        keep[decoded_ends[padding > 0] - 1] = False
+        keep[decoded_ends[padding > 1] - 2] = False
+        decoded = decoded[keep]
+    decoded_offsets = np.concatenate([[0], decoded_ends - np.cumsum(padding)]).astype(np.int32)
+    result = pyarrow.StringArray.from_buffers(
+        len(array), pyarrow.py_buffer(decoded_offsets), pyarrow.py_buffer(decoded)
+    )
+    # the payloads must be UTF-8, like base64.b64decode(...).decode("utf-8") requires
+    result.validate(full=True)
+    return result
+
+
+def _capture_schema() -> "pyarrow.Schema":
+    section = pyarrow.struct(
+        [("observedContentType", pyarrow.string()), ("data", pyarrow.string()), ("encoding", pyarrow.string())]
+    )
+    return pyarrow.schema(
+        [
+            ("captureData", pyarrow.struct([(ENDPOINT_INPUT, section), (ENDPOINT_OUTPUT, section)])),
+            ("eventMetadata", pyarrow.struct([("eventId", pyarrow.string())])),
+        ]
+    )
+
+
+def read_capture_batch(
+    file_names: List[str], capture_index: str = ENDPOINT_INPUT
+) -> Tuple["pyarrow.ChunkedArray", "pyarrow.ChunkedArray", Optional[str]]:
+    """
+    Batched version of read_capture_payloads (requires pyarrow): the data capture lines are parsed into Arrow columns
+    by the pyarrow JSON reader, and the base64 payloads are decoded in bulk
+
+    Args:
+        file_names (list[str]): The data capture file names
+        capture_index (str): "endpointInput" or "endpointOutput"
+
+    Returns:
+        tuple[pyarrow.ChunkedArray, pyarrow.ChunkedArray, str]: The payloads, their eventIds, and the observed content
+            type of the first record (None if there are no records)
+
+    Raises:
+        pyarrow.ArrowInvalid: If a file cannot be parsed by the pyarrow JSON reader
+    """
+    read_options = pa_json.ReadOptions(block_size=JSON_BLOCK_SIZE)
+    parse_options = pa_json.ParseOptions(explicit_schema=_capture_schema(), unexpected_field_behavior="ignore")
+    tables = [
+        pa_json.read_json(file_name, read_options, parse_options)
+        for file_name in file_names
+        if os.path.getsize(file_name) > 0
+    ]
+    if not tables:
+        return pyarrow.chunked_array([], pyarrow.string()), pyarrow.chunked_array([], pyarrow.string()), None
+    table = pyarrow.concat_tables(tables)
+
+    payloads = []
+    for chunk in table.column("captureData").chunks:
+        data = pa_compute.fill_null(pa_compute.struct_field(chunk, [capture_index, "data"]), "")
+        encodings = pa_compute.struct_field(chunk, [capture_index, "encoding"])
+        encoded = pa_compute.fill_null(pa_compute.equal(encodings, "BASE64"), False)
+        if pa_compute.any(encoded).as_py():
+            try:
+                decoded = decode_base64_array(data.filter(encoded))
+            except ValueError:
+                decoded = pyarrow.array(
+                    [base64.b64decode(value).decode("utf-8") for value in data.filter(encoded).to_pylist()],
+                    pyarrow.string(),
+                )
+            data = pa_compute.replace_with_mask(data, encoded, decoded)
+        payloads.append(data)
+    event_ids = pa_compute.fill_null(pa_compute.struct_field(table.column("eventMetadata"), ["eventId"]), "")
+    content_types = pa_compute.struct_field(table.column("captureData"), [capture_index, "observedContentType"])
+    content_type = None
+    if len(table):
+        content_type = content_types[0].as_py() or "text/csv"
+    return pyarrow.chunked_array(payloads, pyarrow.string()), event_ids, content_type
+
+
+def join_payloads(payloads: "pyarrow.ChunkedArray") -> bytes:
+    """
+    Returns:
+        bytes: The UTF-8 payloads, each followed by a line break
+    """
+    buffers = []
+    for chunk in payloads.chunks:
+        offsets, characters = _string_buffers(chunk)
+        buffers.append(np.insert(characters, offsets[1:], ord("\n")))
+    return np.concatenate(buffers).tobytes() if buffers else b""
+
+
+def split_csv_buffer(buffer: bytes) -> List[np.ndarray]:
+    """
+    Splits CSV rows into columns of strings with the pyarrow CSV reader, in one pass
+
+    Args:
+        buffer (bytes): The UTF-8 CSV rows, without header (empty lines are skipped)
+
+    Returns:
+        list[np.ndarray]: One array of str per column
+
+    Raises:
+        pyarrow.ArrowInvalid: If the rows have different numbers of fields
+    """
+    first_row = buffer.lstrip(b"\r\n").split(b"\n", 1)[0].decode("utf-8")
+    if not first_row:
+        return []
+    # keep every field as a string (the types are inferred per value)
+    num_columns = len(next(csv.reader([first_row])))
+    table = pa_csv.read_csv(
+        pyarrow.py_buffer(buffer),
+        read_options=pa_csv.ReadOptions(autogenerate_column_names=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={f"f{column}": pyarrow.string() for column in range(num_columns)},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    return [np.asarray(column.to_numpy(zero_copy_only=False), dtype=str) for column in table.columns]
+
+
+def split_csv_payloads(payloads: List[str]) -> List[np.ndarray]:
+    """
+    Splits CSV payloads (one or more rows each) into columns of strings
+
+    Args:
+        payloads (list[str]): The CSV payloads, without header
+
+    Returns:
+        list[np.ndarray]: One array of str per column. Missing trailing fields are empty strings
+    """
+    text = "\n".join(payload.rstrip("\r\n") for payload in payloads)
+    if not text:
+        return []
+    if pa_csv is not None:
+        try:
+            return split_csv_buffer(text.encode("utf-8"))
+        except pyarrow.ArrowInvalid:
+            # rows with different numbers of fields
+            pass
+
+    rows = list(csv.reader(text.split("\n")))
+    num_columns = max(len(row) for row in rows)
+    return [
+        np.array([row[column] if column < len(row) else "" for row in rows], dtype=str) for column in range(num_columns)
+    ]
+
+
+def json_payloads_to_columns(payloads: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Splits JSON payloads into columns: objects are split by key, arrays by position ("_c<index>"). Payloads with a
+    list of "instances" contribute one row per instance
+
+    Args:
+        payloads (list[str]): The JSON payloads
+
+    Returns:
+        dict[str, np.ndarray]: One array of str per feature. Missing values are empty strings
+    """
+    rows: List[Dict[str, Any]] = []
+    for payload in payloads:
+        document = json.loads(payload)
+        instances = document["instances"] if isinstance(document, dict) and "instances" in document else [document]
+        for instance in instances:
+            if isinstance(instance, dict):
+                rows.append(instance["features"] if isinstance(instance.get("features"), dict) else instance)
+            else:
+                values = instance if isinstance(instance, list) else [instance]
+                rows.append({f"_c{index}": value for index, value in enumerate(values)})
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    return {
+        name: np.array(["" if row.get(name) is None else str(row[name]) for row in rows], dtype=str) for name in names
+    }
+
+
+def _name_columns(columns: List[np.ndarray], feature_names: Optional[List[str]]) -> Dict[str, np.ndarray]:
+    feature_names = feature_names or []
+    return {
+        feature_names[index] if index < len(feature_names) else f"_c{index}": column
+        for index, column in enumerate(columns)
+    }
+
+
+def read_capture_columns(
+    path: str, capture_index: str = ENDPOINT_INPUT, feature_names: Optional[List[str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Reads the data capture files under a directory into per-feature columns
+
+    Args:
+        path (str): The data capture directory (or file)
+        capture_index (str): "endpointInput" or "endpointOutput"
+        feature_names (list[str]): The names of the CSV columns, in order (e.g. the baseline's features). CSV columns
+            without a name are named "_c<index>"
+
+    Returns:
+        dict[str, np.ndarray]: One array of str per feature, in column order
+    """
+    file_names = list(iter_capture_files(path))
+    if pa_csv is not None:
+        try:
+            batch, _, content_type = read_capture_batch(file_names, capture_index)
+        except pyarrow.ArrowInvalid as error:
+            logger.warning(f"Reading the data capture files line by line, the batched reader failed: {error}")
+        else:
+            if not len(batch):
+                return {}
+            if "json" in (content_type or ""):
+                return json_payloads_to_columns(batch.to_pylist())
+            try:
+                columns = split_csv_buffer(join_payloads(batch))
+            except pyarrow.ArrowInvalid:
+                # rows with different numbers of fields
+                columns = split_csv_payloads(batch.to_pylist())
+            return _name_columns(columns, feature_names)
+
+    payloads, _, content_type = read_capture_payloads(file_names, capture_index)
+    if not payloads:
+        return {}
+    if "json" in (content_type or ""):
+        return json_payloads_to_columns(payloads)
+    return _name_columns(split_csv_payloads(payloads), feature_names)
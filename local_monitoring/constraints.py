@@ -0,0 +1,589 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Checks data-quality statistics (statistics.json) against Model Monitor constraints (constraints.json), and produces
+the constraint_violations.json document. Independent of how the statistics were computed: any pair of files (e.g. the
+historical outputs under DataQualityMonitoringOutputS3Uri) can be re-evaluated under new constraints.
+
+Both documents are loaded into a columnar layout (one array per feature attribute, flattened arrays of the KLL sketch
+items and categorical buckets), and every check is evaluated for all the features at once.
+
+    python -m local_monitoring.constraints --statistics-prefix s3://bucket/monitoring/data-quality/my-endpoint \
+        --constraints ./constraints.json --baseline-statistics ./statistics.json --output-path ./reevaluated
+"""
+import os
+import json
+import logging
+import argparse
+import datetime
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from local_monitoring.statistics import FRACTIONAL, INTEGRAL, STRING, UNKNOWN, FeatureProfile
+from local_monitoring.listing import DEFAULT_CACHE_DIR, DEFAULT_MAX_WORKERS, HourListingCache, iter_hour_uris
+from local_monitoring.storage import create_s3_client, iter_uris, read_json_uri, write_json_uri
+
+logger = logging.getLogger(__name__)
+
+# default constraints.json "monitoring_config"
+DEFAULT_MONITORING_CONFIG = {
+    "evaluate_constraints": "Enabled",
+    "emit_metrics": "Enabled",
+    "datatype_check_threshold": 1.0,
+    "domain_content_threshold": 1.0,
+    "distribution_constraints": {
+        "perform_comparison": "Enabled",
+        "comparison_threshold": 0.1,
+        "comparison_method": "Robust",
+        "categorical_comparison_threshold": 0.1,
+        "categorical_drift_method": "LInfinity",
+    },
+}
+# Kolmogorov-Smirnov critical value coefficient (95% confidence), used by the "Robust" comparison method
+KS_CRITICAL_COEFFICIENT = 1.36
+
+TYPE_CODES = {UNKNOWN: 0, INTEGRAL: 1, FRACTIONAL: 2, STRING: 3}
+# TYPE_COMPATIBILITY[expected type, observed type]: integers are valid Fractional values, everything is a valid String
+TYPE_COMPATIBILITY = np.array(
+    [
+        [1, 1, 1, 1],
+        [0, 1, 0, 0],
+        [0, 1, 1, 0],
+        [1, 1, 1, 1],
+    ],
+    dtype=bool,
+)
+STATISTICS_FILE_NAME = "statistics.json"
+VIOLATIONS_FILE_NAME = "constraint_violations.json"
+
+
+def get_monitoring_config(constraints: Dict[str, Any], feature: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Gets the monitoring config of the constraints, with the feature's overrides
+
+    Args:
+        constraints (dict[str, Any]): The constraints.json document
+        feature (dict[str, Any]): The feature's constraints, whose "monitoringConfigOverrides" override the config
+
+    Returns:
+        dict[str, Any]: The monitoring config (distribution constraints flattened into it)
+    """
+    monitoring_config = {**DEFAULT_MONITORING_CONFIG, **constraints.get("monitoring_config", {})}
+    config = {
+        **DEFAULT_MONITORING_CONFIG["distribution_constraints"],
+        **monitoring_config.get("distribution_constraints", {}),
+    }
+    config.update({key: value for key, value in monitoring_config.items() if key != "distribution_constraints"})
+    config.update((feature or {}).get("monitoringConfigOverrides", {}))
+    return config
+
+
+def _lookup(names: np.ndarray, sorted_names: np.ndarray, order: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    # position of every key in names, -1 if missing
+    if not len(names):
+        return np.full(len(keys), -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(sorted_names, keys), len(names) - 1)
+    return np.where(sorted_names[positions] == keys, order[positions], -1)
+
+
+def _factorize_pairs(
+    features: np.ndarray, values: np.ndarray, other_features: np.ndarray, other_values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # integer keys of (feature index, value) pairs, comparable between the two sets of pairs
+    _, value_ids = np.unique(np.concatenate([values, other_values]), return_inverse=True)
+    keys = np.concatenate([features, other_features]).astype(np.int64) * (int(value_ids.max(initial=0)) + 1)
+    keys += value_ids.reshape(-1)
+    return keys[: len(features)], keys[len(features) :]
+
+
+def _group_sort(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # order by (group, value), equal values in any order: much faster than np.lexsort, the values are sorted with
+    # quicksort and the groups with a stable (radix for up to 65536 groups) sort
+    order = np.argsort(values)
+    groups = groups[order]
+    groups = groups.astype(np.uint16) if groups.max(initial=0) < 2**16 else groups.astype(np.int64)
+    return order[np.argsort(groups, kind="stable")]
+
+
+class StatisticsTable:
+    """
+    Columnar layout of a statistics.json document
+
+    Args:
+        statistics (dict[str, Any]): The statistics.json document
+    """
+
+    def __init__(self, statistics: Dict[str, Any]):
+        features = statistics.get("features", [])
+        size = len(features)
+        self.names = np.array([feature["name"] for feature in features], dtype=str)
+        self.types = np.array([TYPE_CODES.get(feature.get("inferred_type"), 0) for feature in features], dtype=np.int8)
+        self.num_present = np.zeros(size)
+        self.num_missing = np.zeros(size)
+        self.minimum = np.full(size, np.nan)
+        self.is_string = np.zeros(size, dtype=bool)
+        # flattened KLL sketch items (weights normalized per feature) and categorical buckets
+        kll_features, kll_items, kll_weights = [], [], []
+        categorical_features, categorical_values, categorical_counts = [], [], []
+        for index, feature in enumerate(features):
+            numerical, string = feature.get("numerical_statistics"), feature.get("string_statistics")
+            section = numerical or string or {}
+            common = section.get("common", {})
+            self.num_present[index] = common.get("num_present", 0)
+            self.num_missing[index] = common.get("num_missing", 0)
+            self.is_string[index] = string is not None
+            if numerical is not None:
+                self.minimum[index] = numerical.get("min", np.nan)
+                levels = numerical.get("distribution", {}).get("kll", {}).get("sketch", {}).get("data", [])
+                weights = [np.full(len(level), 2.0**height) for height, level in enumerate(levels) if len(level)]
+                if weights:
+                    weights = np.concatenate(weights)
+                    kll_features.append(np.full(len(weights), index))
+                    kll_items.append(np.concatenate([np.asarray(level, dtype=np.float64) for level in levels if level]))
+                    kll_weights.append(weights / weights.sum())
+            elif string is not None:
+                buckets = string.get("distribution", {}).get("categorical", {}).get("buckets", [])
+                categorical_features.extend([index] * len(buckets))
+                categorical_values.extend(str(bucket["value"]) for bucket in buckets)
+                categorical_counts.extend(bucket["count"] for bucket in buckets)
+        self.kll_features = np.concatenate(kll_features) if kll_features else np.empty(0, dtype=np.int64)
+        self.kll_items = np.concatenate(kll_items) if kll_items else np.empty(0)
+        self.kll_weights = np.concatenate(kll_weights) if kll_weights else np.empty(0)
+        self.categorical_features = np.array(categorical_features, dtype=np.int64)
+        self.categorical_values = np.array(categorical_values, dtype=str)
+        self.categorical_counts = np.array(categorical_counts, dtype=np.float64)
+        self._order = np.argsort(self.names, kind="stable")
+        self._sorted_names = self.names[self._order]
+
+    def index(self, names: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            names (np.ndarray): Feature names
+
+        Returns:
+            np.ndarray: The position of every feature in the table, -1 if it is missing
+        """
+        return _lookup(self.names, self._sorted_names, self._order, np.asarray(names, dtype=str))
+
+    def categorical_totals(self) -> np.ndarray:
+        return np.bincount(self.categorical_features, weights=self.categorical_counts, minlength=len(self.names))
+
+
+class ConstraintsTable:
+    """
+    Columnar layout of a constraints.json document, with the per-feature monitoring config overrides
+
+    Args:
+        constraints (dict[str, Any]): The constraints.json document
+    """
+
+    def __init__(self, constraints: Dict[str, Any]):
+        self.config = get_monitoring_config(constraints)
+        features = constraints.get("features", [])
+        configs = [
+            get_monitoring_config(constraints, feature) if "monitoringConfigOverrides" in feature else self.config
+            for feature in features
+        ]
+        self.names = np.array([feature["name"] for feature in features], dtype=str)
+        self.types = np.array([TYPE_CODES.get(feature.get("inferred_type"), 0) for feature in features], dtype=np.int8)
+        self.completeness = np.array([feature.get("completeness", np.nan) for feature in features], dtype=np.float64)
+        self.non_negative = np.array(
+            [bool(feature.get("num_constraints", {}).get("is_non_negative")) for feature in features], dtype=bool
+        )
+        self.datatype_threshold = np.array([config["datatype_check_threshold"] for config in configs], dtype=np.float64)
+        self.domain_threshold = np.array([config["domain_content_threshold"] for config in configs], dtype=np.float64)
+        self.comparison_threshold = np.array([config["comparison_threshold"] for config in configs], dtype=np.float64)
+        self.categorical_threshold = np.array(
+            [config["categorical_comparison_threshold"] for config in configs], dtype=np.float64
+        )
+        self.robust = np.array([config["comparison_method"] == "Robust" for config in configs], dtype=bool)
+        self.compare = np.array([config["perform_comparison"] == "Enabled" for config in configs], dtype=bool)
+        domain_features, domain_values = [], []
+        for index, feature in enumerate(features):
+            domains = feature.get("string_constraints", {}).get("domains") or []
+            domain_features.extend([index] * len(domains))
+            domain_values.extend(str(value) for value in domains)
+        self.domain_features = np.array(domain_features, dtype=np.int64)
+        self.domain_values = np.array(domain_values, dtype=str)
+        self.has_domain = np.bincount(self.domain_features, minlength=len(self.names)) > 0
+
+
+def numerical_distances(current: StatisticsTable, baseline: StatisticsTable) -> np.ndarray:
+    """
+    L-infinity distances between the KLL sketch CDFs of every feature and its baseline. The signed, normalized weights
+    of both sketches are sorted by (feature, item) once, so their cumulative sum is the CDF difference (compared after
+    the last of equal items, so the order of equal items does not matter)
+
+    Returns:
+        np.ndarray: The distance of every current feature (NaN without both sketches)
+    """
+    distances = np.full(len(current.names), np.nan)
+    # baseline sketch items, moved to the current features' positions
+    baseline_positions = current.index(baseline.names)[baseline.kll_features]
+    both = np.zeros(len(current.names), dtype=bool)
+    both[np.intersect1d(current.kll_features, baseline_positions[baseline_positions >= 0])] = True
+    current_mask = both[current.kll_features]
+    baseline_mask = (baseline_positions >= 0) & both[np.maximum(baseline_positions, 0)]
+    features = np.concatenate([current.kll_features[current_mask], baseline_positions[baseline_mask]])
+    if not len(features):
+        return distances
+    items = np.concatenate([current.kll_items[current_mask], baseline.kll_items[baseline_mask]])
+    weights = np.concatenate([current.kll_weights[current_mask], -baseline.kll_weights[baseline_mask]])
+    order = _group_sort(features, items)
+    features, items, cumulative = features[order], items[order], np.cumsum(weights[order])
+    # restart the cumulative sum at every feature
+    starts = np.flatnonzero(np.concatenate([[True], features[1:] != features[:-1]]))
+    offsets = np.where(starts > 0, cumulative[np.maximum(starts - 1, 0)], 0.0)
+    cumulative -= np.repeat(offsets, np.diff(np.append(starts, len(features))))
+    # the CDFs are compared after the last of equal items
+    last = np.concatenate([(features[1:] != features[:-1]) | (items[1:] != items[:-1]), [True]])
+    last_features, differences = features[last], np.abs(cumulative[last])
+    feature_starts = np.flatnonzero(np.concatenate([[True], last_features[1:] != last_features[:-1]]))
+    distances[last_features[feature_starts]] = np.maximum.reduceat(differences, feature_starts)
+    return distances
+
+
+def categorical_distances(current: StatisticsTable, baseline: StatisticsTable) -> np.ndarray:
+    """
+    L-infinity distances between the categorical value frequencies of every feature and its baseline
+
+    Returns:
+        np.ndarray: The distance of every current feature (NaN without both distributions)
+    """
+    distances = np.full(len(current.names), np.nan)
+    baseline_positions = current.index(baseline.names)[baseline.categorical_features]
+    current_totals = current.categorical_totals()
+    baseline_totals = np.zeros(len(current.names))
+    np.add.at(
+        baseline_totals,
+        baseline_positions[baseline_positions >= 0],
+        baseline.categorical_counts[baseline_positions >= 0],
+    )
+    both = (current_totals > 0) & (baseline_totals > 0)
+    current_mask = both[current.categorical_features]
+    baseline_mask = (baseline_positions >= 0) & both[np.maximum(baseline_positions, 0)]
+    current_keys, baseline_keys = _factorize_pairs(
+        current.categorical_features[current_mask],
+        current.categorical_values[current_mask],
+        baseline_positions[baseline_mask],
+        baseline.categorical_values[baseline_mask],
+    )
+    if not len(current_keys) and not len(baseline_keys):
+        return distances
+    keys, inverse = np.unique(np.concatenate([current_keys, baseline_keys]), return_inverse=True)
+    features = np.concatenate([current.categorical_features[current_mask], baseline_positions[baseline_mask]])
+    frequencies = np.concatenate(
+        [
+            current.categorical_counts[current_mask] / current_totals[current.categorical_features[current_mask]],
+            -baseline.categorical_counts[baseline_mask] / baseline_totals[baseline_positions[baseline_mask]],
+        ]
+    )
+    differences = np.abs(np.bincount(inverse.reshape(-1), weights=frequencies, minlength=len(keys)))
+    key_features = np.zeros(len(keys), dtype=np.int64)
+    key_features[inverse.reshape(-1)] = features
+    distances[both] = 0.0
+    np.maximum.at(distances, key_features, differences)
+    return distances
+
+
+def distribution_distances(current: StatisticsTable, baseline: StatisticsTable) -> np.ndarray:
+    """
+    Returns:
+        np.ndarray: The distance of every current feature to its baseline distribution (NaN if not comparable)
+    """
+    return np.where(current.is_string, categorical_distances(current, baseline), numerical_distances(current, baseline))
+
+
+def baseline_drift_distances(statistics: Dict[str, Any], baseline_statistics: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Computes the distance between the current and baseline distributions of every feature
+
+    Args:
+        statistics (dict[str, Any]): The current statistics.json document
+        baseline_statistics (dict[str, Any]): The baseline statistics.json document
+
+    Returns:
+        dict[str, float]: The distances {<feature name>: <distance>, ...}, for the features with both distributions
+    """
+    current = StatisticsTable(statistics)
+    distances = distribution_distances(current, StatisticsTable(baseline_statistics))
+    return {str(name): float(distance) for name, distance in zip(current.names, distances) if not np.isnan(distance)}
+
+
+def _violation(feature_name: str, check_type: str, description: str) -> Dict[str, str]:
+    return {"feature_name": feature_name, "constraint_check_type": check_type, "description": description}
+
+
+def evaluate_constraints(
+    current: StatisticsTable,
+    constraints: ConstraintsTable,
+    baseline: Optional[StatisticsTable] = None,
+    type_matches: Optional[np.ndarray] = None,
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Evaluates all the checks, for all the features at once
+
+    Args:
+        current (StatisticsTable): The current statistics
+        constraints (ConstraintsTable): The constraints
+        baseline (StatisticsTable): The baseline statistics, for the baseline drift checks
+        type_matches (np.ndarray): The number of present values matching the constrained type of every constraints
+            feature (NaN if unknown). Without it, the inferred types are compared
+
+    Returns:
+        dict[str, list[dict[str, str]]]: The constraint_violations.json document {"violations": [...]}
+    """
+    if constraints.config["evaluate_constraints"] != "Enabled":
+        return {"violations": []}
+    positions = current.index(constraints.names)
+    found = positions >= 0
+    position = np.maximum(positions, 0)
+    num_present, num_missing = current.num_present[position], current.num_missing[position]
+    # check type -> (violations mask, observed values, thresholds), per constraints feature
+    checks: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # data type
+        matches = TYPE_COMPATIBILITY[constraints.types, current.types[position]].astype(np.float64)
+        if type_matches is not None:
+            matches = np.where(np.isnan(type_matches), matches, type_matches / num_present)
+        mask = found & (constraints.types > 0) & (num_present > 0) & (matches < constraints.datatype_threshold)
+        checks["data_type_check"] = (mask, matches, constraints.datatype_threshold)
+
+        # completeness
+        completeness = num_present / (num_present + num_missing)
+        checks["completeness_check"] = (
+            found & (completeness < constraints.completeness),
+            completeness,
+            constraints.completeness,
+        )
+
+        # non negative numbers
+        minimum = current.minimum[position]
+        checks["non_negative_check"] = (found & constraints.non_negative & (minimum < 0), minimum, minimum)
+
+        # categorical values in the domain: buckets of the constrained features, as (constraints feature, value)
+        constrained = np.full(len(current.names), -1, dtype=np.int64)
+        constrained[positions[found]] = np.flatnonzero(found)
+        bucket_features = constrained[current.categorical_features]
+        in_table = bucket_features >= 0
+        bucket_features = bucket_features[in_table]
+        bucket_keys, domain_keys = _factorize_pairs(
+            bucket_features,
+            current.categorical_values[in_table],
+            constraints.domain_features,
+            constraints.domain_values,
+        )
+        in_domain = np.isin(bucket_keys, domain_keys)
+        counts = current.categorical_counts[in_table]
+        domain_share = (
+            np.bincount(bucket_features[in_domain], weights=counts[in_domain], minlength=len(constraints.names))
+            / num_present
+        )
+        has_buckets = np.bincount(bucket_features, minlength=len(constraints.names)) > 0
+        mask = found & constraints.has_domain & has_buckets & (num_present > 0)
+        checks["categorical_values_check"] = (
+            mask & (domain_share < constraints.domain_threshold),
+            domain_share,
+            constraints.domain_threshold,
+        )
+
+        # distribution drift
+        if baseline is not None:
+            distances = distribution_distances(current, baseline)[position]
+            is_string = current.is_string[position]
+            thresholds = np.where(is_string, constraints.categorical_threshold, constraints.comparison_threshold)
+            drifted = found & constraints.compare & ~np.isnan(distances) & (distances > thresholds)
+            # "Robust": only the statistically significant distances (two samples Kolmogorov-Smirnov test)
+            baseline_positions = baseline.index(constraints.names)
+            baseline_present = np.where(
+                baseline_positions >= 0, baseline.num_present[np.maximum(baseline_positions, 0)], 0
+            )
+            critical = KS_CRITICAL_COEFFICIENT * np.sqrt(
+                (num_present + baseline_present) / (num_present * baseline_present)
+            )
+            testable = constraints.robust & ~is_string & (num_present > 0) & (baseline_present > 0)
+            checks["baseline_drift_check"] = (drifted & (~testable | (distances > critical)), distances, thresholds)
+
+    type_names = list(TYPE_CODES)
+    violations: List[Tuple[int, int, Dict[str, str]]] = []
+    for index in np.flatnonzero(~found):
+        name = str(constraints.names[index])
+        violations.append((index, 0, _violation(name, "missing_column_check", f"There is missing column: {name}")))
+    for order, (check_type, (mask, values, thresholds)) in enumerate(checks.items(), 1):
+        for index in np.flatnonzero(mask):
+            value, threshold = values[index], thresholds[index]
+            if check_type == "data_type_check":
+                expected = type_names[constraints.types[index]]
+                description = (
+                    f"Data type match requirement is not met. Expected data type: {expected}, Expected match: "
+                    f"{threshold:.1%}. Observed: Only {value:.1%} of data is {expected}."
+                )
+            elif check_type == "completeness_check":
+                description = (
+                    f"Data completeness requirement is not met. Expected: {threshold:.1%}, Observed: {value:.1%}."
+                )
+            elif check_type == "non_negative_check":
+                description = f"Data is expected to be non-negative. Observed minimum: {value}."
+            elif check_type == "categorical_values_check":
+                description = (
+                    f"Data is expected to be in the baseline domain. Expected: {threshold:.1%}, Observed: {value:.1%}."
+                )
+            else:
+                description = f"Baseline drift distance: {value} exceeds threshold: {threshold}"
+            violations.append((index, order, _violation(str(constraints.names[index]), check_type, description)))
+    # grouped by feature, in the constraints' order
+    violations.sort(key=lambda violation: violation[:2])
+    result = [violation for _, _, violation in violations]
+    extra = np.ones(len(current.names), dtype=bool)
+    extra[positions[found]] = False
+    result.extend(
+        _violation(str(name), "extra_column_check", f"There is extra column: {name}") for name in current.names[extra]
+    )
+    return {"violations": result}
+
+
+def check_constraints(
+    statistics: Dict[str, Any],
+    constraints: Dict[str, Any],
+    baseline_statistics: Optional[Dict[str, Any]] = None,
+    profiles: Optional[List[FeatureProfile]] = None,
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Checks statistics against constraints
+
+    Args:
+        statistics (dict[str, Any]): The current statistics.json document
+        constraints (dict[str, Any]): The constraints.json document
+        baseline_statistics (dict[str, Any]): The baseline statistics.json document, for the baseline drift checks
+        profiles (list[FeatureProfile]): The features' profiles, for the per-value data type checks. Without them,
+            the inferred types are compared
+
+    Returns:
+        dict[str, list[dict[str, str]]]: The constraint_violations.json document {"violations": [...]}
+    """
+    constraints_table = ConstraintsTable(constraints)
+    type_matches = None
+    if profiles:
+        by_name = {profile.name: profile for profile in profiles}
+        type_names = list(TYPE_CODES)
+        type_matches = np.array(
+            [
+                by_name[name].num_matching(type_names[code]) if name in by_name else np.nan
+                for name, code in zip(constraints_table.names.tolist(), constraints_table.types)
+            ],
+            dtype=np.float64,
+        )
+    baseline = StatisticsTable(baseline_statistics) if baseline_statistics else None
+    return evaluate_constraints(StatisticsTable(statistics), constraints_table, baseline, type_matches)
+
+
+def output_uri(statistics_uri: str, prefix: Optional[str], output_path: str) -> str:
+    """
+    Mirrors the location of a statistics file under the output path (relative to the prefix if any)
+
+    Returns:
+        str: The URI (or path) of its constraint_violations.json
+    """
+    if prefix and statistics_uri.startswith(prefix):
+        relative = statistics_uri[len(prefix) :]
+    else:
+        relative = statistics_uri.split("://", 1)[-1]
+    directory = os.path.dirname(relative.strip("/"))
+    return "/".join(part for part in [output_path.rstrip("/"), directory, VIOLATIONS_FILE_NAME] if part)
+
+
+def iter_statistics(args: argparse.Namespace, s3_client) -> Iterator[str]:
+    yield from args.statistics or []
+    if args.statistics_prefix and args.start:
+        yield from iter_hour_uris(
+            args.statistics_prefix,
+            args.start,
+            args.hours,
+            s3_client,
+            STATISTICS_FILE_NAME,
+            cache=HourListingCache(args.cache_dir),
+        )
+    elif args.statistics_prefix:
+        yield from iter_uris(args.statistics_prefix, STATISTICS_FILE_NAME, s3_client)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("Evaluate statistics.json files against a constraints.json.")
+    parser.add_argument("--statistics", type=str, nargs="*", help="statistics.json files (s3:// URIs or paths).")
+    parser.add_argument(
+        "--statistics-prefix",
+        type=str,
+        default=None,
+        help="Evaluate every statistics.json under this s3:// prefix or directory (e.g. the "
+        "DataQualityMonitoringOutputS3Uri of an endpoint). Default None.",
+    )
+    parser.add_argument(
+        "--start",
+        type=datetime.datetime.fromisoformat,
+        default=None,
+        help="Only evaluate the statistics of the hours from this one (UTC), listed in parallel. The statistics prefix "
+        "must then be hour-partitioned (<DataQualityMonitoringOutputS3Uri>/<endpoint>/<schedule>). Default None.",
+    )
+    parser.add_argument("--hours", type=int, default=24, help="Number of hours evaluated from --start. Default 24.")
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of the cached listings of closed hours. Default {DEFAULT_CACHE_DIR}.",
+    )
+    parser.add_argument("--constraints", type=str, required=True, help="constraints.json (s3:// URI or path).")
+    parser.add_argument(
+        "--baseline-statistics",
+        type=str,
+        default=None,
+        help="statistics.json of the baseline, for the baseline drift checks. Default None.",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        default="reevaluated",
+        help="s3:// prefix or directory of the constraint_violations.json files, laid out like the statistics "
+        "files. Default reevaluated.",
+    )
+    args = parser.parse_args()
+    if not args.statistics and not args.statistics_prefix:
+        parser.error("--statistics or --statistics-prefix is required")
+
+    s3_client = create_s3_client(
+        args.statistics_prefix,
+        args.constraints,
+        args.baseline_statistics,
+        args.output_path,
+        *(args.statistics or []),
+        max_pool_connections=DEFAULT_MAX_WORKERS,
+    )
+    constraints = ConstraintsTable(read_json_uri(args.constraints, s3_client))
+    baseline_statistics = read_json_uri(args.baseline_statistics, s3_client) if args.baseline_statistics else None
+    baseline = StatisticsTable(baseline_statistics) if baseline_statistics else None
+    num_files = num_violations = 0
+    for statistics_uri in iter_statistics(args, s3_client):
+        statistics = read_json_uri(statistics_uri, s3_client)
+        if statistics is None:
+            logger.warning(f"{statistics_uri} does not exist")
+            continue
+        violations = evaluate_constraints(StatisticsTable(statistics), constraints, baseline)
+        write_json_uri(output_uri(statistics_uri, args.statistics_prefix, args.output_path), violations, s3_client, 4)
+        logger.info(f"{statistics_uri}: {len(violations['violations'])} violations")
+        num_files += 1
+        num_violations += len(violations["violations"])
+    logger.info(f"Evaluated {num_files} statistics files, {num_violations} violations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Data-quality monitoring job, compatible with the Model Monitor "bring your own container" contract: reads the data
+captured by the endpoint, writes statistics.json and constraint_violations.json, and optionally CloudWatch metrics.
+
+    python -m local_monitoring.data_quality --dataset-source ./capture --baseline-constraints ./constraints.json
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from typing import Any, Dict, List, Optional
+from local_monitoring.capture import ENDPOINT_INPUT, ENDPOINT_OUTPUT, read_capture_columns
+from local_monitoring.constraints import baseline_drift_distances, check_constraints, get_monitoring_config
+from local_monitoring.incremental import SKETCHES_FILE_NAME, DatasetSketch, write_sketch
+from local_monitoring.statistics import FeatureProfile, compute_statistics
+
+logger = logging.getLogger(__name__)
+
+# paths of model-monitor-template.yml DataQualityJobDefinition
+DEFAULT_DATASET_SOURCE = "/opt/ml/processing/input/data_quality_input"
+DEFAULT_OUTPUT_PATH = "/opt/ml/processing/output/data_quality_output"
+CLOUDWATCH_METRICS_PATH = "/opt/ml/output/metrics/cloudwatch"
+
+
+def read_json_file(file_name: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not file_name or not os.path.exists(file_name):
+        return None
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def write_json_file(file_name: str, content: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    with open(file_name, "w") as f:
+        json.dump(content, f, indent=4)
+
+
+def cloudwatch_metrics(
+    statistics: Dict[str, Any], distances: Dict[str, float], endpoint_name: str, schedule_name: str
+) -> List[Dict[str, Any]]:
+    """
+    Builds the per-feature CloudWatch metrics published by Model Monitor (feature_non_null_*, feature_baseline_drift_*)
+
+    Returns:
+        list[dict[str, Any]]: One metric record per line of the CloudWatch metrics file
+    """
+    dimensions = [
+        {"Name": "Endpoint", "Value": endpoint_name},
+        {"Name": "MonitoringSchedule", "Value": schedule_name},
+    ]
+    timestamp = int(time.time())
+    metrics = []
+    for feature in statistics["features"]:
+        common = feature.get("numerical_statistics", feature.get("string_statistics", {})).get("common", {})
+        total = common.get("num_present", 0) + common.get("num_missing", 0)
+        if total:
+            metrics.append(
+                {
+                    "MetricName": f"feature_non_null_{feature['name']}",
+                    "Timestamp": timestamp,
+                    "Dimensions": dimensions,
+                    "Value": common["num_present"] / total,
+                }
+            )
+        if feature["name"] in distances:
+            metrics.append(
+                {
+                    "MetricName": f"feature_baseline_drift_{feature['name']}",
+                    "Timestamp": timestamp,
+                    "Dimensions": dimensions,
+                    "Value": distances[feature["name"]],
+                }
+            )
+    return metrics
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Runs the data-quality analysis
+
+    Args:
+        args (argparse.Namespace): The parsed arguments
+
+    Returns:
+        dict[str, Any]: The constraint violations {"violations": [...]}
+    """
+    baseline_statistics = read_json_file(args.baseline_statistics)
+    constraints = read_json_file(args.baseline_constraints)
+    baseline_features = (baseline_statistics or constraints or {}).get("features", [])
+    feature_names = [feature["name"] for feature in baseline_features]
+
+    columns = read_capture_columns(args.dataset_source, args.capture_index, feature_names)
+    profiles = [FeatureProfile(name, values) for name, values in columns.items()]
+    item_count = max((len(values) for values in columns.values()), default=0)
+    baseline_types = {feature["name"]: feature["inferred_type"] for feature in baseline_features}
+    statistics = compute_statistics(profiles, item_count, baseline_types)
+    write_json_file(os.path.join(args.output_path, "statistics.json"), statistics)
+    logger.info(f"Profiled {item_count} records and {len(profiles)} features")
+    if args.write_sketches == "Enabled":
+        # uploaded with statistics.json under the hour's prefix, and merged into daily/weekly views later
+        sketch = DatasetSketch.from_profiles(profiles, item_count)
+        write_sketch(sketch, os.path.join(args.output_path, SKETCHES_FILE_NAME))
+
+    violations = {"violations": []}
+    if constraints is not None:
+        violations = check_constraints(statistics, constraints, baseline_statistics, profiles)
+        write_json_file(os.path.join(args.output_path, "constraint_violations.json"), violations)
+        logger.info(f"Found {len(violations['violations'])} constraint violations")
+
+    emit_metrics = constraints is None or get_monitoring_config(constraints)["emit_metrics"] == "Enabled"
+    if args.publish_cloudwatch_metrics == "Enabled" and emit_metrics:
+        distances = baseline_drift_distances(statistics, baseline_statistics) if baseline_statistics else {}
+        metrics = cloudwatch_metrics(statistics, distances, args.endpoint_name, args.monitoring_schedule_name)
+        os.makedirs(args.cloudwatch_metrics_path, exist_ok=True)
+        with open(os.path.join(args.cloudwatch_metrics_path, "cloudwatch_metrics.jsonl"), "w") as f:
+            f.writelines(json.dumps(metric) + "\n" for metric in metrics)
+    return violations
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    # the Model Monitor container contract passes the settings as environment variables
+    parser = argparse.ArgumentParser("Analyze the data captured by an endpoint against the data-quality baseline.")
+    parser.add_argument(
+        "--dataset-source",
+        type=str,
+        default=os.environ.get("dataset_source", DEFAULT_DATASET_SOURCE),
+        help=f"Directory of the data capture files. Default $dataset_source or {DEFAULT_DATASET_SOURCE}.",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        default=os.environ.get("output_path", DEFAULT_OUTPUT_PATH),
+        help=f"Directory of statistics.json and constraint_violations.json. Default $output_path or "
+        f"{DEFAULT_OUTPUT_PATH}.",
+    )
+    parser.add_argument(
+        "--baseline-constraints",
+        type=str,
+        default=os.environ.get("baseline_constraints"),
+        help="constraints.json of the baseline. Default $baseline_constraints.",
+    )
+    parser.add_argument(
+        "--baseline-statistics",
+        type=str,
+        default=os.environ.get("baseline_statistics"),
+        help="statistics.json of the baseline. Default $baseline_statistics.",
+    )
+    parser.add_argument(
+        "--capture-index",
+        type=str,
+        choices=[ENDPOINT_INPUT, ENDPOINT_OUTPUT],
+        default=os.environ.get("analysis_type_capture_index", ENDPOINT_INPUT),
+        help=f"Captured data to analyze. Default {ENDPOINT_INPUT}.",
+    )
+    parser.add_argument(
+        "--publish-cloudwatch-metrics",
+        type=str,
+        choices=["Enabled", "Disabled"],
+        default=os.environ.get("publish_cloudwatch_metrics", "Disabled"),
+        help="Write the CloudWatch metrics file. Default $publish_cloudwatch_metrics or Disabled.",
+    )
+    parser.add_argument(
+        "--write-sketches",
+        type=str,
+        choices=["Enabled", "Disabled"],
+        default=os.environ.get("write_sketches", "Enabled"),
+        help=f"Write the mergeable sketches ({SKETCHES_FILE_NAME}) of the analyzed hour. Default $write_sketches or "
+        "Enabled.",
+    )
+    parser.add_argument(
+        "--cloudwatch-metrics-path",
+        type=str,
+        default=CLOUDWATCH_METRICS_PATH,
+        help=f"Directory of the CloudWatch metrics file. Default {CLOUDWATCH_METRICS_PATH}.",
+    )
+    parser.add_argument(
+        "--endpoint-name",
+        type=str,
+        default=os.environ.get("sagemaker_endpoint_name", ""),
+        help="Endpoint name (metrics dimension). Default $sagemaker_endpoint_name.",
+    )
+    parser.add_argument(
+        "--monitoring-schedule-name",
+        type=str,
+        default=os.environ.get("sagemaker_monitoring_schedule_name", ""),
+        help="Monitoring schedule name (metrics dimension). Default $sagemaker_monitoring_schedule_name.",
+    )
+    args, _ = parser.parse_known_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Joins the captured inferences with the ground truth labels by eventId, once for the model quality and model bias
+monitors (both read the merged dataset instead of re-joining the raw data).
+
+Every hourly data capture partition gets a hash index (eventId hash -> capture file, offset, length), sorted so that
+batches of ground truth records are looked up with one vectorized search. The indexes of closed hours are cached on
+disk, and the processed byte offset of every ground truth file is recorded in a state file, so labels arriving late
+(new files, or lines appended to processed files) are joined by the next run without re-joining the others. Labels
+whose inference is not indexed yet stay pending until it is, or until their inference would be older than the capture
+lookback window.
+
+A run writes its merged records to temporary files, committed with the state in one atomic write of the state file (and
+renamed after it), so an interrupted run is joined again from the previous state without duplicating merged records.
+
+    python -m local_monitoring.ground_truth --capture-path ./capture/my-endpoint/AllTraffic \
+        --ground-truth-path ./ground-truth --output-path ./merged --start 2026-01-01T00 --hours 24
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+import datetime
+import numpy as np
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from local_monitoring.capture import hour_partitions, iter_capture_files
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = "join-state.json"
+PENDING_FILE_PREFIX = "pending-ground-truth"
+HOUR_FORMAT = "%Y-%m-%dT%H"
+# number of ground truth records looked up at once
+DEFAULT_BATCH_SIZE = 10000
+
+
+def hash_event_ids(event_ids: List[str]) -> np.ndarray:
+    """
+    Args:
+        event_ids (list[str]): The eventIds
+
+    Returns:
+        np.ndarray: Their uint64 hashes, in order
+    """
+    digests = b"".join(hashlib.blake2b(event_id.encode("utf-8"), digest_size=8).digest() for event_id in event_ids)
+    return np.frombuffer(digests, dtype=">u8").astype(np.uint64)
+
+
+class PartitionIndex:
+    """
+    Hash index of the inferences of one hourly data capture partition: the eventId hashes, sorted, and the file,
+    offset and length of their capture records
+
+    Args:
+        partition (str): The partition directory (<capture path>/<yyyy>/<mm>/<dd>/<hh>)
+        files (list[tuple[str, int]]): The partition's capture files, and their sizes
+    """
+
+    def __init__(self, partition: str, files: List[Tuple[str, int]]):
+        self.partition = partition
+        self.files = files
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.file_indexes = np.empty(0, dtype=np.int32)
+        self.offsets = np.empty(0, dtype=np.int64)
+        self.lengths = np.empty(0, dtype=np.int32)
+
+    @staticmethod
+    def list_files(partition: str) -> List[Tuple[str, int]]:
+        if not os.path.isdir(partition):
+            return []
+        return [(file_name, os.path.getsize(file_name)) for file_name in iter_capture_files(partition)]
+
+    @classmethod
+    def build(cls, partition: str) -> "PartitionIndex":
+        """
+        Scans the capture files of a partition
+
+        Args:
+            partition (str): The partition directory
+
+        Returns:
+            PartitionIndex: The index
+        """
+        index = cls(partition, cls.list_files(partition))
+        event_ids, file_indexes, offsets, lengths = [], [], [], []
+        for file_index, (file_name, _) in enumerate(index.files):
+            offset = 0
+            with open(file_name, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        event_ids.append(json.loads(line)["eventMetadata"]["eventId"])
+                        file_indexes.append(file_index)
+                        offsets.append(offset)
+                        lengths.append(len(line))
+                    offset += len(line)
+        keys = hash_event_ids(event_ids)
+        order = np.argsort(keys, kind="stable")
+        index.keys = keys[order]
+        index.file_indexes = np.asarray(file_indexes, dtype=np.int32)[order]
+        index.offsets = np.asarray(offsets, dtype=np.int64)[order]
+        index.lengths = np.asarray(lengths, dtype=np.int32)[order]
+        return index
+
+    @classmethod
+    def load_or_build(cls, partition: str, cache_dir: Optional[str]) -> "PartitionIndex":
+        """
+        Loads the cached index of a partition, or (re)builds it if its capture files changed
+
+        Args:
+            partition (str): The partition directory
+            cache_dir (str): The directory of the cached indexes. Indexes are not cached if None
+
+        Returns:
+            PartitionIndex: The index
+        """
+        if cache_dir is None:
+            return cls.build(partition)
+        cache_file = os.path.join(cache_dir, hashlib.sha256(partition.encode("utf-8")).hexdigest()[:32] + ".npz")
+        files = cls.list_files(partition)
+        if os.path.exists(cache_file):
+            cached = np.load(cache_file)
+            if json.loads(str(cached["files"])) == [list(item) for item in files]:
+                index = cls(partition, files)
+                index.keys, index.file_indexes = cached["keys"], cached["file_indexes"]
+                index.offsets, index.lengths = cached["offsets"], cached["lengths"]
+                return index
+        index = cls.build(partition)
+        if index.files:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file + ".tmp", "wb") as f:
+                np.savez(
+                    f,
+                    files=np.array(json.dumps(index.files)),
+                    keys=index.keys,
+                    file_indexes=index.file_indexes,
+                    offsets=index.offsets,
+                    lengths=index.lengths,
+                )
+            os.replace(cache_file + ".tmp", cache_file)
+        return index
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            keys (np.ndarray): The eventId hashes to look up
+
+        Returns:
+            np.ndarray: The position of every key in the index, -1 if it is not indexed
+        """
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+        return np.where(found, positions, -1)
+
+
+def parse_ground_truth(line: bytes) -> Tuple[str, bytes, bytes]:
+    """
+    Args:
+        line (bytes): A ground truth record {"groundTruthData": ..., "eventMetadata": {"eventId": ...}, ...}
+
+    Returns:
+        tuple[str, bytes, bytes]: The eventId, the line and the JSON encoded groundTruthData of the record
+    """
+    record = json.loads(line)
+    data = json.dumps(record["groundTruthData"], separators=(",", ":")).encode("utf-8")
+    return record["eventMetadata"]["eventId"], line.rstrip(b"\r\n"), data
+
+
+def iter_ground_truth_records(
+    file_name: str, offsets: Optional[Dict[str, int]] = None
+) -> Iterator[Tuple[str, bytes, bytes]]:
+    """
+    Reads the records of a ground truth file from the byte offset processed by the previous runs
+
+    Args:
+        file_name (str): A ground truth file (JSON lines)
+        offsets (dict[str, int]): The processed byte offset of every file, advanced past every record read. The file
+            is read from the start if None
+
+    Returns:
+        Iterator[tuple[str, bytes, bytes]]: The parsed records (see parse_ground_truth)
+    """
+    offsets = {} if offsets is None else offsets
+    with open(file_name, "rb") as f:
+        f.seek(offsets.get(file_name, 0))
+        for line in f:
+            if not line.endswith(b"\n"):
+                # last line without line break, possibly still being written: read again by the next run unless
+                # it is complete
+                try:
+                    record = parse_ground_truth(line)
+                except ValueError:
+                    return
+                offsets[file_name] = offsets.get(file_name, 0) + len(line)
+                yield record
+                return
+            offsets[file_name] = offsets.get(file_name, 0) + len(line)
+            if line.strip():
+                yield parse_ground_truth(line)
+
+
+def merge_records(capture_line: bytes, ground_truth_data: bytes) -> bytes:
+    """
+    Merges a capture record and the groundTruthData of its ground truth record, without decoding the capture record
+    (its captureData/eventMetadata are copied as they are)
+
+    Returns:
+        bytes: The merged record {..., "captureData": ..., "eventMetadata": ..., "groundTruthData": ...}
+    """
+    return capture_line.rstrip()[:-1] + b',"groundTruthData":' + ground_truth_data + b"}\n"
+
+
+class GroundTruthJoiner:
+    """
+    Joins ground truth files with the data capture partitions, writing the merged records under
+    <output path>/<yyyy>/<mm>/<dd>/<hh>/ (the hour of the inference), in temporary files until they are committed
+    (see self.outputs). When a batch has several labels of the same eventId, the last one is joined (a label sent
+    again in a later batch or run is joined again)
+
+    Args:
+        partitions (list[PartitionIndex]): The indexes of the data capture partitions
+        output_path (str): The directory of the merged dataset
+        run_id (str): The name of the merged files written by this run, so late labels are appended as new files
+        batch_size (int): The number of ground truth records looked up at once
+    """
+
+    def __init__(
+        self, partitions: List[PartitionIndex], output_path: str, run_id: str, batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        self.partitions = [partition for partition in partitions if len(partition.keys)]
+        self.output_path = output_path
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.num_joined = 0
+        # eventId -> (hour of the ground truth partition, ground truth record) of the records without an indexed
+        # inference
+        self.pending: Dict[str, Tuple[datetime.datetime, bytes]] = {}
+        self._hour = None
+        self._outputs: Dict[str, Any] = {}
+
+    def join(self, records: Iterator[Tuple[str, bytes, bytes]], hour: datetime.datetime) -> None:
+        """
+        Joins ground truth records, in batches. Records without an indexed inference are added to self.pending
+
+        Args:
+            records (Iterator[tuple[str, bytes, bytes]]): The parsed ground truth records (see parse_ground_truth)
+            hour (datetime.datetime): The hour of the records' ground truth partition
+        """
+        self._hour = hour
+        # eventId -> record, so an eventId is joined once per batch
+        batch = {}
+        for record in records:
+            batch[record[0]] = record
+            if len(batch) == self.batch_size:
+                self._join_batch(list(batch.values()))
+                batch = {}
+        if batch:
+            self._join_batch(list(batch.values()))
+
+    def _join_batch(self, batch: List[Tuple[str, bytes, bytes]]) -> None:
+        keys = hash_event_ids([event_id for event_id, _, _ in batch])
+        unmatched = np.ones(len(batch), dtype=bool)
+        # (partition, capture file) -> [(offset, length, ground truth record), ...]
+        reads = defaultdict(list)
+        for partition_index, partition in enumerate(self.partitions):
+            positions = partition.lookup(keys)
+            for record_index in np.flatnonzero(unmatched & (positions >= 0)):
+                position = positions[record_index]
+                reads[partition_index, int(partition.file_indexes[position])].append(
+                    (int(partition.offsets[position]), int(partition.lengths[position]), batch[record_index])
+                )
+            unmatched &= positions < 0
+        for record_index in np.flatnonzero(unmatched):
+            event_id, line, _ = batch[record_index]
+            self.pending[event_id] = (self._hour, line)
+
+        for (partition_index, file_index), items in reads.items():
+            partition = self.partitions[partition_index]
+            output = self._output(partition.partition)
+            # sequential reads of the capture file
+            with open(partition.files[file_index][0], "rb") as f:
+                for offset, length, (event_id, line, data) in sorted(items, key=lambda item: item[0]):
+                    f.seek(offset)
+                    capture_line = f.read(length)
+                    if json.dumps(event_id).encode("utf-8") not in capture_line:
+                        # hash collision
+                        self.pending[event_id] = (self._hour, line)
+                        continue
+                    output.write(merge_records(capture_line, data))
+                    self.num_joined += 1
+                    # an older copy of the label may be pending
+                    self.pending.pop(event_id, None)
+
+    def _output(self, partition: str):
+        if partition not in self._outputs:
+            directory = os.path.join(*partition.rstrip("/").split("/")[-4:])
+            os.makedirs(os.path.join(self.output_path, directory), exist_ok=True)
+            file_name = os.path.join(self.output_path, directory, f"merged-{self.run_id}.jsonl.tmp")
+            self._outputs[partition] = open(file_name, "wb")
+        return self._outputs[partition]
+
+    @property
+    def outputs(self) -> List[str]:
+        """
+        Returns:
+            list[str]: The merged files written by this run, relative to the output path (without their .tmp suffix)
+        """
+        return sorted(
+            os.path.relpath(output.name, self.output_path)[: -len(".tmp")] for output in self._outputs.values()
+        )
+
+    def close(self) -> None:
+        for output in self._outputs.values():
+            output.close()
+
+    def discard(self) -> None:
+        """
+        Removes the temporary files of an interrupted join
+        """
+        self.close()
+        for output in self._outputs.values():
+            if os.path.exists(output.name):
+                os.remove(output.name)
+        self._outputs = {}
+
+
+def read_state(state_path: str) -> Dict[str, Any]:
+    """
+    Args:
+        state_path (str): The state directory
+
+    Returns:
+        dict[str, Any]: The state {"ProcessedGroundTruthFiles": <file name -> processed byte offset>, "PendingFile":
+            <pending labels file in the state directory>, "Outputs": <merged files of the last run to rename>}
+    """
+    state = {"ProcessedGroundTruthFiles": {}, "PendingFile": None, "Outputs": []}
+    if os.path.exists(os.path.join(state_path, STATE_FILE_NAME)):
+        with open(os.path.join(state_path, STATE_FILE_NAME)) as f:
+            state.update(json.load(f))
+    return state
+
+
+def read_pending(state_path: str, state: Dict[str, Any]) -> List[Tuple[datetime.datetime, bytes]]:
+    """
+    Returns:
+        list[tuple[datetime.datetime, bytes]]: The pending ground truth records, with the hour of their ground truth
+            partition
+    """
+    pending = []
+    if state["PendingFile"] is None:
+        return pending
+    with open(os.path.join(state_path, state["PendingFile"]), "rb") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                hour = datetime.datetime.strptime(entry["hour"], HOUR_FORMAT)
+                pending.append((hour, json.dumps(entry["record"], separators=(",", ":")).encode("utf-8")))
+    return pending
+
+
+def write_pending(state_path: str, pending: Dict[str, Tuple[datetime.datetime, bytes]], run_id: str) -> str:
+    """
+    Writes the pending ground truth records of a run to a new file, referenced by the state once committed
+
+    Returns:
+        str: The file name, in the state directory
+    """
+    os.makedirs(state_path, exist_ok=True)
+    file_name = f"{PENDING_FILE_PREFIX}-{run_id}.jsonl"
+    with open(os.path.join(state_path, file_name), "wb") as f:
+        for hour, line in pending.values():
+            f.write(b'{"hour":"' + hour.strftime(HOUR_FORMAT).encode("utf-8") + b'","record":' + line + b"}\n")
+    return file_name
+
+
+def write_state(state_path: str, state: Dict[str, Any]) -> None:
+    # atomic: the state file is the commit point of a run
+    os.makedirs(state_path, exist_ok=True)
+    with open(os.path.join(state_path, STATE_FILE_NAME + ".tmp"), "w") as f:
+        json.dump(state, f, indent=4)
+    os.replace(os.path.join(state_path, STATE_FILE_NAME + ".tmp"), os.path.join(state_path, STATE_FILE_NAME))
+
+
+def commit_outputs(state_path: str, state: Dict[str, Any], output_path: str) -> None:
+    """
+    Renames the temporary merged files of a committed run (again, if the run was interrupted while renaming them),
+    then removes the pending labels files of the previous runs
+    """
+    for file_name in state["Outputs"]:
+        if os.path.exists(os.path.join(output_path, file_name + ".tmp")):
+            os.replace(os.path.join(output_path, file_name + ".tmp"), os.path.join(output_path, file_name))
+    state["Outputs"] = []
+    write_state(state_path, state)
+    for file_name in os.listdir(state_path):
+        if file_name.startswith(PENDING_FILE_PREFIX) and file_name != state["PendingFile"]:
+            os.remove(os.path.join(state_path, file_name))
+
+
+def join_ground_truth(
+    capture_path: str,
+    ground_truth_path: str,
+    output_path: str,
+    start: datetime.datetime,
+    hours: int,
+    capture_lookback_hours: int = 24,
+    state_path: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Joins the ground truth files of a period with the inferences captured during it (and the lookback hours before,
+    as labels arrive after the inferences), from the byte offsets of the ground truth files processed by previous runs.
+    Pending labels from before the capture lookback window can no longer be joined (their inference is not indexed)
+    and are dropped
+
+    Args:
+        capture_path (str): The data capture directory of the endpoint variant (<capture path>/<yyyy>/<mm>/<dd>/<hh>)
+        ground_truth_path (str): The ground truth directory (GroundTruthInput, <path>/<yyyy>/<mm>/<dd>/<hh>)
+        output_path (str): The directory of the merged dataset
+        start (datetime.datetime): The first hour of ground truth
+        hours (int): The number of hours of ground truth
+        capture_lookback_hours (int): The number of hours of inferences indexed before the first hour
+        state_path (str): The directory of the processed files, pending labels and cached indexes. Defaults to
+            <output path>/.join-state
+        batch_size (int): The number of ground truth records looked up at once
+
+    Returns:
+        dict[str, int]: The numbers of "Joined", "Pending" and "Expired" records, and of new or appended
+            "GroundTruthFiles"
+    """
+    state_path = state_path or os.path.join(output_path, ".join-state")
+    state = read_state(state_path)
+    if state["Outputs"]:
+        logger.info(f"Committing the {len(state['Outputs'])} merged files of the interrupted previous run")
+        commit_outputs(state_path, state, output_path)
+    processed, pending = state["ProcessedGroundTruthFiles"], read_pending(state_path, state)
+
+    start = start.replace(minute=0, second=0, microsecond=0)
+
+    capture_start = start - datetime.timedelta(hours=capture_lookback_hours)
+    partitions = [
+        PartitionIndex.load_or_build(partition, os.path.join(state_path, "indexes"))
+        for partition in hour_partitions(capture_path, capture_start, capture_lookback_hours + hours)
+    ]
+    logger.info(f"Indexed {sum(len(partition.keys) for partition in partitions)} inferences")
+
+    new_files = []
+    for index, partition in enumerate(hour_partitions(ground_truth_path, start, hours)):
+        if not os.path.isdir(partition):
+            continue
+        for file_name in iter_capture_files(partition):
+            size = os.path.getsize(file_name)
+            if size < processed.get(file_name, 0):
+                # rewritten file
+                processed[file_name] = 0
+            if size > processed.get(file_name, 0):
+                new_files.append((file_name, start + datetime.timedelta(hours=index)))
+
+    # labels pending from the previous runs whose inference is still indexed
+    pending_by_hour = defaultdict(list)
+    num_expired = 0
+    for hour, line in pending:
+        if hour < capture_start:
+            num_expired += 1
+        else:
+            pending_by_hour[hour].append(line)
+
+    run_id = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    joiner = GroundTruthJoiner(partitions, output_path, run_id, batch_size)
+    try:
+        # pending labels first, their inferences may have been captured since
+        for hour, lines in sorted(pending_by_hour.items()):
+            joiner.join((parse_ground_truth(line) for line in lines), hour)
+        for file_name, hour in new_files:
+            joiner.join(iter_ground_truth_records(file_name, processed), hour)
+        joiner.close()
+    except BaseException:
+        joiner.discard()
+        raise
+    state = {
+        "ProcessedGroundTruthFiles": processed,
+        "PendingFile": write_pending(state_path, joiner.pending, run_id),
+        "Outputs": joiner.outputs,
+    }
+    write_state(state_path, state)
+    commit_outputs(state_path, state, output_path)
+    summary = {
+        "Joined": joiner.num_joined,
+        "Pending": len(joiner.pending),
+        "Expired": num_expired,
+        "GroundTruthFiles": len(new_files),
+    }
+    logger.info(f"Ground truth join: {summary}")
+    return summary
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("Join the captured inferences with the ground truth labels.")
+    parser.add_argument("--capture-path", type=str, required=True, help="Data capture directory of the variant.")
+    parser.add_argument("--ground-truth-path", type=str, required=True, help="Ground truth directory.")
+    parser.add_argument("--output-path", type=str, required=True, help="Directory of the merged dataset.")
+    parser.add_argument(
+        "--start", type=datetime.datetime.fromisoformat, required=True, help="First hour of ground truth (UTC)."
+    )
+    parser.add_argument("--hours", type=int, default=24, help="Number of hours of ground truth. Default 24.")
+    parser.add_argument(
+        "--capture-lookback-hours",
+        type=int,
+        default=24,
+        help="Hours of inferences indexed before the first hour of ground truth. Default 24.",
+    )
+    parser.add_argument(
+        "--state-path", type=str, default=None, help="State directory. Default <output path>/.join-state."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Ground truth records looked up at once. Default {DEFAULT_BATCH_SIZE}.",
+    )
+    args = parser.parse_args()
+    join_ground_truth(
+        args.capture_path,
+        args.ground_truth_path,
+        args.output_path,
+        args.start,
+        args.hours,
+        args.capture_lookback_hours,
+        args.state_path,
+        args.batch_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Mergeable per-hour data-quality sketches: the data-quality job writes the sketches of its hour (sketches.json) next to
+statistics.json, under the DataQualityMonitoringOutputS3Uri prefix, and this module merges them into daily/weekly
+statistics without rereading the data capture files.
+
+    python -m local_monitoring.incremental --output-s3-uri s3://bucket/monitoring/data-quality \
+        --endpoint-name my-endpoint --monitoring-schedule-name my-schedule --view daily --date 2026-01-01
+"""
+import json
+import logging
+import argparse
+import datetime
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+from local_monitoring.capture import hour_partitions
+from local_monitoring.sketches import DEFAULT_KLL_K, HyperLogLog, KllSketch, kll_buckets
+from local_monitoring.statistics import (
+    FRACTIONAL,
+    INTEGRAL,
+    MAX_CATEGORICAL_BUCKETS,
+    NUM_KLL_BUCKETS,
+    STRING,
+    UNKNOWN,
+    FeatureProfile,
+)
+from local_monitoring.storage import create_s3_client, read_json_uri, write_json_uri
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+SKETCHES_FILE_NAME = "sketches.json"
+# number of hours of the merged views
+VIEW_HOURS = {"hourly": 1, "daily": 24, "weekly": 24 * 7}
+
+
+def most_frequent_values(values: np.ndarray, max_values: int) -> Counter:
+    """
+    Counts the values (with a hash table when pyarrow is installed, faster than sorting the strings) and keeps the
+    most frequent ones
+
+    Args:
+        values (np.ndarray): The values, as strings
+        max_values (int): The maximum number of values kept
+
+    Returns:
+        Counter: The counts of the most frequent values
+    """
+    if pa is not None:
+        value_counts = pc.value_counts(pa.array(values, type=pa.string()))
+        distinct = value_counts.field("values").to_numpy(zero_copy_only=False)
+        counts = value_counts.field("counts").to_numpy()
+    else:
+        distinct, counts = np.unique(values, return_counts=True)
+    if len(counts) > max_values:
+        top = np.argpartition(-counts, max_values)[:max_values]
+        distinct, counts = distinct[top], counts[top]
+    return Counter(dict(zip(distinct.tolist(), counts.tolist())))
+
+
+class FeatureSketch:
+    """
+    Mergeable summary of one feature: value counts by type, count/sum/mean/sum of squared deviations/min/max of the
+    numbers (merged with Chan's parallel algorithm, numerically stable for large values of low variance), KLL sketch
+    of the numbers, HyperLogLog of the strings and counts of the most frequent strings (capped to
+    MAX_CATEGORICAL_BUCKETS values, so the categorical counts of merged sketches are approximate past the cap). The
+    HyperLogLog is dropped (no distinct_count) when merging sketches whose HyperLogLogs used different hashes
+
+    Args:
+        name (str): The feature name
+        kll_k (int): The KLL sketch's k
+    """
+
+    def __init__(self, name: str, kll_k: int = DEFAULT_KLL_K):
+        self.name = name
+        self.num_present = 0
+        self.num_missing = 0
+        self.num_integral = 0
+        self.num_fractional = 0
+        self.num_string = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.kll = KllSketch(kll_k)
+        self.hll: Optional[HyperLogLog] = HyperLogLog()
+        self.categories: Counter = Counter()
+
+    @classmethod
+    def from_profile(cls, profile: FeatureProfile, kll_k: int = DEFAULT_KLL_K) -> "FeatureSketch":
+        sketch = cls(profile.name, kll_k)
+        sketch.num_present, sketch.num_missing = profile.num_present, profile.num_missing
+        sketch.num_integral, sketch.num_fractional = profile.num_integral, profile.num_fractional
+        sketch.num_string = profile.num_string
+        numbers = profile.numbers
+        if len(numbers):
+            sketch.sum, sketch.mean = float(numbers.sum()), float(numbers.mean())
+            sketch.m2 = float(np.sum((numbers - sketch.mean) ** 2))
+            sketch.min, sketch.max = float(numbers.min()), float(numbers.max())
+            sketch.kll.update(numbers)
+        if len(profile.strings):
+            sketch.hll.update(profile.strings)
+            sketch.categories = most_frequent_values(profile.strings, MAX_CATEGORICAL_BUCKETS)
+        return sketch
+
+    def _cap_categories(self) -> None:
+        if len(self.categories) > MAX_CATEGORICAL_BUCKETS:
+            self.categories = Counter(dict(self.categories.most_common(MAX_CATEGORICAL_BUCKETS)))
+
+    @property
+    def num_numbers(self) -> int:
+        return self.num_integral + self.num_fractional
+
+    @property
+    def inferred_type(self) -> str:
+        if self.num_present == 0:
+            return UNKNOWN
+        if self.num_string > 0:
+            return STRING
+        if self.num_fractional > 0:
+            return FRACTIONAL
+        return INTEGRAL
+
+    def merge(self, other: "FeatureSketch") -> "FeatureSketch":
+        """
+        Merges the sketch of the same feature over another period into this one
+
+        Returns:
+            FeatureSketch: self
+        """
+        count, other_count = self.num_numbers, other.num_numbers
+        if other_count:
+            total = count + other_count
+            delta = other.mean - self.mean
+            self.mean += delta * other_count / total
+            self.m2 += other.m2 + delta**2 * count * other_count / total
+        self.num_present += other.num_present
+        self.num_missing += other.num_missing
+        self.num_integral += other.num_integral
+        self.num_fractional += other.num_fractional
+        self.num_string += other.num_string
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.kll.merge(other.kll)
+        if self.hll is not None and other.hll is not None and self.hll.hash_name == other.hll.hash_name:
+            self.hll.merge(other.hll)
+        elif self.hll is not None:
+            # e.g. hours sketched by versions with different hashes: the registers cannot be merged
+            logger.warning(f"Dropped the HyperLogLog of {self.name}, the merged sketches have incompatible hashes")
+            self.hll = None
+        self.categories.update(other.categories)
+        self._cap_categories()
+        return self
+
+    def to_statistics(self, inferred_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Args:
+            inferred_type (str): The feature's type (e.g. the baseline's). The type inferred from the values if None
+
+        Returns:
+            dict[str, Any]: The statistics.json feature
+        """
+        inferred_type = inferred_type or self.inferred_type
+        feature = {"name": self.name, "inferred_type": inferred_type}
+        common = {"num_present": self.num_present, "num_missing": self.num_missing}
+        if inferred_type in (INTEGRAL, FRACTIONAL):
+            statistics = {"common": common}
+            if self.num_numbers:
+                statistics.update(
+                    {
+                        "mean": self.mean,
+                        "sum": self.sum,
+                        "std_dev": float(np.sqrt(self.m2 / self.num_numbers)),
+                        "min": self.min,
+                        "max": self.max,
+                        "distribution": {
+                            "kll": {
+                                "buckets": kll_buckets(self.kll, self.min, self.max, NUM_KLL_BUCKETS),
+                                "sketch": self.kll.to_dict(),
+                            }
+                        },
+                    }
+                )
+            feature["numerical_statistics"] = statistics
+        elif inferred_type == STRING:
+            buckets = [{"value": value, "count": count} for value, count in self.categories.most_common()]
+            feature["string_statistics"] = {"common": common}
+            if self.hll is not None:
+                feature["string_statistics"]["distinct_count"] = float(round(self.hll.estimate()))
+            feature["string_statistics"]["distribution"] = {"categorical": {"buckets": buckets}}
+        return feature
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "counts": {
+                "num_present": self.num_present,
+                "num_missing": self.num_missing,
+                "num_integral": self.num_integral,
+                "num_fractional": self.num_fractional,
+                "num_string": self.num_string,
+            },
+            # JSON has no infinity, an empty feature has no min/max
+            "summary": {
+                "sum": self.sum,
+                "mean": self.mean,
+                "m2": self.m2,
+                "min": self.min if self.num_numbers else None,
+                "max": self.max if self.num_numbers else None,
+            },
+            "kll": {**self.kll.to_dict(), "count": self.kll.count},
+            "hll": None if self.hll is None else self.hll.to_dict(),
+            "categories": dict(self.categories),
+        }
+
+    @classmethod
+    def from_dict(cls, sketch: Dict[str, Any]) -> "FeatureSketch":
+        result = cls(sketch["name"])
+        for key, value in sketch["counts"].items():
+            setattr(result, key, int(value))
+        summary = sketch["summary"]
+        result.sum, result.mean, result.m2 = float(summary["sum"]), float(summary["mean"]), float(summary["m2"])
+        result.min = np.inf if summary["min"] is None else float(summary["min"])
+        result.max = -np.inf if summary["max"] is None else float(summary["max"])
+        result.kll = KllSketch.from_dict(sketch["kll"], sketch["kll"]["count"])
+        result.hll = None if sketch["hll"] is None else HyperLogLog.from_dict(sketch["hll"])
+        result.categories = Counter(sketch["categories"])
+        return result
+
+
+class DatasetSketch:
+    """
+    Mergeable sketches of all the features of a dataset (e.g. the data captured during one hour)
+    """
+
+    def __init__(self, item_count: int = 0, features: Optional[List[FeatureSketch]] = None):
+        self.item_count = item_count
+        self.features: Dict[str, FeatureSketch] = {feature.name: feature for feature in features or []}
+
+    @classmethod
+    def from_profiles(cls, profiles: List[FeatureProfile], item_count: int) -> "DatasetSketch":
+        return cls(item_count, [FeatureSketch.from_profile(profile) for profile in profiles])
+
+    def merge(self, other: "DatasetSketch") -> "DatasetSketch":
+        """
+        Merges the sketch of another period into this one (features missing from a period are kept)
+
+        Returns:
+            DatasetSketch: self
+        """
+        self.item_count += other.item_count
+        for name, feature in other.features.items():
+            if name in self.features:
+                self.features[name].merge(feature)
+            else:
+                self.features[name] = FeatureSketch.from_dict(feature.to_dict())
+        return self
+
+    def to_statistics(self, baseline_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Args:
+            baseline_types (dict[str, str]): The baseline's inferred type of every feature
+
+        Returns:
+            dict[str, Any]: The statistics.json document of the dataset
+        """
+        baseline_types = baseline_types or {}
+        return {
+            "version": 0.0,
+            "dataset": {"item_count": self.item_count},
+            "features": [feature.to_statistics(baseline_types.get(name)) for name, feature in self.features.items()],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": 0.0,
+            "dataset": {"item_count": self.item_count},
+            "features": [feature.to_dict() for feature in self.features.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, sketch: Dict[str, Any]) -> "DatasetSketch":
+        features = [FeatureSketch.from_dict(feature) for feature in sketch["features"]]
+        return cls(sketch["dataset"]["item_count"], features)
+
+
+def hourly_prefixes(
+    output_uri: str, endpoint_name: str, schedule_name: str, start: datetime.datetime, hours: int
+) -> Iterator[str]:
+    """
+    Generates the prefixes of the hourly outputs of a monitoring schedule
+    (<output uri>/<endpoint>/<schedule>/<yyyy>/<mm>/<dd>/<hh>, the layout of the Model Monitor outputs)
+
+    Args:
+        output_uri (str): The monitoring output S3 URI (DataQualityMonitoringOutputS3Uri) or directory
+        endpoint_name (str): The endpoint name
+        schedule_name (str): The monitoring schedule name
+        start (datetime.datetime): The first hour
+        hours (int): The number of hours
+
+    Returns:
+        Iterator[str]: The prefixes
+    """
+    return hour_partitions("/".join([output_uri.rstrip("/"), endpoint_name, schedule_name]), start, hours)
+
+
+def read_sketch(uri: str, s3_client=None) -> Optional[DatasetSketch]:
+    """
+    Reads a sketches.json file from Amazon S3 or the local disk
+
+    Args:
+        uri (str): The s3:// URI or path of the file
+        s3_client (boto3.client): S3 client, required for s3:// URIs
+
+    Returns:
+        DatasetSketch: The sketch, or None if the file does not exist
+    """
+    sketch = read_json_uri(uri, s3_client)
+    return None if sketch is None else DatasetSketch.from_dict(sketch)
+
+
+def write_sketch(sketch: DatasetSketch, uri: str, s3_client=None) -> None:
+    write_json_uri(uri, sketch.to_dict(), s3_client)
+
+
+def merge_hourly_sketches(
+    output_uri: str,
+    endpoint_name: str,
+    schedule_name: str,
+    start: datetime.datetime,
+    hours: int,
+    s3_client=None,
+) -> DatasetSketch:
+    """
+    Merges the hourly sketches of a period (hours without a sketch, e.g. without captured data, are skipped)
+
+    Returns:
+        DatasetSketch: The sketch of the period
+    """
+    merged = DatasetSketch()
+    found = 0
+    for prefix in hourly_prefixes(output_uri, endpoint_name, schedule_name, start, hours):
+        sketch = read_sketch(f"{prefix}/{SKETCHES_FILE_NAME}", s3_client)
+        if sketch is not None:
+            merged.merge(sketch)
+            found += 1
+    logger.info(f"Merged {found}/{hours} hourly sketches ({merged.item_count} records) from {start.isoformat()}")
+    return merged
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("Merge the hourly data-quality sketches into daily/weekly statistics.")
+    parser.add_argument(
+        "--output-s3-uri",
+        type=str,
+        required=True,
+        help="DataQualityMonitoringOutputS3Uri of the monitoring schedule (or a local directory with the same layout).",
+    )
+    parser.add_argument("--endpoint-name", type=str, required=True, help="Endpoint name.")
+    parser.add_argument("--monitoring-schedule-name", type=str, required=True, help="Monitoring schedule name.")
+    parser.add_argument(
+        "--view", type=str, choices=list(VIEW_HOURS), default="daily", help="Period to merge. Default daily."
+    )
+    parser.add_argument(
+        "--date",
+        type=datetime.datetime.fromisoformat,
+        required=True,
+        help="Start of the period (UTC), e.g. 2026-01-01 or 2026-01-01T13.",
+    )
+    parser.add_argument(
+        "--baseline-statistics",
+        type=str,
+        default=None,
+        help="statistics.json of the baseline, whose feature types are kept. Default None.",
+    )
+    parser.add_argument(
+        "--statistics-file", type=str, default="statistics.json", help="Merged statistics. Default statistics.json."
+    )
+    parser.add_argument(
+        "--sketches-uri",
+        type=str,
+        default=None,
+        help="Also write the merged sketches to this s3:// URI or path, to merge views further. Default None.",
+    )
+    args = parser.parse_args()
+
+    s3_client = create_s3_client(args.output_s3_uri, args.sketches_uri)
+    sketch = merge_hourly_sketches(
+        args.output_s3_uri,
+        args.endpoint_name,
+        args.monitoring_schedule_name,
+        args.date,
+        VIEW_HOURS[args.view],
+        s3_client,
+    )
+    baseline_types = None
+    if args.baseline_statistics:
+        with open(args.baseline_statistics) as f:
+            baseline_types = {feature["name"]: feature["inferred_type"] for feature in json.load(f)["features"]}
+    with open(args.statistics_file, "w") as f:
+        json.dump(sketch.to_statistics(baseline_types), f, indent=4)
+    if args.sketches_uri:
+        write_sketch(sketch, args.sketches_uri, s3_client)
+
+
+if __name__ == "__main__":
+    main()
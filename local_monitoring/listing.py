@@ -0,0 +1,228 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Parallel listing of hour-partitioned prefixes (<prefix>/<yyyy>/<mm>/<dd>/<hh>/, the layout of the data capture, ground
+truth and monitor-output prefixes): the hours of a time range are listed concurrently by a bounded pool and streamed
+back in order, and the listings of closed (past) hours are cached on disk for good.
+
+    python -m local_monitoring.listing --prefix s3://bucket/monitor-output/data-quality/my-endpoint/my-schedule \
+        --start 2026-01-01 --hours 720 --file-name statistics.json
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+from local_monitoring.capture import hour_partitions
+from local_monitoring.storage import create_s3_client, is_s3_uri, split_s3_uri
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 16
+# an hour is closed (its listing cannot change anymore) this many hours after its end: data capture files are flushed
+# within minutes, and the monitoring jobs of an hour run during the next one
+DEFAULT_SETTLE_HOURS = 3
+DEFAULT_CACHE_DIR = os.path.join(".model-monitor-cache", "s3-listings")
+
+
+class HourListingCache:
+    """
+    Permanent on-disk cache of the listings of closed hour prefixes, one JSON file per prefix
+
+    Args:
+        cache_dir (str): The directory of the cached listings
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _file_name(self, prefix: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(prefix.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, prefix: str) -> Optional[List[str]]:
+        """
+        Args:
+            prefix (str): The hour prefix
+
+        Returns:
+            list[str]: The cached listing, or None if the prefix is not cached
+        """
+        try:
+            with open(self._file_name(prefix)) as f:
+                uris = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return uris
+
+    def set(self, prefix: str, uris: List[str]) -> None:
+        """
+        Caches the listing of a prefix (written to a temporary file first, so readers never see a partial listing)
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        file_name = self._file_name(prefix)
+        with open(f"{file_name}.{os.getpid()}.tmp", "w") as f:
+            json.dump(uris, f)
+        os.replace(f"{file_name}.{os.getpid()}.tmp", file_name)
+
+
+def list_prefix(prefix: str, s3_client=None) -> List[str]:
+    """
+    Lists all the files under a prefix
+
+    Args:
+        prefix (str): The s3:// prefix or directory
+        s3_client (boto3.client): S3 client, required for s3:// prefixes
+
+    Returns:
+        list[str]: The files' URIs (or paths), in order
+    """
+    if is_s3_uri(prefix):
+        bucket, key_prefix = split_s3_uri(prefix)
+        paginator = s3_client.get_paginator("list_objects_v2")
+        return [
+            f"s3://{bucket}/{item['Key']}"
+            for page in paginator.paginate(Bucket=bucket, Prefix=key_prefix.rstrip("/") + "/")
+            for item in page.get("Contents", [])
+        ]
+    file_names = []
+    for root, dirs, files in os.walk(prefix):
+        dirs.sort()
+        file_names.extend(os.path.join(root, file_name) for file_name in sorted(files))
+    return file_names
+
+
+def to_utc(value: datetime.datetime) -> datetime.datetime:
+    """
+    Args:
+        value (datetime.datetime): A naive UTC time, or a time with any offset
+
+    Returns:
+        datetime.datetime: The naive UTC time
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def is_closed_hour(hour: datetime.datetime, settle_hours: float, now: datetime.datetime) -> bool:
+    return hour + datetime.timedelta(hours=1 + settle_hours) <= now
+
+
+def iter_hour_uris(
+    prefix: str,
+    start: datetime.datetime,
+    hours: int,
+    s3_client=None,
+    file_name: Optional[str] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache: Optional[HourListingCache] = None,
+    settle_hours: float = DEFAULT_SETTLE_HOURS,
+    now: Optional[datetime.datetime] = None,
+) -> Iterator[str]:
+    """
+    Lists the files of the hour partitions of a time range, max_workers hours at a time. The listings are yielded in
+    hour order, as soon as every earlier hour is listed, and at most 2 * max_workers hours are listed ahead of the
+    consumer
+
+    Args:
+        prefix (str): The hour-partitioned s3:// prefix or directory (e.g. <DataQualityMonitoringOutputS3Uri>/<endpoint>
+            /<schedule>, or the data capture prefix of a variant)
+        start (datetime.datetime): The first hour (UTC if naive)
+        hours (int): The number of hours
+        s3_client (boto3.client): S3 client, required for s3:// prefixes
+        file_name (str): Only list the files with this name (e.g. "statistics.json"). All the files if None
+        max_workers (int): The number of hours listed concurrently
+        cache (HourListingCache): The cache of the listings of closed hours (S3 prefixes only). No cache if None
+        settle_hours (float): Hours after which an hour is closed
+        now (datetime.datetime): The current time (UTC if naive). datetime.utcnow() if None
+
+    Returns:
+        Iterator[str]: The files' URIs (or paths)
+    """
+    now = to_utc(now or datetime.datetime.now(datetime.timezone.utc))
+    start = to_utc(start).replace(minute=0, second=0, microsecond=0)
+    cacheable = cache is not None and is_s3_uri(prefix)
+
+    def list_hour(partition: str, hour: datetime.datetime) -> List[str]:
+        closed = cacheable and is_closed_hour(hour, settle_hours, now)
+        if closed:
+            uris = cache.get(partition)
+            if uris is not None:
+                return uris
+        uris = list_prefix(partition, s3_client)
+        if closed:
+            cache.set(partition, uris)
+        return uris
+
+    def matching(uris: List[str]) -> List[str]:
+        return uris if file_name is None else [uri for uri in uris if uri.rsplit("/", 1)[-1] == file_name]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for index, partition in enumerate(hour_partitions(prefix, start, hours)):
+            pending.append(executor.submit(list_hour, partition, start + datetime.timedelta(hours=index)))
+            if len(pending) >= 2 * max_workers:
+                yield from matching(pending.popleft().result())
+        while pending:
+            yield from matching(pending.popleft().result())
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("List the files of the hour partitions of a time range.")
+    parser.add_argument("--prefix", type=str, required=True, help="Hour-partitioned s3:// prefix or directory.")
+    parser.add_argument(
+        "--start",
+        type=datetime.datetime.fromisoformat,
+        required=True,
+        help="First hour (UTC unless it has an offset), e.g. 2026-01-01T13.",
+    )
+    parser.add_argument("--hours", type=int, default=24, help="Number of hours. Default 24.")
+    parser.add_argument("--file-name", type=str, default=None, help="Only list the files with this name. Default None.")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Hours listed concurrently. Default {DEFAULT_MAX_WORKERS}.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of the cached listings of closed hours. Default {DEFAULT_CACHE_DIR}.",
+    )
+    args = parser.parse_args()
+
+    s3_client = create_s3_client(args.prefix, max_pool_connections=args.max_workers)
+    cache = HourListingCache(args.cache_dir)
+    num_files = 0
+    for uri in iter_hour_uris(args.prefix, args.start, args.hours, s3_client, args.file_name, args.max_workers, cache):
+        print(uri)
+        num_files += 1
+    logger.info(f"Listed {num_files} files ({cache.hits} closed hours cached, {cache.misses} not cached yet)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,591 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Model quality metrics of the merged inferences/ground truth (see ground_truth.py) for the template's ProblemType,
+compatible with the Model Monitor model quality statistics/constraints files (ModelQualityConstraintsS3Uri).
+
+    python -m local_monitoring.model_quality --dataset-source ./merged --problem-type BinaryClassification \
+        --probability-attribute 0 --probability-threshold-attribute 0.5 --baseline-constraints ./constraints.json
+"""
+import os
+import re
+import json
+import logging
+import argparse
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from local_monitoring.capture import ENDPOINT_OUTPUT, decode_capture_data, iter_capture_files
+from local_monitoring.data_quality import read_json_file, write_json_file
+
+logger = logging.getLogger(__name__)
+
+REGRESSION = "Regression"
+BINARY_CLASSIFICATION = "BinaryClassification"
+MULTICLASS_CLASSIFICATION = "MulticlassClassification"
+# statistics.json/constraints.json sections of every problem type
+METRICS_SECTIONS = {
+    REGRESSION: ("regression_metrics", "regression_constraints"),
+    BINARY_CLASSIFICATION: ("binary_classification_metrics", "binary_classification_constraints"),
+    MULTICLASS_CLASSIFICATION: ("multiclass_classification_metrics", "multiclass_classification_constraints"),
+}
+# metrics whose increase is a degradation, the others are checked with LessThanThreshold
+GREATER_IS_WORSE = {"mae", "mse", "rmse", "false_positive_rate", "false_negative_rate"}
+# number of records parsed at once
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class WelfordAccumulator:
+    """
+    Streaming count/mean/sum of squared deviations of several series, updated with chunks of values (merged with
+    Chan's parallel algorithm, so it is numerically stable without keeping the values)
+
+    Args:
+        size (int): The number of series
+    """
+
+    def __init__(self, size: int):
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Args:
+            values (np.ndarray): The values, of shape (number of values, number of series)
+        """
+        count = len(values)
+        if not count:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.m2 / self.count if self.count else np.zeros_like(self.m2)
+
+
+class RegressionMetrics:
+    """
+    Streaming MAE, MSE, RMSE and R2, with their standard errors
+    """
+
+    def __init__(self):
+        # series: absolute error, squared error, label
+        self.accumulator = WelfordAccumulator(3)
+
+    def update(self, labels: np.ndarray, predictions: np.ndarray) -> None:
+        errors = predictions - labels
+        self.accumulator.update(np.column_stack([np.abs(errors), errors * errors, labels]))
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        count = self.accumulator.count
+        if not count:
+            return {}
+        (mae, mse, _), (mae_variance, mse_variance, label_variance) = self.accumulator.mean, self.accumulator.variance
+        mae_error, mse_error = np.sqrt(mae_variance / count), np.sqrt(mse_variance / count)
+        rmse = np.sqrt(mse)
+        metrics = {
+            "mae": (mae, mae_error),
+            "mse": (mse, mse_error),
+            # delta method
+            "rmse": (rmse, mse_error / (2 * rmse) if rmse else 0.0),
+        }
+        if label_variance > 0:
+            metrics["r2"] = (1 - mse / label_variance, mse_error / label_variance)
+        return {
+            name: {"value": float(value), "standard_deviation": float(error)}
+            for name, (value, error) in metrics.items()
+        }
+
+
+def auc(labels: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    """
+    Area under the ROC curve (Mann-Whitney U statistic), with one sort of the scores. Tied scores get their average
+    rank
+
+    Args:
+        labels (np.ndarray): The binary labels (0/1)
+        scores (np.ndarray): The predicted probabilities of the positive class
+
+    Returns:
+        float: The AUC, or None if there are no positive or no negative labels
+    """
+    num_positive = int(labels.sum())
+    num_negative = len(labels) - num_positive
+    if not num_positive or not num_negative:
+        return None
+    order = np.argsort(scores, kind="stable")
+    sorted_scores = scores[order]
+    # start/end positions of the runs of equal scores
+    starts = np.flatnonzero(np.concatenate([[True], sorted_scores[1:] != sorted_scores[:-1]]))
+    ends = np.append(starts[1:], len(sorted_scores))
+    average_ranks = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+    positive_ranks = average_ranks[labels[order] == 1].sum()
+    return float((positive_ranks - num_positive * (num_positive + 1) / 2.0) / (num_positive * num_negative))
+
+
+def f_score(precision: float, recall: float, beta: float) -> float:
+    denominator = beta * beta * precision + recall
+    return (1 + beta * beta) * precision * recall / denominator if denominator else 0.0
+
+
+class BinaryClassificationMetrics:
+    """
+    Streaming confusion matrix (np.bincount of 2 * label + prediction) and the scores of the AUC
+    """
+
+    def __init__(self):
+        self.confusion = np.zeros(4, dtype=np.int64)
+        self.labels: List[np.ndarray] = []
+        self.scores: List[np.ndarray] = []
+
+    def update(self, labels: np.ndarray, predictions: np.ndarray, scores: Optional[np.ndarray] = None) -> None:
+        labels, predictions = labels.astype(np.int64), predictions.astype(np.int64)
+        if ((labels != 0) & (labels != 1)).any() or ((predictions != 0) & (predictions != 1)).any():
+            raise ValueError("Binary labels and predictions must be 0 or 1 (see binary_classes)")
+        self.confusion += np.bincount(2 * labels + predictions, minlength=4)
+        if scores is not None:
+            self.labels.append(labels)
+            self.scores.append(scores)
+
+    def to_dict(self) -> Dict[str, Any]:
+        true_negative, false_positive, false_negative, true_positive = (int(count) for count in self.confusion)
+        total = true_negative + false_positive + false_negative + true_positive
+        if not total:
+            return {}
+
+        def ratio(numerator: int, denominator: int) -> float:
+            return numerator / denominator if denominator else 0.0
+
+        precision = ratio(true_positive, true_positive + false_positive)
+        recall = ratio(true_positive, true_positive + false_negative)
+        values = {
+            "accuracy": ratio(true_positive + true_negative, total),
+            "precision": precision,
+            "recall": recall,
+            "true_positive_rate": recall,
+            "true_negative_rate": ratio(true_negative, true_negative + false_positive),
+            "false_positive_rate": ratio(false_positive, true_negative + false_positive),
+            "false_negative_rate": ratio(false_negative, true_positive + false_negative),
+            "f0_5": f_score(precision, recall, 0.5),
+            "f1": f_score(precision, recall, 1.0),
+            "f2": f_score(precision, recall, 2.0),
+        }
+        if self.scores:
+            value = auc(np.concatenate(self.labels), np.concatenate(self.scores))
+            if value is not None:
+                values["auc"] = value
+        metrics: Dict[str, Any] = {
+            "confusion_matrix": {
+                "0": {"0": true_negative, "1": false_positive},
+                "1": {"0": false_negative, "1": true_positive},
+            }
+        }
+        metrics.update({name: {"value": value, "standard_deviation": 0.0} for name, value in values.items()})
+        return metrics
+
+
+class MulticlassClassificationMetrics:
+    """
+    Streaming confusion matrix of any number of classes (grown when new classes are seen)
+    """
+
+    def __init__(self):
+        self.classes: Dict[str, int] = {}
+        self.confusion = np.zeros((0, 0), dtype=np.int64)
+
+    def _class_indexes(self, values: np.ndarray) -> np.ndarray:
+        distinct, inverse = np.unique(values, return_inverse=True)
+        for value in distinct.tolist():
+            self.classes.setdefault(value, len(self.classes))
+        mapping = np.array([self.classes[value] for value in distinct.tolist()], dtype=np.int64)
+        return mapping[inverse.reshape(-1)]
+
+    def update(self, labels: np.ndarray, predictions: np.ndarray) -> None:
+        label_indexes = self._class_indexes(labels.astype(str))
+        prediction_indexes = self._class_indexes(predictions.astype(str))
+        size = len(self.classes)
+        if self.confusion.shape[0] < size:
+            grown = np.zeros((size, size), dtype=np.int64)
+            grown[: self.confusion.shape[0], : self.confusion.shape[1]] = self.confusion
+            self.confusion = grown
+        self.confusion += np.bincount(label_indexes * size + prediction_indexes, minlength=size * size).reshape(
+            size, size
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = int(self.confusion.sum())
+        if not total:
+            return {}
+        true_positives = np.diag(self.confusion).astype(np.float64)
+        support = self.confusion.sum(axis=1)
+        predicted = self.confusion.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precisions = np.where(predicted > 0, true_positives / predicted, 0.0)
+            recalls = np.where(support > 0, true_positives / support, 0.0)
+        weights = support / total
+        values = {
+            "accuracy": float(true_positives.sum() / total),
+            "weighted_recall": float(np.dot(weights, recalls)),
+            "weighted_precision": float(np.dot(weights, precisions)),
+        }
+        for name, beta in [("weighted_f0_5", 0.5), ("weighted_f1", 1.0), ("weighted_f2", 2.0)]:
+            scores = [f_score(precision, recall, beta) for precision, recall in zip(precisions, recalls)]
+            values[name] = float(np.dot(weights, scores))
+        classes = list(self.classes)
+        metrics: Dict[str, Any] = {
+            "confusion_matrix": {
+                label: {prediction: int(self.confusion[i, j]) for j, prediction in enumerate(classes)}
+                for i, label in enumerate(classes)
+            }
+        }
+        metrics.update({name: {"value": value, "standard_deviation": 0.0} for name, value in values.items()})
+        return metrics
+
+
+def binary_classes(values: np.ndarray, positive_label: str = "1", negative_label: str = "0") -> np.ndarray:
+    """
+    Maps binary labels (or predicted labels) to 1 (positive) and 0 (negative). Numbers are compared as numbers, so
+    "1.0" is the positive label "1"
+
+    Args:
+        values (np.ndarray): The labels, as strings
+        positive_label (str): The positive label
+        negative_label (str): The negative label
+
+    Returns:
+        np.ndarray: 1 for the positive labels, 0 for the negative ones and -1 for the other values
+    """
+    classes = np.where(values == positive_label, 1, np.where(values == negative_label, 0, -1)).astype(np.int64)
+    unmatched = classes < 0
+    if unmatched.any():
+        numeric_classes = {}
+        for label, value in [(positive_label, 1), (negative_label, 0)]:
+            try:
+                numeric_classes[float(label)] = value
+            except ValueError:
+                pass
+        # the other values are compared as numbers, once per distinct value
+        distinct, inverse = np.unique(values[unmatched], return_inverse=True)
+        distinct_classes = []
+        for value in distinct.tolist():
+            try:
+                distinct_classes.append(numeric_classes.get(float(value), -1))
+            except ValueError:
+                distinct_classes.append(-1)
+        classes[unmatched] = np.array(distinct_classes, dtype=np.int64)[inverse.reshape(-1)]
+    return classes
+
+
+def get_attribute(payload: str, attribute: str) -> Optional[str]:
+    """
+    Gets an attribute of a CSV or JSON payload
+
+    Args:
+        payload (str): The payload
+        attribute (str): A CSV column index (e.g. "0") or a JSONPath (e.g. "$.predictions[0].score")
+
+    Returns:
+        str: The attribute's value, or None if the payload does not have it
+    """
+    if attribute.isdigit():
+        columns = payload.strip().split(",")
+        index = int(attribute)
+        return columns[index].strip() if index < len(columns) else None
+    value: Any = json.loads(payload)
+    for key in re.findall(r"[^.\[\]$]+", attribute):
+        try:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def iter_merged_records(
+    path: str,
+    inference_attribute: str,
+    probability_attribute: str,
+    ground_truth_attribute: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[List[str], List[Optional[str]], List[Optional[str]]]]:
+    """
+    Reads the labels, predictions and probabilities of the merged records, in chunks
+
+    Args:
+        path (str): The merged dataset directory (or file)
+        inference_attribute (str): Attribute of the predicted label in the endpoint output ("" if none)
+        probability_attribute (str): Attribute of the probability in the endpoint output ("" if none)
+        ground_truth_attribute (str): Attribute of the label in the ground truth data
+        chunk_size (int): The number of records per chunk
+
+    Returns:
+        Iterator[tuple[list[str], list[str], list[str]]]: The labels, predictions and probabilities of every chunk
+    """
+    labels, predictions, probabilities = [], [], []
+    for file_name in iter_capture_files(path):
+        with open(file_name, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                output = decode_capture_data(record["captureData"][ENDPOINT_OUTPUT])
+                labels.append(get_attribute(decode_capture_data(record["groundTruthData"]), ground_truth_attribute))
+                predictions.append(get_attribute(output, inference_attribute) if inference_attribute else None)
+                probabilities.append(get_attribute(output, probability_attribute) if probability_attribute else None)
+                if len(labels) == chunk_size:
+                    yield labels, predictions, probabilities
+                    labels, predictions, probabilities = [], [], []
+    if labels:
+        yield labels, predictions, probabilities
+
+
+def compute_metrics(
+    path: str,
+    problem_type: str,
+    inference_attribute: str = "",
+    probability_attribute: str = "",
+    probability_threshold: float = 0.5,
+    ground_truth_attribute: str = "0",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    positive_label: str = "1",
+    negative_label: str = "0",
+) -> Dict[str, Any]:
+    """
+    Computes the model quality statistics of a merged dataset
+
+    Args:
+        path (str): The merged dataset directory (or file)
+        problem_type (str): Regression, BinaryClassification or MulticlassClassification
+        inference_attribute (str): Attribute of the predicted label (InferenceAttribute)
+        probability_attribute (str): Attribute of the probability (ProbabilityAttribute). Binary predictions are
+            probability >= probability_threshold when there is no inference attribute
+        probability_threshold (float): ProbabilityThresholdAttribute
+        ground_truth_attribute (str): Attribute of the label in the ground truth data
+        chunk_size (int): The number of records parsed at once
+        positive_label (str): The positive binary label (and predicted label). Binary records whose label or
+            predicted label is neither the positive nor the negative label are skipped
+        negative_label (str): The negative binary label
+
+    Returns:
+        dict[str, Any]: The model quality statistics.json document
+    """
+    if problem_type == REGRESSION:
+        metrics = RegressionMetrics()
+    elif problem_type == BINARY_CLASSIFICATION:
+        metrics = BinaryClassificationMetrics()
+    else:
+        metrics = MulticlassClassificationMetrics()
+
+    item_count, num_out_of_domain = 0, 0
+    for labels, predictions, probabilities in iter_merged_records(
+        path, inference_attribute, probability_attribute, ground_truth_attribute, chunk_size
+    ):
+        # records without a label or a prediction are skipped
+        values = probabilities if not inference_attribute else predictions
+        valid = [label is not None and value is not None for label, value in zip(labels, values)]
+        labels = np.array([label for label, ok in zip(labels, valid) if ok], dtype=str)
+        item_count += len(labels)
+        if problem_type == MULTICLASS_CLASSIFICATION:
+            metrics.update(labels, np.array([value for value, ok in zip(values, valid) if ok], dtype=str))
+            continue
+        if problem_type == REGRESSION:
+            labels = labels.astype(np.float64)
+            metrics.update(labels, np.array([value for value, ok in zip(values, valid) if ok], dtype=np.float64))
+            continue
+        labels = binary_classes(labels, positive_label, negative_label)
+        scores = None
+        if probability_attribute:
+            scores = np.array([probability for probability, ok in zip(probabilities, valid) if ok], dtype=np.float64)
+        if inference_attribute:
+            binary_predictions = binary_classes(
+                np.array([value for value, ok in zip(values, valid) if ok], dtype=str), positive_label, negative_label
+            )
+            if scores is not None and np.isnan(scores).any():
+                scores = None
+        else:
+            binary_predictions = (scores >= probability_threshold).astype(np.int64)
+        in_domain = (labels >= 0) & (binary_predictions >= 0)
+        if not in_domain.all():
+            num_out_of_domain += int((~in_domain).sum())
+            item_count -= int((~in_domain).sum())
+            labels, binary_predictions = labels[in_domain], binary_predictions[in_domain]
+            scores = None if scores is None else scores[in_domain]
+        metrics.update(labels, binary_predictions, scores)
+
+    if num_out_of_domain:
+        logger.warning(
+            f"Skipped {num_out_of_domain} records whose label or predicted label is neither the positive label "
+            f"{positive_label!r} nor the negative label {negative_label!r}"
+        )
+
+    section, _ = METRICS_SECTIONS[problem_type]
+    return {"version": 0.0, "dataset": {"item_count": item_count}, section: metrics.to_dict()}
+
+
+def suggest_constraints(statistics: Dict[str, Any], problem_type: str) -> Dict[str, Any]:
+    """
+    Suggests constraints from baseline statistics (the metrics' baseline values are the thresholds)
+
+    Returns:
+        dict[str, Any]: The model quality constraints.json document
+    """
+    metrics_section, constraints_section = METRICS_SECTIONS[problem_type]
+    constraints = {}
+    for name, metric in statistics.get(metrics_section, {}).items():
+        if name == "confusion_matrix":
+            continue
+        operator = "GreaterThanThreshold" if name in GREATER_IS_WORSE else "LessThanThreshold"
+        constraints[name] = {"threshold": metric["value"], "comparison_operator": operator}
+    return {"version": 0.0, constraints_section: constraints}
+
+
+def check_constraints(statistics: Dict[str, Any], constraints: Dict[str, Any], problem_type: str) -> Dict[str, Any]:
+    """
+    Checks model quality statistics against constraints
+
+    Returns:
+        dict[str, Any]: The constraint_violations.json document {"violations": [...]}
+    """
+    metrics_section, constraints_section = METRICS_SECTIONS[problem_type]
+    metrics = statistics.get(metrics_section, {})
+    violations = []
+    for name, constraint in constraints.get(constraints_section, {}).items():
+        if name not in metrics:
+            continue
+        value, threshold = metrics[name]["value"], constraint["threshold"]
+        operator = constraint["comparison_operator"]
+        violated = {
+            "LessThanThreshold": value < threshold,
+            "GreaterThanThreshold": value > threshold,
+            "LessThanOrEqualToThreshold": value <= threshold,
+            "GreaterThanOrEqualToThreshold": value >= threshold,
+        }.get(operator, False)
+        if violated:
+            violations.append(
+                {
+                    "constraint_check_type": operator,
+                    "description": f"Metric {name} with {value} +/- {metrics[name]['standard_deviation']} was "
+                    f"{operator} '{threshold}'",
+                    "metric_name": name,
+                }
+            )
+    return {"violations": violations}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser("Compute the model quality metrics of the merged inferences and ground truth.")
+    parser.add_argument(
+        "--dataset-source",
+        type=str,
+        default=os.environ.get("dataset_source"),
+        help="Merged dataset directory (see local_monitoring.ground_truth). Default $dataset_source.",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        default=os.environ.get("output_path", "."),
+        help="Directory of statistics.json and constraint_violations.json. Default $output_path or the current one.",
+    )
+    parser.add_argument(
+        "--problem-type",
+        type=str,
+        choices=list(METRICS_SECTIONS),
+        default=os.environ.get("problem_type", BINARY_CLASSIFICATION),
+        help="ProblemType. Default $problem_type or BinaryClassification.",
+    )
+    parser.add_argument(
+        "--inference-attribute",
+        type=str,
+        default=os.environ.get("inference_attribute", ""),
+        help="InferenceAttribute. Default $inference_attribute.",
+    )
+    parser.add_argument(
+        "--probability-attribute",
+        type=str,
+        default=os.environ.get("probability_attribute", ""),
+        help="ProbabilityAttribute. Default $probability_attribute.",
+    )
+    parser.add_argument(
+        "--probability-threshold-attribute",
+        type=float,
+        default=float(os.environ.get("probability_threshold_attribute") or 0.5),
+        help="ProbabilityThresholdAttribute. Default $probability_threshold_attribute or 0.5.",
+    )
+    parser.add_argument(
+        "--ground-truth-attribute",
+        type=str,
+        default=os.environ.get("ground_truth_attribute", "0"),
+        help="Attribute of the label in the ground truth data. Default $ground_truth_attribute or 0.",
+    )
+    parser.add_argument(
+        "--positive-label",
+        type=str,
+        default=os.environ.get("positive_label", "1"),
+        help="Positive label of BinaryClassification. Default $positive_label or 1.",
+    )
+    parser.add_argument(
+        "--negative-label",
+        type=str,
+        default=os.environ.get("negative_label", "0"),
+        help="Negative label of BinaryClassification. Default $negative_label or 0.",
+    )
+    parser.add_argument(
+        "--baseline-constraints",
+        type=str,
+        default=os.environ.get("baseline_constraints"),
+        help="Model quality constraints.json (ModelQualityConstraintsS3Uri). Default $baseline_constraints.",
+    )
+    parser.add_argument(
+        "--suggest-constraints",
+        type=str,
+        choices=["yes", "no"],
+        default="no",
+        help="Write the constraints.json suggested from the computed metrics (baselining). Default no.",
+    )
+    args = parser.parse_args()
+    if not args.dataset_source:
+        parser.error("--dataset-source is required")
+    if not args.inference_attribute and not args.probability_attribute:
+        parser.error("--inference-attribute or --probability-attribute is required")
+
+    statistics = compute_metrics(
+        args.dataset_source,
+        args.problem_type,
+        args.inference_attribute,
+        args.probability_attribute,
+        args.probability_threshold_attribute,
+        args.ground_truth_attribute,
+        positive_label=args.positive_label,
+        negative_label=args.negative_label,
+    )
+    write_json_file(os.path.join(args.output_path, "statistics.json"), statistics)
+    logger.info(f"Computed the {args.problem_type} metrics of {statistics['dataset']['item_count']} records")
+    if args.suggest_constraints == "yes":
+        write_json_file(
+            os.path.join(args.output_path, "constraints.json"), suggest_constraints(statistics, args.problem_type)
+        )
+    constraints = read_json_file(args.baseline_constraints)
+    if constraints is not None:
+        violations = check_constraints(statistics, constraints, args.problem_type)
+        write_json_file(os.path.join(args.output_path, "constraint_violations.json"), violations)
+        logger.info(f"Found {len(violations['violations'])} constraint violations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Mergeable sketches of the feature distributions, compatible with the Model Monitor statistics.json documents
+"""
+import base64
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+# KLL parameters used by the Model Monitor statistics.json "kll" sketches
+DEFAULT_KLL_K = 2048
+DEFAULT_KLL_C = 0.64
+# HyperLogLog registers = 2^precision (about 1.04 / sqrt(2^precision) relative error)
+DEFAULT_HLL_PRECISION = 12
+# hash of the HyperLogLog registers (hash_strings), written with them: registers of different hashes cannot be merged
+HLL_HASH = "fnv1a-fmix64"
+# 64-bit FNV-1a and MurmurHash3 fmix64 constants
+FNV_OFFSET_BASIS = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+FMIX_MULTIPLIERS = (np.uint64(0xFF51AFD7ED558CCD), np.uint64(0xC4CEB9FE1A85EC53))
+
+
+class KllSketch:
+    """
+    KLL quantile sketch: level h holds items of weight 2^h, and is compacted (every other item of the sorted level is
+    promoted to level h + 1) when it exceeds its capacity, k * c^(depth below the top level). Compaction offsets
+    alternate, so sketches are deterministic
+
+    Args:
+        k (int): capacity of the top level (controls the accuracy, about 1.65 / k rank error)
+        c (float): capacity ratio between consecutive levels
+    """
+
+    def __init__(self, k: int = DEFAULT_KLL_K, c: float = DEFAULT_KLL_C):
+        self.k = int(k)
+        self.c = c
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self._compactions = 0
+
+    def _capacity(self, level: int) -> int:
+        return max(2, int(np.ceil(self.k * self.c ** (len(self.levels) - 1 - level))))
+
+    def _compress(self) -> None:
+        while True:
+            over_capacity = [
+                level for level in range(len(self.levels)) if len(self.levels[level]) > self._capacity(level)
+            ]
+            if not over_capacity:
+                return
+            level = over_capacity[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # an odd item stays at its level, the others are paired and one item of each pair is promoted
+            kept = len(items) % 2
+            offset = self._compactions % 2
+            self._compactions += 1
+            self.levels[level] = items[:kept]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[kept + offset :: 2]])
+
+    def update(self, values: np.ndarray) -> "KllSketch":
+        """
+        Adds values (non finite values are ignored)
+
+        Args:
+            values (np.ndarray): The values
+
+        Returns:
+            KllSketch: self
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += len(values)
+            self._compress()
+        return self
+
+    def merge(self, other: "KllSketch") -> "KllSketch":
+        """
+        Merges another sketch (with the same k) into this one
+
+        Args:
+            other (KllSketch): The other sketch
+
+        Returns:
+            KllSketch: self
+        """
+        if other.k != self.k:
+            raise ValueError(f"Can not merge KLL sketches with different k ({self.k} and {other.k})")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def weighted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The sorted items, and their cumulative weights
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def cdf(self, points: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            points (np.ndarray): The points
+
+        Returns:
+            np.ndarray: The estimated fraction of the values <= every point
+        """
+        items, cumulative_weights = self.weighted_items()
+        if not len(items):
+            return np.zeros(len(np.atleast_1d(points)))
+        positions = np.searchsorted(items, points, side="right")
+        return np.where(positions > 0, cumulative_weights[np.maximum(positions - 1, 0)], 0.0) / cumulative_weights[-1]
+
+    def quantiles(self, fractions: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            fractions (np.ndarray): The quantiles' fractions, between 0 and 1
+
+        Returns:
+            np.ndarray: The estimated quantiles (NaN if the sketch is empty)
+        """
+        items, cumulative_weights = self.weighted_items()
+        if not len(items):
+            return np.full(len(np.atleast_1d(fractions)), np.nan)
+        ranks = np.asarray(fractions) * cumulative_weights[-1]
+        return items[np.minimum(np.searchsorted(cumulative_weights, ranks, side="left"), len(items) - 1)]
+
+    def histogram(self, edges: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            edges (np.ndarray): The buckets' edges (the last bucket includes its upper edge)
+
+        Returns:
+            np.ndarray: The estimated number of values in every bucket
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        counts, _ = np.histogram(items, bins=edges, weights=weights)
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: The sketch in the statistics.json format {"parameters": {"c": ..., "k": ...}, "data": [...]}
+        """
+        return {
+            "parameters": {"c": self.c, "k": float(self.k)},
+            "data": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, sketch: Dict[str, Any], count: Optional[int] = None) -> "KllSketch":
+        """
+        Loads a statistics.json "kll" sketch
+
+        Args:
+            sketch (dict[str, Any]): The sketch {"parameters": {"c": ..., "k": ...}, "data": [[...], ...]}
+            count (int): The number of values in the sketch. Estimated from the levels if None
+
+        Returns:
+            KllSketch: The sketch
+        """
+        result = cls(int(sketch["parameters"]["k"]), float(sketch["parameters"]["c"]))
+        result.levels = [np.asarray(level, dtype=np.float64) for level in sketch["data"]] or [np.empty(0)]
+        if count is None:
+            count = int(sum(len(level) * 2**index for index, level in enumerate(result.levels)))
+        result.count = count
+        return result
+
+
+def kll_buckets(sketch: KllSketch, minimum: float, maximum: float, num_buckets: int = 10) -> List[Dict[str, float]]:
+    """
+    Splits [minimum, maximum] into equal-width buckets, with their estimated counts
+
+    Args:
+        sketch (KllSketch): The sketch
+        minimum (float): The minimum value
+        maximum (float): The maximum value
+        num_buckets (int): The number of buckets
+
+    Returns:
+        list[dict[str, float]]: The buckets [{"lower_bound": ..., "upper_bound": ..., "count": ...}, ...]
+    """
+    edges = np.linspace(minimum, maximum, num_buckets + 1)
+    if maximum > minimum:
+        counts = sketch.histogram(edges)
+    else:
+        counts = np.array([float(sketch.count)] + [0.0] * (num_buckets - 1))
+    return [
+        {"lower_bound": float(edges[index]), "upper_bound": float(edges[index + 1]), "count": float(counts[index])}
+        for index in range(num_buckets)
+    ]
+
+
+def hash_strings(values: np.ndarray) -> np.ndarray:
+    """
+    Hashes strings to 64 bits (stable across processes, unlike hash()) with FNV-1a over the code points and the
+    MurmurHash3 finalizer, vectorized over the values: the i-th step only updates the values longer than i
+
+    Args:
+        values (np.ndarray): The strings
+
+    Returns:
+        np.ndarray: The uint64 hashes of the values, ordered by decreasing length
+    """
+    values = np.asarray(values, dtype=str)
+    if not len(values):
+        return np.zeros(0, dtype=np.uint64)
+    lengths = np.char.str_len(values)
+    order = np.argsort(-lengths, kind="stable")
+    negative_lengths = -lengths[order]
+    code_points = values[order].view(np.uint32).reshape(len(values), -1).astype(np.uint64)
+    hashes = np.full(len(values), FNV_OFFSET_BASIS, dtype=np.uint64)
+    for position in range(code_points.shape[1]):
+        active = int(np.searchsorted(negative_lengths, -position, side="left"))
+        hashes[:active] ^= code_points[:active, position]
+        hashes[:active] *= FNV_PRIME
+    # finalizer, so that the first bits (register index) depend on all the bits
+    shift = np.uint64(33)
+    hashes ^= hashes >> shift
+    hashes *= FMIX_MULTIPLIERS[0]
+    hashes ^= hashes >> shift
+    hashes *= FMIX_MULTIPLIERS[1]
+    hashes ^= hashes >> shift
+    return hashes
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct count sketch. Merging two sketches (register-wise maximum) gives the sketch of the union
+
+    Args:
+        precision (int): log2 of the number of registers
+        hash_name (str): The hash of the registers' values, HLL_HASH (hash_strings) for new sketches
+    """
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION, hash_name: str = HLL_HASH):
+        self.precision = int(precision)
+        self.hash_name = hash_name
+        self.registers = np.zeros(2**self.precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray) -> "HyperLogLog":
+        """
+        Args:
+            values (np.ndarray): The values, as strings
+
+        Returns:
+            HyperLogLog: self
+        """
+        if self.hash_name != HLL_HASH:
+            raise ValueError(f"Cannot update a HyperLogLog sketch of hash {self.hash_name} with {HLL_HASH} hashes")
+        hashes = hash_strings(values)
+        if not len(hashes):
+            return self
+        # the first bits select the register, the register keeps the max position of the first 1 bit of the others
+        indexes = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        remaining = ((hashes << np.uint64(self.precision)) >> np.uint64(32)).astype(np.float64)
+        _, bit_lengths = np.frexp(remaining)
+        ranks = np.where(remaining > 0, 33 - bit_lengths, 33).astype(np.uint8)
+        np.maximum.at(self.registers, indexes, ranks)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Merges another sketch (of the same precision and hash) into this one
+
+        Returns:
+            HyperLogLog: self
+        """
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precisions {self.precision} and {other.precision}")
+        if other.hash_name != self.hash_name:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of hashes {self.hash_name} and {other.hash_name}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        """
+        Returns:
+            float: The estimated number of distinct values
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # small range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: The sketch {"precision": ..., "hash": ..., "registers": <base64 registers>}
+        """
+        return {
+            "precision": self.precision,
+            "hash": self.hash_name,
+            "registers": base64.b64encode(self.registers.tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, sketch: Dict[str, Any]) -> "HyperLogLog":
+        result = cls(sketch["precision"], sketch["hash"])
+        result.registers = np.frombuffer(base64.b64decode(sketch["registers"]), dtype=np.uint8).copy()
+        return result
@@ -0,0 +1,182 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Computes per-feature data-quality statistics in the Model Monitor statistics.json schema
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional
+from local_monitoring.sketches import DEFAULT_KLL_K, KllSketch, kll_buckets
+
+# statistics.json inferred types
+INTEGRAL = "Integral"
+FRACTIONAL = "Fractional"
+STRING = "String"
+UNKNOWN = "Unknown"
+
+NUM_KLL_BUCKETS = 10
+# maximum number of categorical buckets of a String feature (the most frequent values are kept)
+MAX_CATEGORICAL_BUCKETS = 1000
+
+
+class FeatureProfile:
+    """
+    Per-value type counts and the numeric/string values of one feature, used to compute its statistics and to check
+    its data type against the baseline
+
+    Args:
+        name (str): The feature name
+        values (np.ndarray): The feature's raw values, as strings (empty strings are missing values)
+    """
+
+    def __init__(self, name: str, values: np.ndarray):
+        self.name = name
+        values = np.char.strip(np.asarray(values, dtype=str))
+        missing = values == ""
+        numbers = to_numbers(values)
+        numeric = np.isfinite(numbers) & ~missing
+        # integers are written without decimal point/exponent (e.g. "1", "-2"), like Model Monitor does
+        integral = numeric & np.char.isdigit(np.char.lstrip(values, "+-"))
+
+        self.num_missing = int(missing.sum())
+        self.num_present = len(values) - self.num_missing
+        self.num_integral = int(integral.sum())
+        self.num_fractional = int(numeric.sum()) - self.num_integral
+        self.num_string = self.num_present - self.num_integral - self.num_fractional
+        self.numbers = numbers[numeric]
+        self.strings = values[~missing]
+
+    @property
+    def inferred_type(self) -> str:
+        if self.num_present == 0:
+            return UNKNOWN
+        if self.num_string > 0:
+            return STRING
+        if self.num_fractional > 0:
+            return FRACTIONAL
+        return INTEGRAL
+
+    def num_matching(self, inferred_type: str) -> int:
+        """
+        Args:
+            inferred_type (str): The expected (baseline) type
+
+        Returns:
+            int: The number of present values compatible with the type (integers are valid Fractional values,
+                every value is a valid String)
+        """
+        if inferred_type == INTEGRAL:
+            return self.num_integral
+        if inferred_type == FRACTIONAL:
+            return self.num_integral + self.num_fractional
+        return self.num_present
+
+
+def to_numbers(values: np.ndarray) -> np.ndarray:
+    """
+    Converts strings to floats, vectorized when all the values are numbers
+
+    Args:
+        values (np.ndarray): The values, as strings
+
+    Returns:
+        np.ndarray: The numbers (NaN for the values that are not numbers)
+    """
+    try:
+        return np.where(values == "", "nan", values).astype(np.float64)
+    except ValueError:
+        pass
+
+    def to_number(value: str) -> float:
+        try:
+            return float(value)
+        except ValueError:
+            return np.nan
+
+    return np.frompyfunc(to_number, 1, 1)(values).astype(np.float64)
+
+
+def numerical_statistics(profile: FeatureProfile, kll_k: int = DEFAULT_KLL_K) -> Dict[str, Any]:
+    """
+    Args:
+        profile (FeatureProfile): The feature's profile
+        kll_k (int): The KLL sketch's k
+
+    Returns:
+        dict[str, Any]: The statistics.json "numerical_statistics" of the feature
+    """
+    numbers = profile.numbers
+    statistics = {"common": {"num_present": profile.num_present, "num_missing": profile.num_missing}}
+    if not len(numbers):
+        return statistics
+    minimum, maximum = float(numbers.min()), float(numbers.max())
+    sketch = KllSketch(kll_k).update(numbers)
+    statistics.update(
+        {
+            "mean": float(numbers.mean()),
+            "sum": float(numbers.sum()),
+            "std_dev": float(numbers.std()),
+            "min": minimum,
+            "max": maximum,
+            "distribution": {
+                "kll": {"buckets": kll_buckets(sketch, minimum, maximum, NUM_KLL_BUCKETS), "sketch": sketch.to_dict()}
+            },
+        }
+    )
+    return statistics
+
+
+def string_statistics(profile: FeatureProfile) -> Dict[str, Any]:
+    """
+    Args:
+        profile (FeatureProfile): The feature's profile
+
+    Returns:
+        dict[str, Any]: The statistics.json "string_statistics" of the feature
+    """
+    values, counts = np.unique(profile.strings, return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:MAX_CATEGORICAL_BUCKETS]
+    return {
+        "common": {"num_present": profile.num_present, "num_missing": profile.num_missing},
+        "distinct_count": float(len(values)),
+        "distribution": {
+            "categorical": {"buckets": [{"value": str(values[i]), "count": int(counts[i])} for i in order]}
+        },
+    }
+
+
+def compute_statistics(
+    profiles: List[FeatureProfile], item_count: int, baseline_types: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Computes the statistics.json document of a dataset
+
+    Args:
+        profiles (list[FeatureProfile]): The features' profiles
+        item_count (int): The number of records
+        baseline_types (dict[str, str]): The baseline's inferred type of every feature. Features keep their baseline
+            type (so they are compared with the baseline), others use the type inferred from the data
+
+    Returns:
+        dict[str, Any]: The statistics {"version": 0.0, "dataset": {"item_count": ...}, "features": [...]}
+    """
+    baseline_types = baseline_types or {}
+    features = []
+    for profile in profiles:
+        inferred_type = baseline_types.get(profile.name, profile.inferred_type)
+        feature = {"name": profile.name, "inferred_type": inferred_type}
+        if inferred_type in (INTEGRAL, FRACTIONAL):
+            feature["numerical_statistics"] = numerical_statistics(profile)
+        elif inferred_type == STRING:
+            feature["string_statistics"] = string_statistics(profile)
+        features.append(feature)
+    return {"version": 0.0, "dataset": {"item_count": item_count}, "features": features}
@@ -0,0 +1,121 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+"""
+Reads/writes/lists JSON documents in Amazon S3 (s3:// URIs) or on the local disk (paths), so the local monitoring
+tools run on the monitoring outputs in place or on a synced copy
+"""
+import os
+import json
+from typing import Any, Iterator, Optional, Tuple
+
+
+def is_s3_uri(uri: Optional[str]) -> bool:
+    return bool(uri) and uri.startswith("s3://")
+
+
+def split_s3_uri(uri: str) -> Tuple[str, str]:
+    """
+    Args:
+        uri (str): s3://<bucket>/<key>
+
+    Returns:
+        tuple[str, str]: The bucket and the key
+    """
+    bucket, _, key = uri[len("s3://") :].partition("/")
+    return bucket, key
+
+
+def create_s3_client(*uris: Optional[str], max_pool_connections: Optional[int] = None):
+    """
+    Creates an S3 client if one of the URIs is in Amazon S3 (boto3 is only required then)
+
+    Args:
+        max_pool_connections (int): The size of the connection pool (at least the number of threads using the
+            client). The botocore default if None
+
+    Returns:
+        boto3.client: The client, or None
+    """
+    if not any(is_s3_uri(uri) for uri in uris):
+        return None
+    import boto3
+    from botocore.config import Config
+
+    config = Config(max_pool_connections=max_pool_connections) if max_pool_connections else None
+    return boto3.client("s3", config=config)
+
+
+def read_json_uri(uri: str, s3_client=None) -> Optional[Any]:
+    """
+    Args:
+        uri (str): The s3:// URI or path of a JSON document
+        s3_client (boto3.client): S3 client, required for s3:// URIs
+
+    Returns:
+        Any: The document, or None if it does not exist
+    """
+    if is_s3_uri(uri):
+        bucket, key = split_s3_uri(uri)
+        try:
+            body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+        except s3_client.exceptions.NoSuchKey:
+            return None
+        return json.loads(body)
+    if not os.path.exists(uri):
+        return None
+    with open(uri) as f:
+        return json.load(f)
+
+
+def write_json_uri(uri: str, content: Any, s3_client=None, indent: Optional[int] = None) -> None:
+    """
+    Args:
+        uri (str): The s3:// URI or path of the JSON document
+        content (Any): The document
+        s3_client (boto3.client): S3 client, required for s3:// URIs
+        indent (int): JSON indentation, compact if None
+    """
+    body = json.dumps(content, indent=indent)
+    if is_s3_uri(uri):
+        bucket, key = split_s3_uri(uri)
+        s3_client.put_object(Bucket=bucket, Key=key, Body=body.encode("utf-8"))
+        return
+    os.makedirs(os.path.dirname(uri) or ".", exist_ok=True)
+    with open(uri, "w") as f:
+        f.write(body)
+
+
+def iter_uris(prefix: str, file_name: str, s3_client=None) -> Iterator[str]:
+    """
+    Lists the files with a given name under a prefix, in order
+
+    Args:
+        prefix (str): The s3:// prefix or directory
+        file_name (str): The file name (e.g. "statistics.json")
+        s3_client (boto3.client): S3 client, required for s3:// prefixes
+
+    Returns:
+        Iterator[str]: The files' URIs (or paths)
+    """
+    if is_s3_uri(prefix):
+        bucket, key_prefix = split_s3_uri(prefix)
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=key_prefix):
+            for item in page.get("Contents", []):
+                if item["Key"].rsplit("/", 1)[-1] == file_name:
+                    yield f"s3://{bucket}/{item['Key']}"
+        return
+    for root, dirs, files in os.walk(prefix):
+        dirs.sort()
+        if file_name in files:
+            yield os.path.join(root, file_name)
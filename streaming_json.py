@@ -0,0 +1,293 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import re
+import json
+import logging
+import tempfile
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Amazon S3 multipart uploads require parts of at least 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# bytes read from the source objects at a time
+READ_CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = b" \t\r\n"
+# characters ending a string (or starting an escape sequence)
+_STRING_SPECIAL = re.compile(rb'["\\]')
+# characters changing the nesting of a container value
+_CONTAINER_SPECIAL = re.compile(rb'["{}\[\]]')
+# characters ending a top-level scalar value (number, true, false, null)
+_SCALAR_END = re.compile(rb"[,}\s]")
+
+
+def iter_top_level_members(chunks: Iterable[bytes]) -> Iterator[Tuple[str, Optional[Any]]]:
+    """
+    Incrementally scans a JSON object, without decoding the values of its members
+
+    Args:
+        chunks (Iterable[bytes]): the JSON object's bytes, in chunks of any size
+
+    Returns:
+        Iterator[tuple[str, Any]]: events ("key", <member name>), then one or more ("value", <raw bytes>)
+            fragments of the member's value, then ("end", None), for every top-level member
+
+    Raises:
+        ValueError: if the document is not a JSON object
+    """
+    state = "start"
+    key = bytearray()
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for chunk in chunks:
+        i, n = 0, len(chunk)
+        value_start = 0
+        while i < n:
+            if state == "key":
+                if escaped:
+                    key += chunk[i : i + 1]
+                    escaped, i = False, i + 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, i)
+                end = match.start() if match else n
+                key += chunk[i:end]
+                if match is None:
+                    i = n
+                elif chunk[end] == 0x5C:  # backslash, keep the escape sequence for json.loads
+                    key += b"\\"
+                    escaped, i = True, end + 1
+                    if i < n:
+                        key += chunk[i : i + 1]
+                        escaped, i = False, i + 1
+                else:
+                    yield "key", json.loads(b'"' + bytes(key) + b'"')
+                    state, i = "colon", end + 1
+                continue
+
+            if state == "value":
+                if in_string:
+                    if escaped:
+                        escaped, i = False, i + 1
+                        continue
+                    match = _STRING_SPECIAL.search(chunk, i)
+                    if match is None:
+                        i = n
+                    elif chunk[match.start()] == 0x5C:
+                        escaped, i = True, match.start() + 1
+                    else:
+                        in_string, i = False, match.start() + 1
+                        if depth == 0:
+                            yield "value", chunk[value_start:i]
+                            yield "end", None
+                            state = "after_value"
+                elif depth > 0:
+                    match = _CONTAINER_SPECIAL.search(chunk, i)
+                    if match is None:
+                        i = n
+                        continue
+                    character, i = chunk[match.start()], match.start() + 1
+                    if character == 0x22:  # quote
+                        in_string = True
+                    elif character in b"{[":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            yield "value", chunk[value_start:i]
+                            yield "end", None
+                            state = "after_value"
+                else:
+                    match = _SCALAR_END.search(chunk, i)
+                    if match is None:
+                        i = n
+                    else:
+                        i = match.start()
+                        yield "value", chunk[value_start:i]
+                        yield "end", None
+                        state = "after_value"
+                continue
+
+            character = chunk[i]
+            if character in _WHITESPACE:
+                i += 1
+                continue
+            if state == "start" and character == 0x7B:  # {
+                state = "key_or_end"
+            elif state in ("key_or_end", "key_after_comma") and character == 0x22:
+                state = "key"
+                key = bytearray()
+            elif state == "key_or_end" and character == 0x7D:  # }
+                state = "done"
+            elif state == "colon" and character == 0x3A:  # :
+                state = "value_start"
+            elif state == "value_start":
+                # the value starts here, the "value" state consumes its first character
+                state, value_start = "value", i
+                depth, in_string, escaped = 0, False, False
+                if character == 0x22:
+                    in_string = True
+                elif character in b"{[":
+                    depth = 1
+                i += 1
+                continue
+            elif state == "after_value" and character == 0x2C:  # ,
+                state = "key_after_comma"
+            elif state == "after_value" and character == 0x7D:
+                state = "done"
+            else:
+                raise ValueError(f"Invalid JSON object: unexpected {chr(character)!r} ({state})")
+            i += 1
+
+        # the value continues in the next chunk
+        if state == "value" and value_start < n:
+            yield "value", chunk[value_start:]
+
+    if state != "done":
+        raise ValueError(f"Invalid JSON object: unexpected end of document ({state})")
+
+
+def iter_merged_json_object(
+    first_chunks: Iterable[bytes], second_chunks: Iterable[bytes], memory_limit_bytes: int
+) -> Iterator[bytes]:
+    """
+    Merges two JSON objects, as first.update(second) would, without loading them in memory. The members of the
+    first object that are not overridden are written first, followed by all the members of the second object
+
+    Args:
+        first_chunks (Iterable[bytes]): the first JSON object's bytes
+        second_chunks (Iterable[bytes]): the second JSON object's bytes. It is buffered (in memory up to
+            memory_limit_bytes, then on disk) to collect its keys before the first object is written
+        memory_limit_bytes (int): maximum size of the in-memory buffer
+
+    Returns:
+        Iterator[bytes]: the merged JSON object's bytes
+    """
+    with tempfile.SpooledTemporaryFile(max_size=memory_limit_bytes) as second_buffer:
+        second_keys: Set[str] = set()
+        for event, data in iter_top_level_members(_tee_chunks(second_chunks, second_buffer)):
+            if event == "key":
+                second_keys.add(data)
+
+        second_buffer.seek(0)
+        is_first_member = True
+        yield b"{"
+        for chunks, skipped_keys in (
+            (first_chunks, second_keys),
+            (iter(lambda: second_buffer.read(READ_CHUNK_SIZE), b""), set()),
+        ):
+            skip = False
+            for event, data in iter_top_level_members(chunks):
+                if event == "key":
+                    skip = data in skipped_keys
+                    if not skip:
+                        yield (b"\n    " if is_first_member else b",\n    ") + json.dumps(data).encode("utf-8") + b": "
+                        is_first_member = False
+                elif event == "value" and not skip:
+                    yield data
+        yield b"\n}"
+
+
+def _tee_chunks(chunks: Iterable[bytes], buffer: IO[bytes]) -> Iterator[bytes]:
+    for chunk in chunks:
+        buffer.write(chunk)
+        yield chunk
+
+
+class S3MultipartUploadWriter:
+    """
+    Uploads a stream of bytes to an Amazon S3 object using a multipart upload, keeping at most one part in memory.
+    Streams smaller than one part are uploaded with a single put_object request
+
+    Args:
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        bucket_name (str): S3 bucket name
+        file_key (str): S3 object key
+        part_size (int): size of the uploaded parts, at least 5 MiB
+        extra_args (dict[str, Any]): additional create_multipart_upload/put_object arguments (e.g. Metadata)
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket_name: str,
+        file_key: str,
+        part_size: int = MIN_PART_SIZE,
+        extra_args: Optional[Dict[str, Any]] = None,
+    ):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.file_key = file_key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.extra_args = extra_args or {}
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+    def close(self) -> None:
+        """
+        Uploads the remaining bytes and completes the upload
+        """
+        if self._upload_id is None:
+            self.s3_client.put_object(
+                Body=bytes(self._buffer), Bucket=self.bucket_name, Key=self.file_key, **self.extra_args
+            )
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.file_key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        self._buffer = bytearray()
+
+    def abort(self) -> None:
+        """
+        Aborts the upload, so no incomplete parts are left (and billed) in the bucket
+        """
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.file_key, UploadId=self._upload_id)
+            self._upload_id = None
+
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=self.file_key, **self.extra_args
+            )["UploadId"]
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Body=body, Bucket=self.bucket_name, Key=self.file_key, UploadId=self._upload_id, PartNumber=part_number
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def __enter__(self) -> "S3MultipartUploadWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,38 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import pyarrow as pa
+import pyarrow.parquet as pq
+from local_monitoring.baseline import generate_baseline
+from local_monitoring.statistics import FRACTIONAL, INTEGRAL, STRING
+
+
+def test_parquet_whole_number_floats_are_fractional(tmp_path):
+    file_name = str(tmp_path / "train.parquet")
+    table = pa.table(
+        {
+            "price": pa.array([1.0, 2.0, None, 3.0], pa.float64()),
+            "weight": pa.array([0.5, 1.0, 2.0, 4.0], pa.float32()),
+            "count": pa.array([1, 2, 3, None], pa.int64()),
+            "name": pa.array(["a", "b", None, "a"]),
+        }
+    )
+    pq.write_table(table, file_name)
+    sketch = generate_baseline(file_name, "parquet")
+    features = sketch.features
+    assert features["price"].inferred_type == FRACTIONAL
+    assert features["weight"].inferred_type == FRACTIONAL
+    assert features["count"].inferred_type == INTEGRAL
+    assert features["name"].inferred_type == STRING
+    statistics = {feature["name"]: feature for feature in sketch.to_statistics()["features"]}
+    assert statistics["price"]["numerical_statistics"]["sum"] == 6.0
+    assert statistics["price"]["numerical_statistics"]["common"]["num_missing"] == 1
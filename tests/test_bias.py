@@ -0,0 +1,74 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import json
+import pytest
+import numpy as np
+from local_monitoring.bias import binarize_bias_dataset, compute_bias_report, read_bias_dataset
+
+CONFIG = {"label": "label", "label_values_or_threshold": [1], "facet": [{"name_or_index": "group"}]}
+
+
+def merged_record(features, label, prediction):
+    output = "" if prediction is None else str(prediction)
+    return {
+        "captureData": {
+            "endpointInput": {
+                "observedContentType": "application/json",
+                "data": json.dumps(features),
+                "encoding": "JSON",
+            },
+            "endpointOutput": {"observedContentType": "text/csv", "data": output, "encoding": "CSV"},
+        },
+        "groundTruthData": {"data": "" if label is None else str(label), "encoding": "CSV"},
+    }
+
+
+def write_records(tmp_path, records):
+    file_name = tmp_path / "merged.jsonl"
+    file_name.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(file_name)
+
+
+def test_records_without_label_or_prediction_are_skipped(tmp_path):
+    records = [
+        merged_record({"group": "a"}, 1, 0.9),
+        merged_record({"group": "b"}, None, 0.9),
+        merged_record({"group": "c"}, 0, None),
+        merged_record({"group": "a"}, 0, 0.2),
+        merged_record({"group": "b"}, 1, 0.3),
+    ]
+    features, labels, predictions, probabilities = read_bias_dataset(
+        write_records(tmp_path, records), [], "label", "", "0"
+    )
+    features, observed, predicted = binarize_bias_dataset(features, labels, predictions, probabilities, [1], 0.5)
+    assert features["group"].tolist() == ["a", "a", "b"]
+    assert observed.tolist() == [True, False, True]
+    assert predicted.tolist() == [True, False, False]
+    groups = compute_bias_report(features, observed, predicted, CONFIG)["post_training_bias_metrics"]["facets"]
+    assert [group["value_or_threshold"] for group in groups["group"]] == ["a", "b"]
+
+
+def test_missing_predicted_labels_are_skipped():
+    features = {"group": np.array(["a", "b", "c"])}
+    features, observed, predicted = binarize_bias_dataset(
+        features, ["1", "0", None], ["1", None, "1"], [None, None, None], [1]
+    )
+    assert features["group"].tolist() == ["a"]
+    assert observed.tolist() == [True]
+    assert predicted.tolist() == [True]
+
+
+def test_inputs_with_several_instances_are_rejected(tmp_path):
+    records = [merged_record({"instances": [{"group": "a"}, {"group": "b"}]}, 1, 0.9)]
+    with pytest.raises(ValueError, match="several rows"):
+        read_bias_dataset(write_records(tmp_path, records), [], "label", "", "0")
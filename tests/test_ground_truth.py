@@ -0,0 +1,139 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import os
+import json
+import datetime
+import pytest
+from local_monitoring import ground_truth
+from local_monitoring.ground_truth import join_ground_truth
+
+START = datetime.datetime(2026, 1, 1, 5)
+
+
+def write_lines(file_name, records, mode="w"):
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    with open(file_name, mode) as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def capture(index):
+    return {
+        "captureData": {
+            "endpointInput": {"observedContentType": "text/csv", "data": str(index), "encoding": "CSV"},
+            "endpointOutput": {"observedContentType": "text/csv", "data": "1", "encoding": "CSV"},
+        },
+        "eventMetadata": {"eventId": f"e{index}", "inferenceTime": "2026-01-01T04:00:00Z"},
+        "eventVersion": "0",
+    }
+
+
+def label(index, value="1"):
+    return {"groundTruthData": {"data": value, "encoding": "CSV"}, "eventMetadata": {"eventId": f"e{index}"}}
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    write_lines(str(tmp_path / "capture/2026/01/01/04/capture.jsonl"), [capture(index) for index in range(100)])
+    return tmp_path
+
+
+def join(path, start=START, **kwargs):
+    return join_ground_truth(
+        str(path / "capture"), str(path / "ground-truth"), str(path / "merged"), start, 1, 2, **kwargs
+    )
+
+
+def merged_event_ids(path):
+    event_ids = []
+    for root, _, files in os.walk(path / "merged"):
+        for file_name in files:
+            if file_name.endswith(".jsonl") and ".join-state" not in root:
+                with open(os.path.join(root, file_name)) as f:
+                    event_ids.extend(json.loads(line)["eventMetadata"]["eventId"] for line in f)
+    return sorted(event_ids)
+
+
+def test_appended_labels_are_joined_once(dataset):
+    labels_file = str(dataset / "ground-truth/2026/01/01/05/labels.jsonl")
+    write_lines(labels_file, [label(index) for index in list(range(60)) + [1000, 1001]])
+    assert join(dataset) == {"Joined": 60, "Pending": 2, "Expired": 0, "GroundTruthFiles": 1}
+    write_lines(labels_file, [label(index) for index in range(60, 100)], mode="a")
+    assert join(dataset) == {"Joined": 40, "Pending": 2, "Expired": 0, "GroundTruthFiles": 1}
+    assert join(dataset) == {"Joined": 0, "Pending": 2, "Expired": 0, "GroundTruthFiles": 0}
+    assert merged_event_ids(dataset) == sorted(f"e{index}" for index in range(100))
+
+
+def test_partial_last_line_is_joined_once_complete(dataset):
+    labels_file = str(dataset / "ground-truth/2026/01/01/05/labels.jsonl")
+    write_lines(labels_file, [label(0)])
+    line = json.dumps(label(1))
+    with open(labels_file, "a") as f:
+        f.write(line[:10])
+    assert join(dataset)["Joined"] == 1
+    with open(labels_file, "a") as f:
+        f.write(line[10:] + "\n")
+    assert join(dataset)["Joined"] == 1
+    assert merged_event_ids(dataset) == ["e0", "e1"]
+
+
+def test_pending_labels_expire(dataset):
+    write_lines(str(dataset / "ground-truth/2026/01/01/05/labels.jsonl"), [label(1000)])
+    assert join(dataset)["Pending"] == 1
+    # the inference of a label of 05:00 would be older than the 2 hours of lookback before 08:00
+    assert join(dataset, START + datetime.timedelta(hours=3)) == {
+        "Joined": 0,
+        "Pending": 0,
+        "Expired": 1,
+        "GroundTruthFiles": 0,
+    }
+
+
+def test_duplicate_event_ids_in_a_batch(dataset):
+    write_lines(str(dataset / "ground-truth/2026/01/01/05/labels.jsonl"), [label(0, "0"), label(1), label(0, "1")])
+    assert join(dataset)["Joined"] == 2
+    with open(next((dataset / "merged/2026/01/01/04").glob("merged-*.jsonl"))) as f:
+        records = {record["eventMetadata"]["eventId"]: record for record in map(json.loads, f)}
+    assert records["e0"]["groundTruthData"]["data"] == "1"
+
+
+def test_interrupted_join_is_not_duplicated(dataset, monkeypatch):
+    write_lines(str(dataset / "ground-truth/2026/01/01/05/labels.jsonl"), [label(index) for index in range(100)])
+    join_batch = ground_truth.GroundTruthJoiner._join_batch
+    calls = []
+
+    def failing_join_batch(self, batch):
+        calls.append(len(batch))
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        join_batch(self, batch)
+
+    monkeypatch.setattr(ground_truth.GroundTruthJoiner, "_join_batch", failing_join_batch)
+    with pytest.raises(RuntimeError):
+        join(dataset, batch_size=10)
+    monkeypatch.setattr(ground_truth.GroundTruthJoiner, "_join_batch", join_batch)
+    assert merged_event_ids(dataset) == []
+    assert not list((dataset / "merged").glob("**/*.tmp"))
+    assert join(dataset, batch_size=10)["Joined"] == 100
+    assert merged_event_ids(dataset) == sorted(f"e{index}" for index in range(100))
+
+
+def test_join_interrupted_after_its_commit(dataset, monkeypatch):
+    write_lines(str(dataset / "ground-truth/2026/01/01/05/labels.jsonl"), [label(index) for index in range(50)])
+    commit_outputs = ground_truth.commit_outputs
+    monkeypatch.setattr(ground_truth, "commit_outputs", lambda *args: None)
+    join(dataset)
+    monkeypatch.setattr(ground_truth, "commit_outputs", commit_outputs)
+    # the state is committed: the next run renames the merged files without joining the labels again
+    assert join(dataset)["Joined"] == 0
+    assert merged_event_ids(dataset) == sorted(f"e{index}" for index in range(50))
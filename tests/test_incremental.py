@@ -0,0 +1,48 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import json
+import numpy as np
+from local_monitoring.incremental import FeatureSketch
+from local_monitoring.statistics import FeatureProfile
+
+
+def sketch(name: str, values: np.ndarray) -> FeatureSketch:
+    # round trip through sketches.json, like the hourly sketches
+    profile = FeatureProfile(name, np.array([repr(float(value)) for value in values]))
+    return FeatureSketch.from_dict(json.loads(json.dumps(FeatureSketch.from_profile(profile).to_dict())))
+
+
+def test_merged_numerical_statistics():
+    values = np.random.default_rng(0).normal(10, 3, 10000)
+    merged = sketch("x", values[:10])
+    for chunk in np.array_split(values[10:], 6):
+        merged.merge(sketch("x", chunk))
+    statistics = merged.to_statistics()["numerical_statistics"]
+    assert statistics["common"]["num_present"] == len(values)
+    assert np.isclose(statistics["mean"], values.mean())
+    assert np.isclose(statistics["sum"], values.sum())
+    assert np.isclose(statistics["std_dev"], values.std())
+
+
+def test_std_dev_of_large_values_with_low_variance():
+    values = 1e9 + np.random.default_rng(0).normal(0, 0.01, 30000)
+    merged = sketch("x", values[:1])
+    for chunk in np.array_split(values[1:], 7):
+        merged.merge(sketch("x", chunk))
+    statistics = merged.to_statistics()["numerical_statistics"]
+    assert np.isclose(statistics["std_dev"], values.std(), rtol=1e-4)
+
+
+def test_merge_empty_sketch():
+    merged = sketch("x", np.array([1.0, 2.0, 3.0])).merge(FeatureSketch("x"))
+    assert merged.to_statistics()["numerical_statistics"]["std_dev"] == np.std([1.0, 2.0, 3.0])
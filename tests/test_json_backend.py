@@ -0,0 +1,72 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import json
+import math
+import pytest
+import json_backend
+
+DOCUMENTS = [
+    b'{"unicode": "\\u00e9\\u4e2d\xc3\xa9", "escapes": "a\\"b\\\\c\\n\\t\\/", "empty": [{}, [], ""]}',
+    b'{"floats": [0.1, 1e16, 1e-7, -0.0, 1.7976931348623157e308, 5e-324, 0.0031182170184993474]}',
+    b'{"big": 123456789012345678901234567890, "negative": -9223372036854775809, "max": 18446744073709551615}',
+    b"12345678901234567890123",
+    b'{"digits": "1234567890123456789012", "bias": 12345678901234567.5}',
+    b'{"not_finite": [NaN, Infinity, -Infinity]}',
+    b'{"duplicate": 1, "duplicate": 2}',
+    b"[1, 2.5, true, false, null]",
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(json_backend, "orjson", None)
+    return request.param
+
+
+def same(left, right) -> bool:
+    # NaN != NaN, and 1 == 1.0: compare the json module's serializations
+    return json.dumps(left) == json.dumps(right)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_loads_like_json(backend, document):
+    assert same(json_backend.loads(document), json.loads(document))
+    assert same(json_backend.loads(document.decode("utf-8")), json.loads(document))
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_round_trip(backend, document):
+    expected = json.loads(document)
+    assert same(json_backend.loads(json_backend.dumps(expected)), expected)
+    sorted_document = json.loads(json.dumps(expected, sort_keys=True))
+    assert same(json_backend.loads(json_backend.dumps(expected, sort_keys=True)), sorted_document)
+    assert json_backend.dumps(expected, pretty=True) == json.dumps(expected, indent=4).encode("utf-8")
+
+
+def test_big_integers_stay_integers(backend):
+    document = json_backend.loads(b'{"value": [123456789012345678901234567890, -9223372036854775809]}')
+    assert document == {"value": [123456789012345678901234567890, -9223372036854775809]}
+    assert all(isinstance(value, int) for value in document["value"])
+
+
+def test_non_finite_floats(backend):
+    document = json_backend.loads(json_backend.dumps({"value": [math.nan, math.inf]}))
+    assert math.isnan(document["value"][0]) and document["value"][1] == math.inf
+
+
+def test_invalid_document(backend):
+    with pytest.raises(json.JSONDecodeError):
+        json_backend.loads(b'{"value": ')
@@ -0,0 +1,42 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import datetime
+from local_monitoring.listing import HourListingCache, iter_hour_uris
+
+UTC_PLUS_2 = datetime.timezone(datetime.timedelta(hours=2))
+
+
+class FakeS3Client:
+    def __init__(self, keys):
+        self.keys = keys
+        self.listed = []
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        self.listed.append(Prefix)
+        return [{"Contents": [{"Key": key} for key in self.keys if key.startswith(Prefix)]}]
+
+
+def test_times_with_an_offset_are_converted_to_utc(tmp_path):
+    s3_client = FakeS3Client(["output/2026/01/01/13/statistics.json", "output/2026/01/01/14/statistics.json"])
+    cache = HourListingCache(str(tmp_path))
+    start = datetime.datetime(2026, 1, 1, 15, 30, tzinfo=UTC_PLUS_2)
+    now = datetime.datetime(2026, 1, 1, 19, 30, tzinfo=UTC_PLUS_2)
+    uris = list(iter_hour_uris("s3://bucket/output", start, 2, s3_client, cache=cache, now=now, max_workers=1))
+    assert uris == [f"s3://bucket/{key}" for key in s3_client.keys]
+    # 13:00 UTC is closed at 17:30 UTC (with the default 3 settle hours), 14:00 is not
+    assert cache.misses == 1
+    list(iter_hour_uris("s3://bucket/output", start, 2, s3_client, cache=cache, now=now.replace(tzinfo=None)))
+    assert s3_client.listed == ["output/2026/01/01/13/", "output/2026/01/01/14/", "output/2026/01/01/14/"]
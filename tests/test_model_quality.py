@@ -0,0 +1,73 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import json
+import numpy as np
+import pytest
+from local_monitoring.model_quality import (
+    BINARY_CLASSIFICATION,
+    BinaryClassificationMetrics,
+    binary_classes,
+    compute_metrics,
+)
+
+
+def write_records(tmp_path, records):
+    file_name = tmp_path / "merged.jsonl"
+    lines = []
+    for label, output in records:
+        record = {
+            "captureData": {"endpointOutput": {"observedContentType": "text/csv", "data": output, "encoding": "CSV"}},
+            "groundTruthData": {"data": label, "encoding": "CSV"},
+        }
+        lines.append(json.dumps(record) + "\n")
+    file_name.write_text("".join(lines))
+    return str(file_name)
+
+
+def confusion_matrix(statistics):
+    return statistics["binary_classification_metrics"]["confusion_matrix"]
+
+
+def test_binary_classes():
+    values = np.array(["1", "0", "1.0", "2", "yes"])
+    assert binary_classes(values).tolist() == [1, 0, 1, -1, -1]
+    assert binary_classes(np.array(["yes", "no", "maybe"]), "yes", "no").tolist() == [1, 0, -1]
+
+
+def test_string_labels_are_mapped_with_the_positive_label(tmp_path):
+    path = write_records(tmp_path, [("yes", "yes"), ("no", "yes"), ("yes", "no"), ("no", "no")])
+    statistics = compute_metrics(
+        path, BINARY_CLASSIFICATION, inference_attribute="0", positive_label="yes", negative_label="no"
+    )
+    assert statistics["dataset"]["item_count"] == 4
+    assert confusion_matrix(statistics) == {"0": {"0": 1, "1": 1}, "1": {"0": 1, "1": 1}}
+
+
+def test_out_of_domain_values_are_skipped(tmp_path):
+    path = write_records(tmp_path, [("1", "0.9"), ("2", "0.9"), ("0", "0.1"), ("1", "0.2")])
+    statistics = compute_metrics(path, BINARY_CLASSIFICATION, probability_attribute="0")
+    assert statistics["dataset"]["item_count"] == 3
+    assert confusion_matrix(statistics) == {"0": {"0": 1, "1": 0}, "1": {"0": 1, "1": 1}}
+    assert statistics["binary_classification_metrics"]["auc"]["value"] == 1.0
+
+
+def test_out_of_domain_predicted_labels_are_skipped(tmp_path):
+    path = write_records(tmp_path, [("1", "1"), ("0", "3"), ("0", "0")])
+    statistics = compute_metrics(path, BINARY_CLASSIFICATION, inference_attribute="0")
+    assert statistics["dataset"]["item_count"] == 2
+    assert confusion_matrix(statistics) == {"0": {"0": 1, "1": 0}, "1": {"0": 0, "1": 1}}
+
+
+def test_update_rejects_non_binary_values():
+    with pytest.raises(ValueError, match="0 or 1"):
+        BinaryClassificationMetrics().update(np.array([0, 2]), np.array([0, 1]))
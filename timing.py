@@ -0,0 +1,277 @@
+# #####################################################################################################################
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                                                 #
+#                                                                                                                     #
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance     #
+#  with the License. A copy of the License is located at                                                              #
+#                                                                                                                     #
+#  http://www.apache.org/licenses/LICENSE-2.0                                                                         #
+#                                                                                                                     #
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES  #
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
+#  and limitations under the License.                                                                                 #
+# #####################################################################################################################
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# formats of the per-phase metrics: CloudWatch Embedded Metric Format log lines, or a Prometheus textfile
+METRICS_FORMATS = ["none", "emf", "prometheus"]
+EMF_NAMESPACE = "SageMakerModelMonitor"
+DEFAULT_PROMETHEUS_FILE = "model-monitor-timing.prom"
+
+# spans opened by the current thread/task, as (name, start time) pairs from the outermost to the innermost
+_open_spans: contextvars.ContextVar = contextvars.ContextVar("open_spans", default=())
+
+
+class SpanTree:
+    """
+    Thread-safe aggregation of the timing spans by path (the names of the span and its parents), keeping for every
+    path its call count, errors count, total and max durations
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[Tuple[str, ...], Dict[str, float]] = {}
+        self.started_at = time.time()
+
+    def record(self, path: Tuple[str, ...], duration: float, error: bool = False) -> None:
+        with self._lock:
+            span = self._spans.setdefault(path, {"Count": 0, "Errors": 0, "TotalSeconds": 0.0, "MaxSeconds": 0.0})
+            span["Count"] += 1
+            span["Errors"] += int(error)
+            span["TotalSeconds"] += duration
+            span["MaxSeconds"] = max(span["MaxSeconds"], duration)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans = {}
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """
+        Returns:
+            dict[tuple[str, ...], dict[str, float]]: the spans by path. The spans still open in the current context
+                (e.g. main(), when it writes the report) are included with their duration so far
+        """
+        with self._lock:
+            spans = {path: dict(span) for path, span in self._spans.items()}
+        now = time.perf_counter()
+        open_spans = _open_spans.get()
+        for depth in range(len(open_spans)):
+            path = tuple(name for name, _ in open_spans[: depth + 1])
+            duration = now - open_spans[depth][1]
+            span = spans.setdefault(path, {"Count": 0, "Errors": 0, "TotalSeconds": 0.0, "MaxSeconds": 0.0})
+            span["Count"] += 1
+            span["TotalSeconds"] += duration
+            span["MaxSeconds"] = max(span["MaxSeconds"], duration)
+        return spans
+
+
+# process-wide spans, recorded by the functions decorated by utils.exception_handler
+spans = SpanTree()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Times a block of code as a span, nested under the spans already open in the current thread/task
+
+    Args:
+        name (str): the span's name
+    """
+    parents = _open_spans.get()
+    start_time = time.perf_counter()
+    token = _open_spans.set(parents + ((name, start_time),))
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        spans.record(tuple(parent for parent, _ in parents) + (name,), time.perf_counter() - start_time, error)
+        _open_spans.reset(token)
+
+
+def in_current_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Binds a function to a copy of the current context, so the spans it opens in a worker thread are nested under
+    the spans open in the submitting thread. Create one per submitted task (a context can not be entered twice)
+
+    Args:
+        func (Callable): the function submitted to a thread pool
+
+    Returns:
+        Callable: the function running in a copy of the current context
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def build_report() -> Dict[str, Any]:
+    """
+    Builds the timing report, nesting the spans under their parents
+
+    Returns:
+        dict[str, Any]: the report {"StartedAt": ..., "Spans": [{"Name": ..., "Count": ..., "Children": [...]}, ...]}
+    """
+    root = {"Children": []}
+    nodes = {(): root}
+    for path, span_stats in sorted(spans.snapshot().items()):
+        node = {
+            "Name": path[-1],
+            "Count": span_stats["Count"],
+            "Errors": span_stats["Errors"],
+            "TotalSeconds": round(span_stats["TotalSeconds"], 6),
+            "MaxSeconds": round(span_stats["MaxSeconds"], 6),
+            "Children": [],
+        }
+        nodes[path] = node
+        # the parents sort before their children
+        nodes[path[:-1]]["Children"].append(node)
+    # slowest phases first
+    for node in nodes.values():
+        node["Children"].sort(key=lambda child: child["TotalSeconds"], reverse=True)
+    return {"StartedAt": spans.started_at, "Spans": root["Children"]}
+
+
+def emf_lines(dimensions: Dict[str, str]) -> List[str]:
+    """
+    Formats the spans as CloudWatch Embedded Metric Format log lines (one per span path)
+
+    Args:
+        dimensions (dict[str, str]): extra properties of every line (e.g. {"Project": ...}). Only the phase is
+            used as metric dimension, to keep the number of metrics bounded
+
+    Returns:
+        list[str]: the JSON log lines
+    """
+    timestamp = int(time.time() * 1000)
+    lines = []
+    for path, span_stats in sorted(spans.snapshot().items()):
+        lines.append(
+            json.dumps(
+                {
+                    "_aws": {
+                        "Timestamp": timestamp,
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": EMF_NAMESPACE,
+                                "Dimensions": [["Phase"]],
+                                "Metrics": [
+                                    {"Name": "PhaseDuration", "Unit": "Seconds"},
+                                    {"Name": "PhaseCalls", "Unit": "Count"},
+                                    {"Name": "PhaseErrors", "Unit": "Count"},
+                                ],
+                            }
+                        ],
+                    },
+                    "Phase": "/".join(path),
+                    **dimensions,
+                    "PhaseDuration": round(span_stats["TotalSeconds"], 6),
+                    "PhaseCalls": span_stats["Count"],
+                    "PhaseErrors": span_stats["Errors"],
+                }
+            )
+        )
+    return lines
+
+
+def prometheus_text(labels: Dict[str, str]) -> str:
+    """
+    Formats the spans in the Prometheus text exposition format (for the node_exporter textfile collector)
+
+    Args:
+        labels (dict[str, str]): extra labels of every sample (e.g. {"project": ...})
+
+    Returns:
+        str: the metrics
+    """
+    metrics = [
+        ("model_monitor_phase_seconds_total", "TotalSeconds", "Time spent in the phase."),
+        ("model_monitor_phase_calls_total", "Count", "Number of calls of the phase."),
+        ("model_monitor_phase_errors_total", "Errors", "Number of failed calls of the phase."),
+    ]
+    snapshot = sorted(spans.snapshot().items())
+    lines = []
+    for metric, key, description in metrics:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+        for path, span_stats in snapshot:
+            sample_labels = {**labels, "phase": "/".join(path)}
+            label_text = ",".join(
+                '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                for name, value in sample_labels.items()
+            )
+            lines.append(f"{metric}{{{label_text}}} {round(span_stats[key], 6)}")
+    return "\n".join(lines) + "\n"
+
+
+def add_timing_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the timing report/metrics command line arguments
+
+    Args:
+        parser (ArgumentParser): the parser
+    """
+    parser.add_argument(
+        "--timing-report-file",
+        type=str,
+        default="timing-report.json",
+        help="The JSON file's name used to export the per-phase timings. Use '' to disable it. "
+        "Default 'timing-report.json'.",
+    )
+    parser.add_argument(
+        "--timing-metrics-format",
+        type=str,
+        choices=METRICS_FORMATS,
+        default="none",
+        help="Also export the per-phase timings as metrics: 'emf' (CloudWatch Embedded Metric Format log lines), "
+        "'prometheus' (textfile collector format) or 'none'. Default 'none'.",
+    )
+    parser.add_argument(
+        "--timing-metrics-file",
+        type=str,
+        default="",
+        help=(
+            "The file's name used to export the metrics. Default '' (EMF lines are printed to stdout, "
+            f"Prometheus metrics are written to '{DEFAULT_PROMETHEUS_FILE}')."
+        ),
+    )
+
+
+def export_timings(args: argparse.Namespace, dimensions: Optional[Dict[str, str]] = None) -> None:
+    """
+    Writes the timing report, and the metrics if enabled. Failures are logged, and never fail the run
+
+    Args:
+        args (Namespace): The Namespace containing the parsed arguments (using argparse)
+        dimensions (dict[str, str]): extra EMF properties/Prometheus labels, e.g. {"Project": ...}
+    """
+    dimensions = dimensions or {}
+    try:
+        if args.timing_report_file:
+            with open(args.timing_report_file, "w") as f:
+                json.dump(build_report(), f, indent=4)
+        if args.timing_metrics_format == "emf":
+            lines = emf_lines(dimensions)
+            if args.timing_metrics_file:
+                with open(args.timing_metrics_file, "w") as f:
+                    f.write("\n".join(lines) + "\n")
+            else:
+                print("\n".join(lines), flush=True)
+        elif args.timing_metrics_format == "prometheus":
+            file_name = args.timing_metrics_file or DEFAULT_PROMETHEUS_FILE
+            # write atomically, the textfile collector may read the file at any time
+            with open(f"{file_name}.tmp", "w") as f:
+                f.write(prometheus_text({name.lower(): value for name, value in dimensions.items()}))
+            os.replace(f"{file_name}.tmp", file_name)
+    except OSError as e:
+        logger.warning(f"Unable to export the timings: {str(e)}")
@@ -10,19 +10,38 @@
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions     #
 #  and limitations under the License.                                                                                 #
 # #####################################################################################################################
-import json
-import sagemaker
-import botocore
+import os
+import gzip
+import zlib
+import hashlib
+import functools
+import botocore.client
+import botocore.exceptions
 import argparse
 import logging
-from typing import Callable, Any, Dict, List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any, Dict, List, Optional, Tuple
+import json_backend
+import timing
+from caching import JsonFileCache, S3ContentCache
+from streaming_json import MIN_PART_SIZE, READ_CHUNK_SIZE, S3MultipartUploadWriter, iter_merged_json_object
 
 logger = logging.getLogger(__name__)
 
+# region -> framework -> ImageUri table, generated from the SageMaker SDK by generate_image_uris_table.py
+IMAGE_URIS_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_uris.json")
+IMAGE_URIS_TABLE_FORMAT_VERSION = 1
+
+# serialization modes of the JSON files uploaded to S3 (pretty|compact|gzip) and exported locally (pretty|compact)
+SERIALIZATION_MODES = ["pretty", "compact", "gzip"]
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+
 
 def exception_handler(func: Callable[..., Any]) -> Any:
     """
-    Decorator function to handle exceptions
+    Decorator function to handle exceptions, and time every call as a span named after the function
+    (see timing.py)
 
     Args:
         func (object): function to be decorated
@@ -34,9 +53,11 @@ def exception_handler(func: Callable[..., Any]) -> Any:
         Exception thrown by the decorated function
     """
 
+    @functools.wraps(func)
     def wrapper_function(*args, **kwargs):
         try:
-            return func(*args, **kwargs)
+            with timing.span(func.__name__):
+                return func(*args, **kwargs)
 
         except Exception as e:
             logger.error(f"Error in {func.__name__}: {str(e)}")
@@ -46,9 +67,57 @@ def exception_handler(func: Callable[..., Any]) -> Any:
 
 
 @exception_handler
+def run_concurrently(tasks: List[Tuple[Callable[..., Any], Tuple[Any, ...]]], max_concurrency: int = 1) -> List[Any]:
+    """
+    Runs independent tasks using a bounded thread pool
+
+    Args:
+        tasks (list[tuple[Callable, tuple]]): list of (function, positional arguments) pairs
+        max_concurrency (int): maximum number of tasks running at the same time. Tasks run serially if <= 1
+
+    Returns:
+        list[Any]: the tasks' return values, in the same order as the tasks
+    """
+    if max_concurrency <= 1 or len(tasks) <= 1:
+        return [func(*func_args) for func, func_args in tasks]
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(tasks))) as executor:
+        # run the tasks in a copy of the current context, so their timing spans are nested under the caller's
+        futures = [executor.submit(timing.in_current_context(func), *func_args) for func, func_args in tasks]
+        return [future.result() for future in futures]
+
+
+@functools.lru_cache(maxsize=None)
+def load_image_uris_table(file_name: str = IMAGE_URIS_TABLE_FILE) -> Dict[str, Dict[str, str]]:
+    """
+    Loads the precomputed region -> framework -> ImageUri table (read once per process)
+
+    Args:
+        file_name (str): The table JSON file name
+
+    Returns:
+        dict[str, dict[str, str]]: The ImageUris {<region>: {<framework>: <image uri>, ...}, ...}, or an empty dict
+            if the file is missing or was generated with another table format
+    """
+    try:
+        with open(file_name, "rb") as f:
+            table = json_backend.loads(f.read())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unable to load the ImageUris table {file_name}: {str(e)}")
+        return {}
+
+    if table.get("FormatVersion") != IMAGE_URIS_TABLE_FORMAT_VERSION:
+        logger.warning(f"Ignoring the ImageUris table {file_name}: unsupported format {table.get('FormatVersion')}")
+        return {}
+    return table["ImageUris"]
+
+
+@exception_handler
+@functools.lru_cache(maxsize=None)
 def get_built_in_model_monitor_image_uri(region: str, framework: str) -> str:
     """
-    Get the Amazon SageMaker Model Monitor Docker Image URI for the region
+    Get the Amazon SageMaker Model Monitor Docker Image URI for the region. The URI is looked up in the
+    precomputed ImageUris table, the SageMaker SDK is only used for regions/frameworks missing from it
 
     Args:
         region (str): The AWS region, where the pipeline is deployed
@@ -57,6 +126,20 @@ def get_built_in_model_monitor_image_uri(region: str, framework: str) -> str:
     Returns:
         str: The Model Monitor Docker Image URI
     """
+    model_monitor_image_uri = load_image_uris_table().get(region, {}).get(framework)
+    if model_monitor_image_uri:
+        return model_monitor_image_uri
+
+    logger.info(f"{framework} ImageUri for {region} not found in the ImageUris table, using the SageMaker SDK")
+    # the SDK is slow to import and optional, only import it when the table can not be used
+    try:
+        import sagemaker
+    except ImportError:
+        raise ValueError(
+            f"{framework} ImageUri for {region} is missing from {IMAGE_URIS_TABLE_FILE}, and the SageMaker SDK "
+            "is not installed. Install the sagemaker package, or regenerate the table (generate_image_uris_table.py)"
+        )
+
     model_monitor_image_uri = sagemaker.image_uris.retrieve(
         framework=framework,
         region=region,
@@ -65,6 +148,28 @@ def get_built_in_model_monitor_image_uri(region: str, framework: str) -> str:
     return model_monitor_image_uri
 
 
+@exception_handler
+def list_all_tags(sm_client: botocore.client, resource_arn: str) -> List[Dict[str, str]]:
+    """
+    Lists all the tags of an Amazon SageMaker resource, following the NextToken pagination
+
+    Args:
+        sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+        resource_arn (str): Amazon SageMaker resource ARN
+
+    Returns:
+        list[dict[str, str]]: The resource's tags in the format [{"Key":<key>, "Value":<value>}, ...]
+    """
+    tags = []
+    request = {"ResourceArn": resource_arn}
+    while True:
+        response = sm_client.list_tags(**request)
+        tags.extend(response["Tags"])
+        if not response.get("NextToken"):
+            return tags
+        request["NextToken"] = response["NextToken"]
+
+
 def get_project_tags(sm_client: botocore.client, sagemaker_project_arn: str) -> List[Dict[str, str]]:
     """
     Combines Resource's tags with Amazon SageMaker Studio project's custom tags
@@ -78,13 +183,58 @@ def get_project_tags(sm_client: botocore.client, sagemaker_project_arn: str) ->
     """
     # list the projects tags
     try:
-        response = sm_client.list_tags(ResourceArn=sagemaker_project_arn)
-        return response["Tags"]
+        return list_all_tags(sm_client, sagemaker_project_arn)
     except:
         logger.error("Error getting project tags")
     return []
 
 
+class ProjectTagsResolver:
+    """
+    Resolves Amazon SageMaker Studio projects' tags, memoized per ResourceArn for the life of the process,
+    so every project's tags cost a single (paginated) list_tags fetch across stages and batch runs
+
+    Args:
+        sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+        tags_cache (JsonFileCache): optional on-disk cache of the tags, shared across runs
+    """
+
+    def __init__(self, sm_client: botocore.client, tags_cache: Optional[JsonFileCache] = None):
+        self.sm_client = sm_client
+        self.tags_cache = tags_cache
+        self._tags: Dict[str, List[Dict[str, str]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_tags(self, sagemaker_project_arn: str) -> List[Dict[str, str]]:
+        """
+        Gets a project's tags
+
+        Args:
+            sagemaker_project_arn (str): Amazon SageMaker Studio project ARN
+
+        Returns:
+            list[dict[str, str]]: The project tags in the format [{"Key":<key>, "Value":<value>}, ...],
+                or an empty list if they can not be listed (failures are not memoized)
+        """
+        with self._lock:
+            arn_lock = self._locks.setdefault(sagemaker_project_arn, threading.Lock())
+        # one fetch per project, even if its stages are resolved concurrently
+        with arn_lock:
+            if sagemaker_project_arn not in self._tags:
+                tags = self.tags_cache.get(sagemaker_project_arn) if self.tags_cache is not None else None
+                if tags is None:
+                    try:
+                        tags = list_all_tags(self.sm_client, sagemaker_project_arn)
+                    except:
+                        logger.error("Error getting project tags")
+                        return []
+                    if self.tags_cache is not None:
+                        self.tags_cache.set(sagemaker_project_arn, tags)
+                self._tags[sagemaker_project_arn] = tags
+            return self._tags[sagemaker_project_arn]
+
+
 def combine_resource_tags(new_tags: Dict[str, str], project_tags_list: List[Dict[str, str]]) -> Dict[str, str]:
     """
     Combines Resource's tags with Amazon SageMaker Studio project's tags
@@ -108,19 +258,66 @@ def combine_resource_tags(new_tags: Dict[str, str], project_tags_list: List[Dict
 
 
 @exception_handler
-def get_baselines_and_model_name(endpoint_name: str, sm_client: botocore.client) -> Dict[str, Any]:
+def get_endpoint_config_name(endpoint_name: str, sm_client: botocore.client) -> str:
+    """
+    Gets the EndpointConfigName of an endpoint. Endpoint configs are immutable, so a new EndpointConfigName is used
+    whenever a new model is deployed to the endpoint
+
+    Args:
+        endpoint_name (str): SageMaker Endpoint name
+        sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+
+    Returns:
+        str: The EndpointConfigName
+    """
+    return sm_client.describe_endpoint(EndpointName=endpoint_name)["EndpointConfigName"]
+
+
+@exception_handler
+def get_baselines_and_model_name(
+    endpoint_name: str,
+    sm_client: botocore.client,
+    resolution_cache: Optional[JsonFileCache] = None,
+    endpoint_config_name: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Gets Baselines from Model Registry and Model Name from the deployed endpoint
 
     Args:
         endpoint_name (str): SageMaker Endpoint name to be monitored
         sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+        resolution_cache (JsonFileCache): optional cache of the EndpointConfigName/ModelPackageName resolutions.
+            If provided, only describe_endpoint is called when the endpoint is unchanged
+        endpoint_config_name (str): the endpoint's EndpointConfigName, if already described
 
     Returns:
-        dict[str, Any]: The baselines and Model Name {"DriftCheckBaselines": {...}, "ModelName": "..."}
+        dict[str, Any]: The baselines, Model Name and Model Package Name
+            {"DriftCheckBaselines": {...}, "ModelName": "...", "ModelPackageName": "..."}
     """
     # get the EndpointConfigName using the Endpoint Name
-    endpoint_config_name = sm_client.describe_endpoint(EndpointName=endpoint_name)["EndpointConfigName"]
+    if endpoint_config_name is None:
+        endpoint_config_name = get_endpoint_config_name(endpoint_name, sm_client)
+
+    if resolution_cache is not None:
+        # invalidate the previous resolution if the endpoint has been updated
+        previous_endpoint_config_name = resolution_cache.get(f"endpoint/{endpoint_name}")
+        if previous_endpoint_config_name not in (None, endpoint_config_name):
+            logger.info(f"Endpoint {endpoint_name} moved to {endpoint_config_name}, invalidating cached resolution")
+            resolution_cache.delete(f"endpoint-config/{previous_endpoint_config_name}")
+        if previous_endpoint_config_name != endpoint_config_name:
+            resolution_cache.set(f"endpoint/{endpoint_name}", endpoint_config_name)
+
+        cached_model = resolution_cache.get(f"endpoint-config/{endpoint_config_name}")
+        cached_baselines = (
+            resolution_cache.get(f"model-package/{cached_model['ModelPackageName']}") if cached_model else None
+        )
+        if cached_baselines is not None:
+            logger.info(f"Using cached resolution of {endpoint_config_name} -> {cached_model['ModelPackageName']}")
+            return {
+                "DriftCheckBaselines": cached_baselines,
+                "ModelName": cached_model["ModelName"],
+                "ModelPackageName": cached_model["ModelPackageName"],
+            }
 
     # get the ModelName using EndpointConfigName
     model_name = sm_client.describe_endpoint_config(EndpointConfigName=endpoint_config_name)["ProductionVariants"][0][
@@ -136,11 +333,20 @@ def get_baselines_and_model_name(endpoint_name: str, sm_client: botocore.client)
     # re-format the baselines
     result = {key: {k: raw_baselines[key][k]["S3Uri"] for k in raw_baselines.get(key)} for key in raw_baselines}
 
-    return {"DriftCheckBaselines": result, "ModelName": model_name}
+    if resolution_cache is not None:
+        resolution_cache.set(
+            f"endpoint-config/{endpoint_config_name}",
+            {"ModelName": model_name, "ModelPackageName": model_package_name},
+        )
+        resolution_cache.set(f"model-package/{model_package_name}", result)
+
+    return {"DriftCheckBaselines": result, "ModelName": model_name, "ModelPackageName": model_package_name}
 
 
 @exception_handler
-def get_json_file_from_s3(bucket_name: str, file_key: str, s3_client: botocore.client) -> Dict[str, Any]:
+def get_json_file_from_s3(
+    bucket_name: str, file_key: str, s3_client: botocore.client, content_cache: Optional[S3ContentCache] = None
+) -> Dict[str, Any]:
     """
     Gets JSON file's contents from S3 bucket
 
@@ -148,26 +354,229 @@ def get_json_file_from_s3(bucket_name: str, file_key: str, s3_client: botocore.c
         bucket_name (str): S3 bucket name
         file_key (str): json file s3 key
         s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        content_cache (S3ContentCache): optional local cache. If the file is cached, it is only downloaded
+            if its ETag has changed
 
     Returns:
         dict[str, Any]: file contents
     """
-    config_file = json.loads(s3_client.get_object(Bucket=bucket_name, Key=file_key)["Body"].read().decode("utf-8"))
+    cached = content_cache.get(bucket_name, file_key) if content_cache is not None else None
+    try:
+        response = s3_client.get_object(
+            Bucket=bucket_name, Key=file_key, **({"IfNoneMatch": cached[0]} if cached else {})
+        )
+    except botocore.exceptions.ClientError as e:
+        # the file has not changed since it was cached (304 Not Modified)
+        if cached is None or e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") != 304:
+            raise e
+        content_cache.record_hit()
+        body = cached[1]
+    else:
+        body = response["Body"].read()
+        if content_cache is not None:
+            content_cache.record_miss()
+            content_cache.set(bucket_name, file_key, response["ETag"], body)
+
+    # files uploaded with the gzip serialization mode are decompressed (JSON never starts with the gzip magic number)
+    if body[:2] == GZIP_MAGIC_NUMBER:
+        body = gzip.decompress(body)
+    config_file = json_backend.loads(body)
     return config_file
 
 
 @exception_handler
-def upload_json_to_s3(file_contents: Dict[str, Any], bucket_name: str, file_key: str, s3_client: botocore.client):
+def get_json_content_hash(file_contents: Dict[str, Any]) -> str:
     """
-    Uploads JSON file's contents to S3 bucket
+    Gets the SHA-256 hash of the canonical JSON serialization (sorted keys, no whitespace) of a file's contents
+
+    Args:
+        file_contents (dict[str, Any]): contents of file
+
+    Returns:
+        str: the hex digest of the hash
+    """
+    canonical_json = json_backend.dumps(file_contents, sort_keys=True)
+    return hashlib.sha256(canonical_json).hexdigest()
+
+
+@exception_handler
+def serialize_json(file_contents: Dict[str, Any], serialization: str = "pretty") -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serializes JSON file's contents
+
+    Args:
+        file_contents (dict[str, Any]): contents of file
+        serialization (str): "pretty" (indent=4), "compact" (no whitespace) or "gzip" (compact, gzip compressed)
+
+    Returns:
+        tuple[bytes, dict[str, str]]: (body, S3 put_object content arguments {"ContentType": ..., ...})
+    """
+    if serialization not in SERIALIZATION_MODES:
+        raise ValueError(f"Unknown serialization {serialization}, expected one of {SERIALIZATION_MODES}")
+
+    content_args = {"ContentType": "application/json"}
+    if serialization == "pretty":
+        return json_backend.dumps(file_contents, pretty=True), content_args
+
+    body = json_backend.dumps(file_contents)
+    if serialization == "gzip":
+        # mtime=0 keeps the output deterministic
+        return gzip.compress(body, mtime=0), {**content_args, "ContentEncoding": "gzip"}
+    return body, content_args
+
+
+@exception_handler
+def get_s3_object_metadata(bucket_name: str, file_key: str, s3_client: botocore.client) -> Dict[str, str]:
+    """
+    Gets the user-defined metadata of an S3 object
+
+    Args:
+        bucket_name (str): S3 bucket name
+        file_key (str): s3 object key
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+
+    Returns:
+        dict[str, str]: the object's metadata, or an empty dict if the object does not exist (or can not be read)
+    """
+    try:
+        return s3_client.head_object(Bucket=bucket_name, Key=file_key).get("Metadata", {})
+    except botocore.exceptions.ClientError as e:
+        if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") != 404:
+            logger.warning(f"Unable to get the metadata of s3://{bucket_name}/{file_key}: {str(e)}")
+    return {}
+
+
+@exception_handler
+def upload_json_to_s3(
+    file_contents: Dict[str, Any],
+    bucket_name: str,
+    file_key: str,
+    s3_client: botocore.client,
+    serialization: str = "pretty",
+) -> bool:
+    """
+    Uploads JSON file's contents to S3 bucket, unless the existing object already has the same contents
+    and serialization. The contents' hash is stored in the object's "content-sha256" metadata
 
     Args:
         file_contents (dict[str, Any]): contents of file
         bucket_name (str): S3 bucket name
         file_key (str): json file s3 key
         s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        serialization (str): serialization mode (pretty|compact|gzip), see serialize_json. Default "pretty"
+
+    Returns:
+        bool: True if the file was uploaded, False if the upload was skipped
     """
-    s3_client.put_object(Body=json.dumps(file_contents, indent=4), Bucket=bucket_name, Key=file_key)
+    content_hash = get_json_content_hash(file_contents)
+    existing_metadata = get_s3_object_metadata(bucket_name, file_key, s3_client)
+    # files uploaded before the serialization metadata was added were pretty printed
+    if existing_metadata.get("content-sha256") == content_hash and (
+        existing_metadata.get("serialization", "pretty") == serialization
+    ):
+        logger.info(f"s3://{bucket_name}/{file_key} is unchanged, skipping the upload")
+        return False
+
+    body, content_args = serialize_json(file_contents, serialization)
+    s3_client.put_object(
+        Body=body,
+        Bucket=bucket_name,
+        Key=file_key,
+        Metadata={"content-sha256": content_hash, "serialization": serialization},
+        **content_args,
+    )
+    return True
+
+
+@exception_handler
+def stream_merge_json_files_in_s3(
+    first_file: Dict[str, str],
+    second_file: Dict[str, str],
+    bucket_name: str,
+    file_key: str,
+    s3_client: botocore.client,
+    memory_limit_bytes: int,
+    serialization: str = "pretty",
+) -> bool:
+    """
+    Merges two JSON files (top-level keys of the second file override the first file's), streaming them from S3
+    to a multipart upload, so the files are never fully loaded in memory. The merged file is not uploaded again
+    if it was created from the same versions (ETags) of the two files
+
+    Args:
+        first_file (dict[str, str]): the first file {"Bucket": ..., "Key": ..., "ETag": ...}
+        second_file (dict[str, str]): the second file {"Bucket": ..., "Key": ..., "ETag": ...}
+        bucket_name (str): S3 bucket name of the merged file
+        file_key (str): json file s3 key of the merged file
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        memory_limit_bytes (int): approximate memory ceiling, including the 5 MiB upload part buffer.
+            The second file is buffered on disk beyond it
+        serialization (str): "pretty"/"compact" keep the source files' formatting, "gzip" compresses the
+            merged file. Default "pretty"
+
+    Returns:
+        bool: True if the merged file was uploaded, False if the upload was skipped
+    """
+    source_etags = ",".join(file["ETag"].strip('"') for file in (first_file, second_file))
+    existing_metadata = get_s3_object_metadata(bucket_name, file_key, s3_client)
+    if existing_metadata.get("source-etags") == source_etags and (
+        existing_metadata.get("serialization", "pretty") == serialization
+    ):
+        logger.info(f"s3://{bucket_name}/{file_key} is unchanged, skipping the upload")
+        return False
+
+    # IfMatch ensures the streamed files are the versions recorded in the metadata
+    first_chunks, second_chunks = [
+        s3_client.get_object(Bucket=file["Bucket"], Key=file["Key"], IfMatch=file["ETag"])["Body"].iter_chunks(
+            READ_CHUNK_SIZE
+        )
+        for file in (first_file, second_file)
+    ]
+    buffer_limit_bytes = max(memory_limit_bytes - MIN_PART_SIZE - 2 * READ_CHUNK_SIZE, 0)
+    content_args = {"ContentType": "application/json"}
+    # wbits=31 writes a gzip (rather than zlib) stream
+    compressor = zlib.compressobj(wbits=31) if serialization == "gzip" else None
+    if compressor is not None:
+        content_args["ContentEncoding"] = "gzip"
+    with S3MultipartUploadWriter(
+        s3_client,
+        bucket_name,
+        file_key,
+        extra_args={
+            **content_args,
+            "Metadata": {"source-etags": source_etags, "serialization": serialization},
+        },
+    ) as writer:
+        for data in iter_merged_json_object(first_chunks, second_chunks, buffer_limit_bytes):
+            writer.write(compressor.compress(data) if compressor is not None else data)
+        if compressor is not None:
+            writer.write(compressor.flush())
+    logger.info(f"Streamed {writer.bytes_written} bytes to s3://{bucket_name}/{file_key}")
+    return True
+
+
+@exception_handler
+def get_missing_s3_objects(file_s3_uris: List[str], s3_client: botocore.client) -> List[str]:
+    """
+    Checks that S3 objects exist (one HeadObject call per object)
+
+    Args:
+        file_s3_uris (list[str]): S3 file URIs
+        s3_client (Boto3 S3 client): Amazon S3 boto3 client
+
+    Returns:
+        list[str]: The URIs of the objects that do not exist (or can not be read)
+    """
+    missing = []
+    for file_s3_uri in file_s3_uris:
+        bucket_name, file_key = get_bucket_name_and_file_key(file_s3_uri)
+        try:
+            s3_client.head_object(Bucket=bucket_name, Key=file_key)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") != 404:
+                logger.warning(f"Unable to get {file_s3_uri}: {str(e)}")
+            missing.append(file_s3_uri)
+    return missing
 
 
 @exception_handler
@@ -186,7 +595,15 @@ def get_bucket_name_and_file_key(file_s3_uri: str) -> Tuple[str, str]:
 
 
 @exception_handler
-def process_bias_baselines(bias_baselines: Dict[str, str], s3_client: botocore.client) -> Dict[str, str]:
+def process_bias_baselines(
+    bias_baselines: Dict[str, str],
+    s3_client: botocore.client,
+    max_concurrency: int = 1,
+    content_cache: Optional[S3ContentCache] = None,
+    streaming_threshold_bytes: int = 0,
+    streaming_memory_limit_bytes: int = 64 * 1024 * 1024,
+    serialization: str = "pretty",
+) -> Dict[str, str]:
     """
     Combines Model Bias PreTrainingConstraints/PostTrainingConstraints json files and uploads
     the combined json file to the same S3 bucket
@@ -194,6 +611,12 @@ def process_bias_baselines(bias_baselines: Dict[str, str], s3_client: botocore.c
     Args:
         bias_baselines (Dict[str, str]): raw Model Bias baselines returned from Model Registry
         s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        max_concurrency (int): maximum number of concurrent S3 downloads. Default 1 (serial)
+        content_cache (S3ContentCache): optional local cache of the constraints files
+        streaming_threshold_bytes (int): if > 0, constraints files whose combined size reaches it are merged
+            with stream_merge_json_files_in_s3 instead of being loaded in memory. Default 0 (disabled)
+        streaming_memory_limit_bytes (int): memory ceiling of the streaming merge. Default 64 MiB
+        serialization (str): serialization mode (pretty|compact|gzip) of the combined file. Default "pretty"
 
     Returns:
         Dict[str, str]: processed Model Bias baselines
@@ -205,26 +628,58 @@ def process_bias_baselines(bias_baselines: Dict[str, str], s3_client: botocore.c
     post_s3_bucket_name, post_training_s3_file_key = get_bucket_name_and_file_key(
         bias_baselines["PostTrainingConstraints"]
     )
+    # create combined constraints file key
+    combined_file_key = f"{'/'.join(post_training_s3_file_key.split('/')[:-1])}/combined_bias_constraints.json"
+    combined_baselines = {
+        "ConfigFile": bias_baselines["ConfigFile"],
+        "Constraints": "".join(["s3://", post_s3_bucket_name, "/", combined_file_key]),
+    }
+
+    # stream large constraints files instead of loading them in memory
+    if streaming_threshold_bytes > 0:
+        pre_training_file, post_training_file = [
+            {"Bucket": bucket_name, "Key": file_key, **s3_client.head_object(Bucket=bucket_name, Key=file_key)}
+            for bucket_name, file_key in (
+                (pre_s3_bucket_name, pre_training_s3_file_key),
+                (post_s3_bucket_name, post_training_s3_file_key),
+            )
+        ]
+        if pre_training_file["ContentLength"] + post_training_file["ContentLength"] >= streaming_threshold_bytes:
+            stream_merge_json_files_in_s3(
+                pre_training_file,
+                post_training_file,
+                post_s3_bucket_name,
+                combined_file_key,
+                s3_client,
+                streaming_memory_limit_bytes,
+                serialization,
+            )
+            return combined_baselines
+
     # get json contents for Bias Pre/Post TrainingConstraints files
-    pre_training_json = get_json_file_from_s3(pre_s3_bucket_name, pre_training_s3_file_key, s3_client)
-    post_training_json = get_json_file_from_s3(post_s3_bucket_name, post_training_s3_file_key, s3_client)
+    pre_training_json, post_training_json = run_concurrently(
+        [
+            (get_json_file_from_s3, (pre_s3_bucket_name, pre_training_s3_file_key, s3_client, content_cache)),
+            (get_json_file_from_s3, (post_s3_bucket_name, post_training_s3_file_key, s3_client, content_cache)),
+        ],
+        max_concurrency,
+    )
     # combine Bias Pre/Post TrainingConstraints files
     pre_training_json.update(post_training_json)
-    # create combined constraints file key
-    combined_file_key = f"{'/'.join(post_training_s3_file_key.split('/')[:-1])}/combined_bias_constraints.json"
     # upload combined constraints json file to s3 bucket
-    upload_json_to_s3(pre_training_json, post_s3_bucket_name, combined_file_key, s3_client)
+    upload_json_to_s3(pre_training_json, post_s3_bucket_name, combined_file_key, s3_client, serialization)
 
     # return the new Bias baselines
-    return {
-        "ConfigFile": bias_baselines["ConfigFile"],
-        "Constraints": "".join(["s3://", post_s3_bucket_name, "/", combined_file_key]),
-    }
+    return combined_baselines
 
 
 @exception_handler
 def process_explainability_config_file(
-    explainability_baselines: Dict[str, str], model_name: str, s3_client: botocore.client
+    explainability_baselines: Dict[str, str],
+    model_name: str,
+    s3_client: botocore.client,
+    content_cache: Optional[S3ContentCache] = None,
+    serialization: str = "pretty",
 ) -> Dict[str, str]:
     """
     Updates Model Explainability json ConfigFile with model name, and uploads
@@ -234,6 +689,8 @@ def process_explainability_config_file(
         explainability_baselines (Dict[str, str]): raw Model Explainability baselines returned from Model Registry
         model_name (str): Amazon SageMaker model name
         s3_client (Boto3 S3 client): Amazon S3 boto3 client
+        content_cache (S3ContentCache): optional local cache of the config file
+        serialization (str): serialization mode (pretty|compact|gzip) of the uploaded file. Default "pretty"
 
     Returns:
         Dict[str, str]: processed Model Explainability baselines
@@ -241,13 +698,13 @@ def process_explainability_config_file(
     # extract the bucket name and file key
     s3_bucket_name, config_s3_file_key = get_bucket_name_and_file_key(explainability_baselines["ConfigFile"])
     # get json contents for Explainability ConfigFile file
-    config_file_json = get_json_file_from_s3(s3_bucket_name, config_s3_file_key, s3_client)
+    config_file_json = get_json_file_from_s3(s3_bucket_name, config_s3_file_key, s3_client, content_cache)
     # add model name to the predictor section
     config_file_json["predictor"].update({"model_name": model_name})
     # create the final file key
     monitor_config_file_key = f"{'/'.join(config_s3_file_key.split('/')[:-1])}/monitor_analysis_config.json"
     # upload final config json file to s3 bucket
-    upload_json_to_s3(config_file_json, s3_bucket_name, monitor_config_file_key, s3_client)
+    upload_json_to_s3(config_file_json, s3_bucket_name, monitor_config_file_key, s3_client, serialization)
     # return the new Explainability baselines
     return {
         "ConfigFile": "".join(["s3://", s3_bucket_name, "/", monitor_config_file_key]),
@@ -264,6 +721,7 @@ def extend_config(
     monitor_outputs_bucket: str,
     stage_config: Dict[str, Dict[str, str]],
     sm_client: botocore.client,
+    tags_resolver: Optional[ProjectTagsResolver] = None,
 ) -> Dict[str, Dict[str, str]]:
     """
     Extend the stage configuration of the Monitoring Schedule with additional parameters and tags based.
@@ -276,6 +734,8 @@ def extend_config(
         monitor_outputs_bucket (str): The S3 bucket name used to store monitor outputs
         stage_config (dict[str, dict[str, str]]): The stage's template parameters
         sm_client (Boto3 SageMaker client): Amazon SageMaker boto3 client
+        tags_resolver (ProjectTagsResolver): optional resolver memoizing the project tags. If not provided,
+            the tags are listed using sm_client
 
     Returns:
         dict[str, dict[str, str]]: The final Monitoring Schedule's config containing Parameters and Tags
@@ -335,7 +795,11 @@ def extend_config(
     }
 
     # get project tags
-    project_tags = get_project_tags(sm_client, args.sagemaker_project_arn)
+    project_tags = (
+        tags_resolver.get_tags(args.sagemaker_project_arn)
+        if tags_resolver is not None
+        else get_project_tags(sm_client, args.sagemaker_project_arn)
+    )
 
     # combine tags
     combined_tags = combine_resource_tags(new_tags, project_tags)
@@ -346,6 +810,62 @@ def extend_config(
     }
 
 
+@exception_handler
+def get_file_hash(file_name: str) -> str:
+    """
+    Gets the sha256 hex digest of a file's contents
+
+    Args:
+        file_name (str): The file name
+
+    Returns:
+        str: The sha256 hex digest
+    """
+    file_hash = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+@exception_handler
+def get_run_fingerprint(
+    args: argparse.Namespace,
+    model_package_name: str,
+    image_uris: Dict[str, str],
+    project_tags: List[Dict[str, str]],
+    excluded_args: List[str],
+) -> str:
+    """
+    Gets the fingerprint of all the inputs of a run. Two runs with the same fingerprint export the same configs
+
+    Args:
+        args (Namespace): The Namespace containing the parsed arguments (using argparse)
+        model_package_name (str): The ModelPackageName (ARN) of the model deployed to the staging endpoint
+        image_uris (dict[str, str]): The Model Monitor/Clarify ImageUris {<framework>: <image uri>, ...}
+        project_tags (list[dict[str, str]]): The SageMaker project's tags [{"Key":<key>, "Value":<value>}, ...]
+        excluded_args (list[str]): The arguments not affecting the exported configs (e.g. log level, cache settings)
+
+    Returns:
+        str: The sha256 hex digest of the inputs
+    """
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    inputs = {
+        "ModelPackageName": model_package_name,
+        "StagingConfigHash": get_file_hash(args.import_staging_config),
+        "ProdConfigHash": get_file_hash(args.import_prod_config),
+        "Arguments": {name: value for name, value in vars(args).items() if name not in excluded_args},
+        "ImageUris": image_uris,
+        "ProjectTags": project_tags,
+        # the code generating the configs
+        "CodeHash": {
+            name: get_file_hash(os.path.join(module_dir, name))
+            for name in ["utils.py", "get_baselines_and_configs.py"]
+        },
+    }
+    return get_json_content_hash(inputs)
+
+
 @exception_handler
 def read_config_from_json(file_name: str) -> Dict[str, Dict[str, str]]:
     """
@@ -357,19 +877,25 @@ def read_config_from_json(file_name: str) -> Dict[str, Dict[str, str]]:
     Returns:
         dict[str, dict[str, str]]: The config content
     """
-    with open(file_name, "r") as f:
-        config = json.load(f)
+    with open(file_name, "rb") as f:
+        config = json_backend.loads(f.read())
     return config
 
 
 @exception_handler
-def write_config_to_json(file_name: str, export_config: Dict[str, Dict[str, str]]) -> None:
+def write_config_to_json(
+    file_name: str, export_config: Dict[str, Dict[str, str]], serialization: str = "pretty"
+) -> None:
     """
     Writes template parameters/tags to a JSON file
 
     Args:
         file_name (str): The config JSON file name
         export_config (dict[str, dict[str, str]]): The config dict to write
+        serialization (str): "pretty" (indent=4) or "compact" (no whitespace). Default "pretty"
     """
-    with open(file_name, "w") as f:
-        json.dump(export_config, f, indent=4)
+    if serialization not in ("pretty", "compact"):
+        raise ValueError(f"Unknown serialization {serialization} for {file_name}, expected 'pretty' or 'compact'")
+
+    with open(file_name, "wb") as f:
+        f.write(json_backend.dumps(export_config, pretty=serialization == "pretty"))